@@ -0,0 +1,315 @@
+from library import global_vars as gl
+import os
+import re
+import sqlite3
+import datetime
+import numpy as np
+
+__version__ = "0.2"
+__author__ = "Katie Whitman"
+__maintainer__ = "Katie Whitman"
+__email__ = "kathryn.whitman@nasa.gov"
+
+#2026-10-17, Version 0.1: Catalog of the data files on your computer
+#   and the time period covered by each file.
+#2026-10-17, changes in 0.2: When more than one version of a file is
+#   cataloged (e.g. GOES-R _v1-0-1, _v2-0-0, _v3-0-0, _v3-0-1), lookup_files
+#   only returns the highest version, as check_goesR_data does. A lookup
+#   with files that overlap in time is rejected.
+
+datapath = gl.datapath
+catalog_file = datapath + '/catalog.db'
+
+#Files containing data within this many days of the current time may
+#still be updated by the data provider, so are never resolved from
+#the catalog
+recent_days = 35
+
+
+def about_data_catalog():
+    """ About data_catalog.py
+
+        Keeps a SQLite database, datapath/catalog.db, that records
+        each data file that has been read in along with:
+
+        * experiment, instrument, and flux type
+        * first and last time stamp in the file
+        * number of rows (time points) in the file
+        * most common time spacing in the file (cadence)
+        * size and modification time of the file
+
+        check_data in read_datasets.py uses the catalog to find the files
+        covering a requested date range with a single query. If the
+        cataloged files don't fully cover the date range, e.g. because a
+        file is truncated or missing, the usual check_*_data subroutines
+        are used instead.
+
+        The stored row counts are used to size the arrays that hold the
+        data before the files are read in.
+
+        Files are identified by their names relative to datapath, as in
+        the rest of the code.
+
+    """
+
+
+def connect():
+    """ Open the catalog, creating it if needed.
+
+        OUTPUTS:
+
+        :conn: (sqlite3 connection) or None if the catalog can't be
+            opened
+
+    """
+    try:
+        conn = sqlite3.connect(catalog_file, timeout=30)
+        conn.execute('CREATE TABLE IF NOT EXISTS files ('
+                    'experiment TEXT, instrument TEXT, flux_type TEXT, '
+                    'filename TEXT, first_time INTEGER, last_time INTEGER, '
+                    'nrow INTEGER, cadence INTEGER, size INTEGER, '
+                    'mtime INTEGER, '
+                    'PRIMARY KEY (experiment, instrument, flux_type, filename))')
+    except sqlite3.Error as err:
+        print('data_catalog: Could not open ' + catalog_file + ' (' + str(err)
+            + '). Continuing without the catalog.')
+        return None
+    return conn
+
+
+def to_epoch(date):
+    """ Convert a datetime to int64 microseconds since 1970-01-01. """
+    return int(np.datetime64(date, 'us').astype(np.int64))
+
+
+def get_file_stat(filename):
+    """ Size and modification time (ns) of a data file or None
+        if the file doesn't exist.
+    """
+    try:
+        stat = os.stat(datapath + '/' + filename)
+    except OSError:
+        return None
+    return stat.st_size, stat.st_mtime_ns
+
+
+def split_version(filename):
+    """ Split a filename into the name without a version number and
+        the version number, e.g.
+        sci_sgps-l2-avg5m_g16_d20170910_v3-0-1.nc gives
+        sci_sgps-l2-avg5m_g16_d20170910.nc and (3,0,1).
+        Files without a version number have version ().
+    """
+    match = re.search(r'_v(\d+(?:[-_]\d+)*)(\.[^./]*)?$', filename)
+    if match is None:
+        return filename, ()
+    version = tuple([int(v) for v in re.split('[-_]', match.group(1))])
+    extension = match.group(2) if match.group(2) is not None else ''
+    return filename[:match.start()] + extension, version
+
+
+def register_files(experiment, instrument, flux_type, filenames, all_dates):
+    """ Add files that have just been read in to the catalog.
+
+        INPUTS:
+
+        :experiment: (string) name of native experiment
+        :instrument: (string) instrument or file type (e.g. "EPEAD",
+            "HEPAD", "orientation", "LET")
+        :flux_type: (string) "integral" or "differential"
+        :filenames: (string array) files relative to datapath
+        :all_dates: (list) the dates (datetime 1xm array) read from
+            each file in filenames
+
+        OUTPUTS:
+
+        None
+
+    """
+    conn = connect()
+    if conn is None:
+        return
+
+    rows = []
+    for filename, dates in zip(filenames, all_dates):
+        stat = get_file_stat(filename)
+        if stat is None or len(dates) == 0:
+            continue
+        #Already cataloged and unchanged
+        try:
+            row = conn.execute('SELECT size, mtime FROM files WHERE '
+                        'experiment=? AND instrument=? AND flux_type=? AND '
+                        'filename=?', (experiment, instrument, flux_type,
+                        filename)).fetchone()
+        except sqlite3.Error:
+            row = None
+        if row is not None and tuple(row) == stat:
+            continue
+        times = np.array(dates, dtype='datetime64[us]').astype(np.int64)
+        cadence = 0
+        if len(times) > 1:
+            diffs, counts = np.unique(np.diff(times), return_counts=True)
+            cadence = int(diffs[np.argmax(counts)])
+        rows.append((experiment, instrument, flux_type, filename,
+                    int(times.min()), int(times.max()), len(times), cadence,
+                    stat[0], stat[1]))
+
+    if len(rows) == 0:
+        conn.close()
+        return
+
+    try:
+        with conn:
+            conn.executemany('INSERT OR REPLACE INTO files VALUES '
+                            '(?,?,?,?,?,?,?,?,?,?)', rows)
+    except sqlite3.Error as err:
+        print('register_files: Could not update the catalog (' + str(err)
+            + ').')
+    conn.close()
+
+
+def lookup_files(experiment, instrument, flux_type, startdate, enddate):
+    """ Find the cataloged files that contain data between startdate and
+        enddate. Files are only returned if together they cover the
+        entire date range with no gaps between files larger than twice
+        the cadence, and none of them have changed since they were
+        cataloged.
+
+        If more than one version of a file is cataloged, only the highest
+        version is used. If the remaining files overlap in time, None is
+        returned so that the check_*_data subroutines select the files.
+
+        INPUTS:
+
+        :experiment: (string) name of native experiment
+        :instrument: (string) instrument or file type
+        :flux_type: (string) "integral" or "differential"
+        :startdate: (datetime) start of time period
+        :enddate: (datetime) end of time period
+
+        OUTPUTS:
+
+        :filenames: (string array) files in time order or None if the
+            catalog can't provide the complete date range
+
+    """
+    if enddate >= datetime.datetime.now() - datetime.timedelta(days=recent_days):
+        return None
+
+    conn = connect()
+    if conn is None:
+        return None
+
+    start = to_epoch(startdate)
+    end = to_epoch(enddate)
+    try:
+        rows = conn.execute('SELECT filename, first_time, last_time, cadence, '
+                    'size, mtime FROM files WHERE experiment=? AND '
+                    'instrument=? AND flux_type=? AND last_time>=? AND '
+                    'first_time<=? ORDER BY first_time',
+                    (experiment, instrument, flux_type, start, end)).fetchall()
+    except sqlite3.Error:
+        rows = []
+    conn.close()
+
+    #Keep only the highest version of each file
+    newest = {}
+    for row in rows:
+        name, version = split_version(row[0])
+        if name not in newest or version > newest[name][0]:
+            newest[name] = (version, row)
+    rows = sorted([newest[name][1] for name in newest],
+                key=lambda row: (row[1], row[0]))
+
+    if len(rows) == 0:
+        return None
+    #The files must span the whole range
+    if rows[0][1] > start or max([row[2] for row in rows]) < end:
+        return None
+
+    filenames = []
+    last_covered = None #latest time in the files so far
+    for i in range(len(rows)):
+        filename, first_time, last_time, cadence, size, mtime = rows[i]
+        #Files overlap in time
+        if i > 0 and first_time < last_covered:
+            return None
+        last_covered = last_time if i == 0 else max(last_covered, last_time)
+        #Gap between the end of the previous file and the start of this one
+        if i > 0 and first_time - rows[i-1][2] > 2*max(cadence, rows[i-1][3]):
+            return None
+        if get_file_stat(filename) != (size, mtime):
+            return None
+        filenames.append(filename)
+
+    return filenames
+
+
+def find_truncated(experiment, instrument, flux_type):
+    """ Identify cataloged files that end earlier than expected,
+        i.e. there is a gap larger than twice the cadence between the
+        last time in the file and the first time in the next file.
+
+        INPUTS:
+
+        :experiment: (string) name of native experiment
+        :instrument: (string) instrument or file type
+        :flux_type: (string) "integral" or "differential"
+
+        OUTPUTS:
+
+        :truncated: (string array) names of truncated files
+
+    """
+    conn = connect()
+    if conn is None:
+        return []
+    try:
+        rows = conn.execute('SELECT filename, first_time, last_time, cadence '
+                    'FROM files WHERE experiment=? AND instrument=? AND '
+                    'flux_type=? ORDER BY first_time',
+                    (experiment, instrument, flux_type)).fetchall()
+    except sqlite3.Error:
+        rows = []
+    conn.close()
+
+    truncated = []
+    for i in range(len(rows)-1):
+        if rows[i+1][1] - rows[i][2] > 2*max(rows[i][3], rows[i+1][3]):
+            truncated.append(rows[i][0])
+    return truncated
+
+
+def count_rows(filenames):
+    """ Total number of rows in a set of cataloged files. Used to
+        allocate the arrays that will hold the data.
+
+        INPUTS:
+
+        :filenames: (string array) files relative to datapath
+
+        OUTPUTS:
+
+        :nrow: (int) total number of rows or 0 if any of the files
+            is not in the catalog or has changed
+
+    """
+    if len(filenames) == 0:
+        return 0
+    conn = connect()
+    if conn is None:
+        return 0
+
+    nrow = 0
+    try:
+        for filename in filenames:
+            row = conn.execute('SELECT nrow, size, mtime FROM files WHERE '
+                        'filename=? LIMIT 1', (filename,)).fetchone()
+            if row is None or get_file_stat(filename) != (row[1], row[2]):
+                nrow = 0
+                break
+            nrow = nrow + row[0]
+    except sqlite3.Error:
+        nrow = 0
+    conn.close()
+    return nrow
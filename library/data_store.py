@@ -0,0 +1,468 @@
+from library import global_vars as gl
+from library import read_datasets as datasets
+import os
+import json
+import shutil
+import contextlib
+import numpy as np
+try:
+    import fcntl
+except ImportError:
+    fcntl = None #not available on Windows; the store isn't locked
+
+__version__ = "0.7"
+__author__ = "Katie Whitman"
+__maintainer__ = "Katie Whitman"
+__email__ = "kathryn.whitman@nasa.gov"
+
+#2026-10-17, Version 0.1: Full-mission store of the fluxes for each
+#   native data set. Used by operational_sep_quantities.py and
+#   derive_background.py through read_in_data.
+#2026-10-17, Version 0.2: read_in_data keeps only the requested date
+#   range when reading user files.
+#2026-10-17, Version 0.3: read_in_data passes the date range to
+#   read_in_files when the store isn't used.
+#2026-10-17, Version 0.4: read_in_data returns the dates as a datetime64
+#   array (a view of the times in the store).
+#2026-10-17, Version 0.5: find_range uses
+#   datasets.extract_date_range_indices.
+#2026-10-17, Version 0.6: The westward facing detector code for
+#   GOES-13 - 15 is kept in the store (west.dat) and returned by
+#   read_in_data so that the data quality mask is the same whether or not
+#   the store is used. Stores made by earlier versions are started over.
+#2026-10-17, Version 0.7: read_in_data holds a lock on the store (lock
+#   file in the store directory) while the store is read and updated, so
+#   that two programs using the same store don't mix their changes. Rows
+#   that are already in the store are rewritten into new files that replace
+#   the old ones, so that a store memory-mapped by another program is
+#   never changed under it.
+
+datapath = gl.datapath
+use_store = gl.use_store
+storepath = datapath + '/store'
+
+
+def about_data_store():
+    """ About data_store.py
+
+        Keeps all of the data that has been read in for a native data set
+        (e.g. SEPEM or GOES-13 differential) on one time axis in
+        datapath/store/<name>:
+
+        * times.dat: int64 microseconds since 1970-01-01, one per time point
+        * fluxes.dat: float64 fluxes, one row of nchan values per time point
+        * west.dat: for GOES-13 - 15, int8 code of the westward facing
+          EPEAD detector, one per time point (see read_datasets.py)
+        * meta.json: number of time points and channels and the data
+          files (with their size and modification time) that have been
+          added to the store
+
+        The binary files are memory-mapped. A request for a date range
+        finds the start and end with a binary search on the times and
+        returns the fluxes as a view of the memory-mapped array, so only
+        the requested time period is ever loaded into memory.
+
+        The store is built up as data is requested. Data files that are
+        not yet in the store are read in with the usual readers in
+        read_datasets.py and appended. If one of the data files changes,
+        the store is started over.
+
+        Only one program at a time may read and update a store (a lock
+        on the file named lock in the store directory). Data is only ever
+        appended to the end of the binary files in place. If rows that
+        are already in the store change, the binary files are written
+        to temporary files that replace the old ones.
+
+        The store is not used for the GOES-R real time integral fluxes,
+        STEREO, SRAG1.2 or user files, or for GOES-13 - 15 with the
+        Bruno2017 option (which needs the orientation to define the
+        energy bins before the data is read), and can be switched off
+        with use_store in global_vars.py. In those cases the files are
+        read in directly as before.
+
+    """
+
+
+def has_west_detector(experiment):
+    """ Indicate if the data set has a westward facing detector code for
+        every time point (GOES-13 - 15).
+    """
+    return experiment == "GOES-13" or experiment == "GOES-14" or \
+        experiment == "GOES-15"
+
+
+def can_use_store(experiment, flux_type, options):
+    """ Indicate if a data set may be kept in the store.
+
+        INPUTS:
+
+        :experiment: (string) name of native experiment or "user"
+        :flux_type: (string) "integral" or "differential"
+        :options: (string array) options that may be applied to GOES data
+
+        OUTPUTS:
+
+        :usable: (bool)
+
+    """
+    if not use_store:
+        return False
+    if experiment == "SEPEM" or experiment == "SEPEMv3" \
+        or experiment == "EPHIN" or experiment == "EPHIN_REleASE":
+        return True
+    if experiment == "GOES-08" or experiment == "GOES-10" or \
+        experiment == "GOES-11" or experiment == "GOES-12":
+        return True
+    if has_west_detector(experiment):
+        return "Bruno2017" not in options
+    if (experiment == "GOES-16" or experiment == "GOES-17") and \
+        flux_type == "differential":
+        return True
+
+    return False
+
+
+def get_store_name(experiment, flux_type, options):
+    """ Directory holding the store for a data set. Uncorrected GOES
+        fluxes are read from different columns, so are kept separately.
+    """
+    name = experiment + '_' + flux_type
+    if experiment[0:4] == "GOES" and "uncorrected" in options:
+        name = name + '_uncorrected'
+    return storepath + '/' + name
+
+
+@contextlib.contextmanager
+def lock_store(name):
+    """ Hold an exclusive lock on a store while it is read and updated.
+        Another program using the same store waits until the lock is
+        released.
+
+        INPUTS:
+
+        :name: (string) directory of the store
+
+    """
+    os.makedirs(name, exist_ok=True)
+    with open(name + '/lock', 'a') as lockfile:
+        if fcntl is not None:
+            fcntl.flock(lockfile, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(lockfile, fcntl.LOCK_UN)
+
+
+def empty_meta():
+    """ Description of a store that doesn't contain any data yet. """
+    return {"nrow": 0, "nchan": 0, "files": [], "stats": {}, "west": False}
+
+
+def read_meta(name):
+    """ Read the description of a store.
+
+        INPUTS:
+
+        :name: (string) directory of the store
+
+        OUTPUTS:
+
+        :meta: (dictionary) nrow, nchan, files (filenames1 entries in
+            the store), stats (size and modification time of every
+            data file used) and west (True if west.dat is kept) or an
+            empty store
+
+    """
+    meta = empty_meta()
+    if not os.path.isfile(name + '/meta.json'):
+        return meta
+    try:
+        with open(name + '/meta.json') as infile:
+            meta = json.load(infile)
+    except (OSError, ValueError):
+        print('read_meta: Could not read ' + name + '/meta.json. Starting '
+            'the store over.')
+    return meta
+
+
+def write_meta(name, meta):
+    """ Write the description of a store. The store only includes the
+        data described here, so this is written after the data.
+    """
+    with open(name + '/meta.json.tmp', 'w') as outfile:
+        json.dump(meta, outfile, indent=1)
+    os.replace(name + '/meta.json.tmp', name + '/meta.json')
+
+
+def open_store(name, meta):
+    """ Memory-map the times and fluxes in a store.
+
+        INPUTS:
+
+        :name: (string) directory of the store
+        :meta: (dictionary) from read_meta
+
+        OUTPUTS:
+
+        :times: (int64 1xm array) microseconds since 1970-01-01
+        :fluxes: (float mxn array) fluxes for m time points and n channels
+        :west: (int8 1xm array) westward facing detector code for each
+            time point or None if not kept in the store
+
+    """
+    nrow = meta["nrow"]
+    nchan = meta["nchan"]
+    if nrow == 0:
+        west = np.zeros(0, dtype=np.int8) if meta.get("west") else None
+        return np.zeros(0, dtype=np.int64), np.zeros(shape=(0,nchan)), west
+    times = np.memmap(name + '/times.dat', dtype=np.int64, mode='r',
+                shape=(nrow,)).view(np.ndarray)
+    #Copy-on-write so that the data may be modified in memory (e.g.
+    #when bad points are interpolated) without changing the store
+    fluxes = np.memmap(name + '/fluxes.dat', dtype=np.float64, mode='c',
+                shape=(nrow,nchan)).view(np.ndarray)
+    west = None
+    if meta.get("west"):
+        west = np.memmap(name + '/west.dat', dtype=np.int8, mode='r',
+                shape=(nrow,)).view(np.ndarray)
+    return times, fluxes, west
+
+
+def write_rows(name, meta, times, fluxes, start, west=None):
+    """ Write times, fluxes and westward detector codes into the store
+        starting at row start. Anything already in the store after row
+        start is replaced. New rows at the end of a file are appended in
+        place. Otherwise the file is copied, changed and then replaces the
+        old file, so that the rows of the old file that another program may
+        have memory-mapped are not changed.
+
+        INPUTS:
+
+        :name: (string) directory of the store
+        :meta: (dictionary) from read_meta; nrow is updated
+        :times: (int64 1xm array) microseconds since 1970-01-01
+        :fluxes: (float mxn array) fluxes for m time points and n channels
+        :start: (int) row at which to start writing
+        :west: (int 1xm array) westward facing detector code for each
+            time point or None if not kept in the store
+
+        OUTPUTS:
+
+        None
+
+    """
+    nchan = fluxes.shape[1]
+    columns = [('/times.dat', times, 8), ('/fluxes.dat', fluxes, 8*nchan)]
+    if west is not None:
+        columns.append(('/west.dat', np.asarray(west, dtype=np.int8), 1))
+    for fname, values, rowbytes in columns:
+        filename = name + fname
+        size = 0
+        if os.path.isfile(filename):
+            size = os.path.getsize(filename)
+        if start*rowbytes == size:
+            with open(filename, 'ab') as outfile:
+                outfile.write(np.ascontiguousarray(values).tobytes())
+            continue
+
+        with open(filename + '.tmp', 'wb') as outfile:
+            if start > 0:
+                with open(filename, 'rb') as infile:
+                    shutil.copyfileobj(infile, outfile)
+                outfile.truncate(start*rowbytes)
+                outfile.seek(start*rowbytes)
+            outfile.write(np.ascontiguousarray(values).tobytes())
+        os.replace(filename + '.tmp', filename)
+    meta["nrow"] = start + len(times)
+    meta["nchan"] = nchan
+    meta["west"] = west is not None
+
+
+def get_stats(filenames):
+    """ Size and modification time of each data file. """
+    stats = {}
+    for filename in filenames:
+        stat = os.stat(datapath + '/' + filename)
+        stats[filename] = [stat.st_size, stat.st_mtime_ns]
+    return stats
+
+
+def add_to_store(name, meta, experiment, flux_type, filenames1, filenames2,
+                filenames_orien, options):
+    """ Read in the data files that are not yet in the store and add
+        them. Data later than everything in the store is appended.
+        Otherwise, the new data is merged into the store in time order,
+        skipping time points that are already present.
+
+        INPUTS:
+
+        :name: (string) directory of the store
+        :meta: (dictionary) from read_meta; updated
+        :experiment: (string) name of native experiment
+        :flux_type: (string) "integral" or "differential"
+        :filenames1: (string array) files returned by check_data
+        :filenames2: (string array) files returned by check_data
+        :filenames_orien: (string array) files returned by check_data
+        :options: (string array) options that may be applied to GOES data
+
+        OUTPUTS:
+
+        :added: (bool) False if the data couldn't be added to the store
+
+    """
+    new = [i for i in range(len(filenames1))
+            if filenames1[i] not in meta["files"]]
+    if len(new) == 0:
+        return True
+
+    new1 = [filenames1[i] for i in new]
+    new2 = [filenames2[i] for i in new] if len(filenames2) > 0 else []
+    newo = [filenames_orien[i] for i in new] \
+            if len(filenames_orien) > 0 else []
+
+    dates, fluxes, west_detector = datasets.read_in_files(experiment,
+                flux_type, new1, new2, newo, options)
+    if len(dates) == 0:
+        return False
+
+    new_times = datasets.dates_to_epoch(dates)
+    new_fluxes = np.asarray(fluxes, dtype=float).T
+    new_west = None
+    if has_west_detector(experiment):
+        if len(west_detector) != len(new_times):
+            print('add_to_store: The detector orientation was not found for '
+                'every time point for ' + experiment + '. Not using the store.')
+            return False
+        new_west = np.asarray(west_detector, dtype=np.int8)
+    if meta["nrow"] > 0 and new_fluxes.shape[1] != meta["nchan"]:
+        print('add_to_store: The files for ' + experiment + ' contain a '
+            'different number of channels than the store. Not using the store.')
+        return False
+
+    print('Adding ' + str(len(new1)) + ' files to the store in ' + name)
+    os.makedirs(name, exist_ok=True)
+    times, store_fluxes, store_west = open_store(name, meta)
+    if meta["nrow"] == 0 or new_times[0] > times[-1]:
+        write_rows(name, meta, new_times, new_fluxes, meta["nrow"], new_west)
+    else:
+        #Data from earlier than the end of the store
+        keep = ~np.isin(new_times, times)
+        all_times = np.concatenate((times, new_times[keep]))
+        all_fluxes = np.concatenate((store_fluxes, new_fluxes[keep]))
+        order = np.argsort(all_times, kind='stable')
+        all_west = None
+        if new_west is not None:
+            all_west = np.concatenate((store_west, new_west[keep]))[order]
+        #Rows before the first new time point are unchanged
+        first = int(np.searchsorted(times, new_times[keep].min())) \
+                if keep.any() else meta["nrow"]
+        if all_west is not None:
+            all_west = all_west[first:]
+        write_rows(name, meta, all_times[order][first:],
+                all_fluxes[order][first:], first, all_west)
+
+    meta["files"].extend(new1)
+    meta["stats"].update(get_stats(new1 + new2 + newo))
+    write_meta(name, meta)
+    return True
+
+
+def find_range(times, startdate, enddate):
+    """ Find the indices of the time points between startdate and
+        enddate with the same rules as datasets.extract_date_range.
+
+        INPUTS:
+
+        :times: (int64 1xm array) microseconds since 1970-01-01
+        :startdate: (datetime) start of desired time period
+        :enddate: (datetime) end of desired time period
+
+        OUTPUTS:
+
+        :nst: (int) index of first time point in range
+        :nend: (int) one past the index of the last time point in range
+
+    """
+    return datasets.extract_date_range_indices(startdate, enddate,
+                times.view('datetime64[us]'))
+
+
+def read_in_data(startdate, enddate, experiment, flux_type, user_file,
+                options):
+    """ Check that the data files are present and read in the data
+        for the date range. Replaces calling check_data and
+        read_in_files (or read_in_user_files) in read_datasets.py.
+        If the data set can be kept in the store, any files not yet in
+        the store are added and the dates and fluxes are taken from
+        the store. The fluxes are a view of the memory-mapped store.
+
+        INPUTS:
+
+        :startdate: (datetime) start of time period specified by user
+        :enddate: (datetime) end of time period entered by user
+        :experiment: (string) name of native experiment or "user"
+        :flux_type: (string) "integral" or "differential"
+        :user_file: (string) name of file containing user-input data
+            (if applicable)
+        :options: (string array) options that may be applied to GOES data
+
+        OUTPUTS:
+
+        :all_dates: (datetime64 1xm array) time points
+        :all_fluxes: (float nxm array) fluxes for n energy channels and m
+            time points
+        :west_detector: (int 1xm array) if GOES-13 - 15, code indicating
+            which detector is westward facing for every time point
+
+        When the store is used, and for user files, all_dates and
+        all_fluxes already cover only the requested date range. Otherwise,
+        they contain all of the data in the files that span the date range.
+
+    """
+    filenames1, filenames2, filenames_orien = datasets.check_data(startdate,
+                                    enddate, experiment, flux_type, user_file)
+
+    if experiment == "user":
+        all_dates, all_fluxes = datasets.read_in_user_files(filenames1,
+                                    startdate, enddate)
+        return all_dates, all_fluxes, []
+
+    if can_use_store(experiment, flux_type, options):
+        name = get_store_name(experiment, flux_type, options)
+        with lock_store(name):
+            meta = read_meta(name)
+
+            #Start over if any of the data files changed
+            needed = filenames1 + filenames2 + filenames_orien
+            stored = [fname for fname in needed if fname in meta["stats"]]
+            if get_stats(stored) != {fname: meta["stats"][fname]
+                                    for fname in stored}:
+                print('read_in_data: Data files changed since they were '
+                    'added to the store. Starting the store over.')
+                meta = empty_meta()
+            #or if the store was made without the detector orientation
+            if meta["nrow"] > 0 and has_west_detector(experiment) \
+                and not meta.get("west"):
+                print('read_in_data: The store in ' + name + ' does not '
+                    'contain the detector orientation. Starting the store '
+                    'over.')
+                meta = empty_meta()
+
+            if add_to_store(name, meta, experiment, flux_type, filenames1,
+                    filenames2, filenames_orien, options):
+                print('Reading ' + experiment + ' fluxes from the store in '
+                    + name)
+                times, fluxes, west = open_store(name, meta)
+                nst, nend = find_range(times, startdate, enddate)
+                all_dates = times[nst:nend].view('datetime64[us]')
+                all_fluxes = fluxes[nst:nend].T
+                west_detector = []
+                if west is not None:
+                    west_detector = west[nst:nend].astype(int)
+                return all_dates, all_fluxes, west_detector
+
+    all_dates, all_fluxes, west_detector = datasets.read_in_files(experiment,
+                flux_type, filenames1, filenames2, filenames_orien, options,
+                startdate, enddate)
+    return all_dates, all_fluxes, west_detector
@@ -1,4 +1,5 @@
 from library import read_datasets as datasets
+from library import data_store as store
 from library import global_vars as vars
 import matplotlib.pyplot as plt
 import math
@@ -22,12 +23,18 @@ import array as arr
 import pandas as pd
 import scipy
 
-__version__ = "0.2"
+__version__ = "0.5"
 __author__ = "Katie Whitman"
 __maintainer__ = "Katie Whitman"
 __email__ = "kathryn.whitman@nasa.gov"
 
 #2021-09-25, changes in 0.2: print out means and sigmas in derive_background
+#2026-10-17, changes in 0.3: derive_background reads the data through
+#   data_store.read_in_data, which takes the fluxes for native data sets
+#   from a memory-mapped full-mission store when available.
+#2026-10-17, changes in 0.4: dates are a numpy datetime64 array.
+#2026-10-17, changes in 0.5: separate_sep_and_background works on whole
+#   arrays and returns numpy arrays with NaN for the bad points.
 
 datapath = vars.datapath
 outpath = vars.outpath
@@ -132,22 +139,24 @@ def remove_below(flux, val):
     return strip_flux
 
 
-def separate_sep_and_background(fluxes, dates, means, sigmas):
+def separate_sep_and_background(fluxes, dates, means, sigmas, quality=None):
     """ Take the input fluxes, separate them into arrays containing
         the background flux and SEP flux. Values above mean + Nsigma*sigma is
         considered SEP flux while values below are considered the background.
         Perform a background subtraction on the SEP flux by subtracting the
         mean background value.
-        The input flux array is a numpy array, but the output will be a list
-        for flexibility.
+        Points that are not usable according to the data quality mask
+        (datasets.usable_data) are NaN in both outputs.
         Nsigma is specified in library/global_vars.py.
         
         INPUTS:
         
         :fluxes: (float nxm array) fluxes for n energy channels and m time points
-        :dates: (datetime 1xm array) time points for flux time profile
+        :dates: (datetime64 1xm array) time points for flux time profile
         :means: (float 1xn array) mean background flux for n energy channels
         :sigmas: (float 1xn array) expected variability sigma for n energy channels
+        :quality: (uint8 nxm array) data quality flags for fluxes; made
+            from fluxes if not specified
         
         OUTPUTS:
         
@@ -157,38 +166,16 @@ def separate_sep_and_background(fluxes, dates, means, sigmas):
             m time points
         
     """
-    nflx = len(fluxes)
-    sepfluxes = []
-    bgfluxes = []
-
-    for i in range(nflx):
-        bgflux = [-1]
-        sepflux = [-1]
-        for j in range(len(fluxes[i])):
-            if fluxes[i][j] <= means[i] + nsigma*sigmas[i]:
-                bgflux.append(fluxes[i][j])
-                sepflux.append(0)
-            if fluxes[i][j] > means[i] + nsigma*sigmas[i]:
-                bgflux.append(0)
-                bgsubflux = fluxes[i][j] - means[i]
-                if bgsubflux < 0: bgsubflux = 0
-                sepflux.append(bgsubflux)
-            if np.isnan(fluxes[i][j]):
-                bgflux.append(None)
-                sepflux.append(None)
-
-        bgflux.pop(0)
-        sepflux.pop(0)
-
-        if not bgfluxes:
-            bgfluxes = [bgflux]
-        else:
-            bgfluxes.append(bgflux)
+    fluxes = np.asarray(fluxes, dtype=float)
+    means = np.asarray(means, dtype=float)[:,np.newaxis]
+    sigmas = np.asarray(sigmas, dtype=float)[:,np.newaxis]
+    usable = datasets.usable_data(fluxes, quality)
 
-        if not sepfluxes:
-            sepfluxes = [sepflux]
-        else:
-            sepfluxes.append(sepflux)
+    is_sep = fluxes > means + nsigma*sigmas
+    bgfluxes = np.where(is_sep, 0., fluxes)
+    sepfluxes = np.where(is_sep, np.maximum(fluxes - means, 0.), 0.)
+    bgfluxes[~usable] = np.nan
+    sepfluxes[~usable] = np.nan
 
     return bgfluxes, sepfluxes
 
@@ -366,7 +353,7 @@ def plot_fluxes(experiment, flux_type, options, fluxes, dates,
         :options: (string array) array of options that can be applied
         :fluxes: (float nxm array) flux time profiles for n energy channels and
             m time points
-        :dates: (datetime 1xm array) m time points for flux time profile
+        :dates: (datetime64 1xm array) m time points for flux time profile
         :energy_bins: (float nx2 array) energy bins for n energy channels
         :means: (float 1xn array) mean values of histogram for n energy channels
         :sigmas: (float 1xn array) sigma of histograms for n energy channels
@@ -384,9 +371,10 @@ def plot_fluxes(experiment, flux_type, options, fluxes, dates,
         for opt in options:
             modifier = modifier + '_' + opt
 
-    year = dates[0].year
-    month = dates[0].month
-    day = dates[0].day
+    first_date = datasets.to_datetime(dates[0])
+    year = first_date.year
+    month = first_date.month
+    day = first_date.day
     strdate = str(year) + '_' + str(month) + '_' + str(day)
 
     figname = strdate + '_Fluxes_' \
@@ -452,7 +440,7 @@ def derive_background(str_startdate, str_enddate, str_bgstartdate, \
         library/global_vars.py.
         Return the background and background-subtracted SEP flux arrays along
         with a date array. The fluxes and dates will extend from BGStartdate to
-        SEPEndDate. The fluxes will be numpy arrays and the dates are a list.
+        SEPEndDate. The fluxes and dates will be numpy arrays.
         
         INPUTS:
         
@@ -479,7 +467,7 @@ def derive_background(str_startdate, str_enddate, str_bgstartdate, \
             and m time points
         :sepfluxes: (float nxm array) background-subtracted SEP fluxes for n
             energy channels and m time points
-        :dates: (datetime 1xm array) m time points extending from
+        :dates: (datetime64 1xm array) m time points extending from
             str_bgstartdate to str_enddate containing background flux time period
             and SEP flux time period
         
@@ -549,20 +537,15 @@ def derive_background(str_startdate, str_enddate, str_bgstartdate, \
     datasets.check_paths()
 
     #Check and prepare the data
-    filenames1, filenames2, filenames_orien = datasets.check_data(bgstartdate,
-                                    enddate, experiment, flux_type, user_file)
-
-    #read in flux files
-    if experiment != "user":
-        all_dates, all_fluxes, west_detector =datasets.read_in_files(experiment,
-                    flux_type, filenames1, filenames2, filenames_orien, options)
-    if experiment == "user":
-        all_dates, all_fluxes = datasets.read_in_user_files(filenames1)
-        west_detector = []
+    all_dates, all_fluxes, west_detector = store.read_in_data(bgstartdate,
+                    enddate, experiment, flux_type, user_file, options)
 
     #Extract the date range specified by the user
-    dates, fluxes = datasets.extract_date_range(bgstartdate,enddate,all_dates,
-                    all_fluxes)
+    nst, nend = datasets.extract_date_range_indices(bgstartdate,enddate,
+                    all_dates)
+    dates = all_dates[nst:nend]
+    fluxes = all_fluxes[:,nst:nend]
+    quality = datasets.make_quality_mask(fluxes, west_detector[nst:nend])
     if len(dates) <= 1:
         sys.exit("The specified start and end dates were not present in the "
                 "specified input file. Exiting.")
@@ -573,7 +556,8 @@ def derive_background(str_startdate, str_enddate, str_bgstartdate, \
     #Remove bad data points (negative fluxes) with linear interpolation in time
     #set bad values to None rather than perform a linear interpolation in time
     dointerp = False
-    fluxes = datasets.check_for_bad_data(dates,fluxes,energy_bins,dointerp)
+    fluxes = datasets.check_for_bad_data(dates,fluxes,energy_bins,dointerp,
+                    quality=quality)
 
     #Pull out the fluxes in the time period to be used for calculating
     #background
@@ -584,16 +568,12 @@ def derive_background(str_startdate, str_enddate, str_bgstartdate, \
 
     means, sigmas = iterate_background(bg_fluxes, energy_bins)
     bgfluxes, sepfluxes = separate_sep_and_background(fluxes, dates,\
-                     means, sigmas)
+                     means, sigmas, quality)
                      
     print("=====BACKROUND SUBTRACTION=====")
     for k in range(len(means)):
         print("Mean: " + str(means[k]) + " +- " + str(vars.nsigma) + "* " + str(sigmas[k]))
     
-    #To get into a consistent format as used in operational_sep_quantities.py
-    bgfluxes = np.array(bgfluxes)
-    sepfluxes = np.array(sepfluxes)
-
     if showplot or saveplot:
         plot_fluxes('Total_'+experiment, flux_type, options, fluxes, dates, energy_bins,
                     means, sigmas, saveplot)
@@ -0,0 +1,331 @@
+from library import global_vars as gl
+import os
+import sys
+import json
+import datetime
+import threading
+import http.client
+import urllib.request
+import urllib.error
+import concurrent.futures
+
+__version__ = "0.2"
+__author__ = "Katie Whitman"
+__maintainer__ = "Katie Whitman"
+__email__ = "kathryn.whitman@nasa.gov"
+
+#2026-10-17, Version 0.1: Download layer used by the check_*_data
+#   subroutines in read_datasets.py. Replaces the urlopen + wget.download
+#   pair previously used for every file.
+#2026-10-17, changes in 0.2: A connection dropped in the middle of a file
+#   (http.client.HTTPException, e.g. IncompleteRead) is recorded as a
+#   failure for that file and the download is resumed up to fetch_retries
+#   times. The .part file is only accepted after a 416 response if its
+#   size matches the size of the file on the server (Content-Range).
+
+datapath = gl.datapath
+fetch_workers = gl.fetch_workers #number of files downloaded at the same time
+fetch_timeout = gl.fetch_timeout #seconds
+manifest_file = datapath + '/fetch_manifest.json'
+#Number of times a download that stopped part way through is resumed
+fetch_retries = 2
+
+#Only one thread at a time may update the manifest
+manifest_lock = threading.Lock()
+
+
+def about_fetch_data():
+    """ About fetch_data.py
+
+        Download data files for the native data sets.
+
+        * Each file is downloaded with a single request.
+        * Data is written to a temporary file, destination + '.part',
+          which is renamed to the final filename only when the download
+          is complete. An interrupted run never leaves a partial file
+          with the final filename behind.
+        * If a .part file exists from an earlier interrupted download,
+          the download is resumed from the end of the .part file
+          (HTTP Range request). If the server doesn't support Range
+          requests, the file is downloaded from the beginning.
+        * If the connection drops part way through a file, the download
+          is resumed from the .part file up to fetch_retries times.
+        * Up to fetch_workers files (global_vars.py) are downloaded at
+          the same time.
+        * A record of every downloaded file (url, size, time) is kept
+          in datapath/fetch_manifest.json.
+
+        Download failures are returned to the calling subroutine rather
+        than stopping the program, so that all of the files that can be
+        downloaded are saved before the program exits.
+
+    """
+
+
+def read_manifest():
+    """ Read the manifest of downloaded files.
+
+        OUTPUTS:
+
+        :manifest: (dictionary) keys are filenames relative to
+            datapath, values are dictionaries with url, size, and
+            time of download
+
+    """
+    if not os.path.isfile(manifest_file):
+        return {}
+    try:
+        with open(manifest_file) as infile:
+            return json.load(infile)
+    except (OSError, ValueError):
+        print('read_manifest: Could not read ' + manifest_file
+            + '. Starting a new manifest.')
+        return {}
+
+
+def add_to_manifest(url, destination):
+    """ Add a downloaded file to the manifest. The manifest is written
+        to a temporary file and then renamed.
+
+        INPUTS:
+
+        :url: (string) url of the downloaded file
+        :destination: (string) filename where the file was saved
+
+        OUTPUTS:
+
+        None
+
+    """
+    name = os.path.relpath(destination, datapath)
+    with manifest_lock:
+        manifest = read_manifest()
+        manifest[name] = {"url": url,
+                          "size": os.path.getsize(destination),
+                          "time": datetime.datetime.now().isoformat()}
+        try:
+            with open(manifest_file + '.tmp', 'w') as outfile:
+                json.dump(manifest, outfile, indent=1, sort_keys=True)
+            os.replace(manifest_file + '.tmp', manifest_file)
+        except OSError:
+            print('add_to_manifest: Could not write ' + manifest_file)
+
+
+def get_content_range(headers):
+    """ Read the Content-Range header of a response.
+
+        INPUTS:
+
+        :headers: (http.client.HTTPMessage) response headers
+
+        OUTPUTS:
+
+        :first: (int) first byte in the response or None
+        :total: (int) size of the whole file on the server or None
+
+    """
+    value = None
+    if headers is not None:
+        value = headers.get('Content-Range')
+    if value is None:
+        return None, None
+    try:
+        units, value = value.strip().split(' ', 1)
+        span, total = value.split('/')
+    except ValueError:
+        return None, None
+    if units != 'bytes':
+        return None, None
+
+    first = span.split('-')[0]
+    first = int(first) if first.isdigit() else None
+    total = int(total) if total.isdigit() else None
+    return first, total
+
+
+def download_file(url, destination):
+    """ Download a single file with one request.
+        The data is written to destination + '.part' and renamed to
+        destination when complete. An existing .part file is resumed.
+
+        INPUTS:
+
+        :url: (string) url of the file
+        :destination: (string) filename where the file will be saved
+
+        OUTPUTS:
+
+        :nbytes: (int) size of the downloaded file
+
+        Raises urllib.error.HTTPError or urllib.error.URLError if the
+        file can't be downloaded and OSError or http.client.HTTPException
+        if the download stopped before the whole file was received.
+
+    """
+    part = destination + '.part'
+    start = 0
+    if os.path.isfile(part):
+        start = os.path.getsize(part)
+
+    request = urllib.request.Request(url)
+    if start > 0:
+        request.add_header('Range', 'bytes=%i-' % start)
+
+    try:
+        response = urllib.request.urlopen(request, timeout=fetch_timeout)
+    except urllib.error.HTTPError as err:
+        if err.code == 416 and start > 0:
+            #416: the .part file may already hold the complete file.
+            #Only accept it if the size matches the file on the server.
+            first, total = get_content_range(err.headers)
+            if total == start:
+                os.replace(part, destination)
+                add_to_manifest(url, destination)
+                return os.path.getsize(destination)
+            print('download_file: ' + part + ' does not match the size of '
+                + url + '. Downloading the file from the beginning.')
+            os.remove(part)
+            return download_file(url, destination)
+        raise
+
+    with response:
+        #The server may ignore the Range request and send the whole file
+        if start > 0 and response.status != 206:
+            start = 0
+        #or send a different part of the file than was asked for
+        if start > 0 and get_content_range(response.headers)[0] != start:
+            response.close()
+            os.remove(part)
+            return download_file(url, destination)
+        expected = response.headers.get('Content-Length')
+        mode = 'ab' if start > 0 else 'wb'
+        nread = 0
+        with open(part, mode) as outfile:
+            while True:
+                chunk = response.read(1024*1024)
+                if not chunk:
+                    break
+                outfile.write(chunk)
+                nread = nread + len(chunk)
+
+    if expected is not None and nread != int(expected):
+        raise OSError('Received ' + str(nread) + ' of ' + expected
+            + ' bytes from ' + url)
+
+    os.replace(part, destination)
+    add_to_manifest(url, destination)
+    return os.path.getsize(destination)
+
+
+def download_first_available(candidates):
+    """ Try to download each candidate in turn until one succeeds.
+        Used when a file may exist on the server under more than
+        one name (e.g. different version numbers). A download that
+        stops part way through is resumed up to fetch_retries times
+        before moving on to the next candidate.
+
+        INPUTS:
+
+        :candidates: (list) [url, destination] pairs in order of
+            preference
+
+        OUTPUTS:
+
+        :index: (int) index of the candidate that was downloaded or
+            None if none could be downloaded
+        :error: (string) description of the last error or None
+
+    """
+    error = None
+    for i in range(len(candidates)):
+        url = candidates[i][0]
+        destination = candidates[i][1]
+        print('Downloading ' + url)
+        for attempt in range(fetch_retries + 1):
+            try:
+                download_file(url, destination)
+                return i, None
+            except urllib.error.URLError as err:
+                #No response or an HTTP error such as 404; don't retry
+                error = str(err)
+                break
+            except (http.client.HTTPException, OSError) as err:
+                #Connection dropped part way through the file
+                error = repr(err)
+                if attempt < fetch_retries:
+                    print('download_first_available: Download of ' + url
+                        + ' stopped (' + error + '). Resuming.')
+
+    return None, error
+
+
+def fetch_files(downloads, nworkers=None):
+    """ Download a set of files using a pool of fetch_workers threads.
+
+        INPUTS:
+
+        :downloads: (list) one entry for each file needed. Each entry
+            is a list of [url, destination] candidates; the first
+            candidate that can be downloaded is used.
+        :nworkers: (int) number of files downloaded at the same time;
+            defaults to fetch_workers in global_vars.py
+
+        OUTPUTS:
+
+        :fetched: (list) for each entry in downloads, the index of the
+            candidate that was downloaded, or None if the file couldn't
+            be downloaded
+        :errors: (list) for each entry in downloads, None or a
+            description of the error
+
+    """
+    if nworkers is None:
+        nworkers = fetch_workers
+    nworkers = max(1, min(nworkers, len(downloads)))
+
+    fetched = [None]*len(downloads)
+    errors = [None]*len(downloads)
+    if len(downloads) == 0:
+        return fetched, errors
+
+    for download in downloads:
+        for candidate in download:
+            os.makedirs(os.path.dirname(candidate[1]), exist_ok=True)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=nworkers) \
+        as executor:
+        futures = [executor.submit(download_first_available, download)
+                    for download in downloads]
+        for i in range(len(futures)):
+            fetched[i], errors[i] = futures[i].result()
+
+    return fetched, errors
+
+
+def check_fetched(downloads, fetched, errors, messages):
+    """ Exit with the message for the first file that couldn't be
+        downloaded. Called after all downloads are finished so
+        that the files that could be downloaded are kept.
+
+        INPUTS:
+
+        :downloads: (list) as passed to fetch_files
+        :fetched: (list) as returned by fetch_files
+        :errors: (list) as returned by fetch_files
+        :messages: (string list) message for each entry in downloads
+            if it couldn't be downloaded
+
+        OUTPUTS:
+
+        None; exits if any file couldn't be downloaded
+
+    """
+    failed = [i for i in range(len(downloads)) if fetched[i] is None]
+    if len(failed) == 0:
+        return
+
+    for i in failed:
+        print('check_fetched: Could not download ' + downloads[i][-1][0]
+            + ' (' + str(errors[i]) + ')')
+    sys.exit(messages[failed[0]] + ' (' + str(len(failed)) + ' of '
+        + str(len(downloads)) + ' files could not be downloaded)')
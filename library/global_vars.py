@@ -11,6 +11,27 @@ badval = -1 #bad data points will be set to this value; must be negative
 endfac = 0.85 #factor multiplied by flux threshold to determine end of event
 errval = "Value Not Found"  #alternative value to None to indicate value not present
 
+###FOR READING IN DATA###
+#After a data file is read in for the first time, the parsed dates and fluxes
+#are saved as binary NumPy files in datapath/cache. Later reads of the same
+#file load (memory-map) the binary files instead of parsing the original file.
+#Cached values are remade automatically if the original file changes.
+use_cache = True
+#Number of processes used to read in data files at the same time.
+#Set to 1 to read files one at a time.
+read_workers = 1
+#Number of files downloaded at the same time and the time (seconds) to wait
+#for a response from the server before giving up on a file.
+fetch_workers = 4
+fetch_timeout = 60
+#Keep all of the data read in for each native data set in one memory-mapped
+#store in datapath/store so that any date range can be loaded without
+#reading the original files again.
+use_store = True
+#User files are read in chunks of this many lines
+user_chunk_size = 100000
+#########################
+
 ###FOR BACKGROUND SUBTRACTION###
 #derive_background.py calculates the mean background plus an expected level
 #of variation (sigma).
@@ -110,6 +131,15 @@ def about_global_vars():
             :badval: will set any bad data points to this value
             :endfac: multiplicative factor to define threshold for
                     end of event; threshold*endfac (default 0.85)
+            :use_cache: save parsed data files as binary NumPy arrays in
+                    datapath/cache and reuse them on later reads
+            :read_workers: number of processes used to read in data
+                    files at the same time (1 reads files one at a time)
+            :fetch_workers: number of data files downloaded at the same time
+            :fetch_timeout: seconds to wait for a response when downloading
+            :use_store: keep the data for each native data set in a
+                    memory-mapped store in datapath/store
+            :user_chunk_size: number of lines of a user file read at a time
             :nsigma: number of sigma to define SEP versus background
                     flux in background subtraction routine
             :version: if you are running a model or data set, allows you
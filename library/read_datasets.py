@@ -1,11 +1,12 @@
 from library import global_vars as gl
+from library import fetch_data as fetch
+from library import data_catalog as catalog
 import re
 import calendar
 import datetime
 import argparse
 from datetime import timedelta
 import os
-import wget
 from calendar import monthrange
 import urllib.request
 import csv
@@ -15,8 +16,9 @@ import matplotlib.pyplot as plt
 import sys
 import math
 import netCDF4
+import concurrent.futures
 
-__version__ = "1.5"
+__version__ = "2.13"
 __author__ = "Katie Whitman"
 __maintainer__ = "Katie Whitman"
 __email__ = "kathryn.whitman@nasa.gov"
@@ -69,6 +71,86 @@ __email__ = "kathryn.whitman@nasa.gov"
 #   NOAA added a v3-0-1 format for files
 #   starting in April 2023. Rewrote check_goesR to be more versatile.
 #   Added checking that include v3-0-1 in read_in_goesR.
+#2026-10-17, changes in 1.6: Added a cache of parsed data files. The first
+#   time a file is read, the dates (int64 microseconds since 1970-01-01)
+#   and fluxes are saved as .npy files in datapath/cache. Subsequent
+#   reads memory-map the .npy files instead of parsing the original file.
+#   The cache is remade if the size or modification time of the original
+#   file changes. Split the readers into one subroutine per file
+#   (e.g. read_in_sepem_file) so that every file passes through the cache.
+#   read_in_goesR_RT trims the flux array of an incomplete (current day)
+#   file to the number of time points actually in the file.
+#2026-10-17, changes in 1.7: read_in_goes_csv reads GOES EPS, EPEAD, HEPAD
+#   and orientation files in a single pass. Finds the 'data:' line and
+#   reads the dates and requested columns with one call to np.loadtxt
+#   instead of counting rows, reading dates and then rereading fluxes.
+#2026-10-17, changes in 1.8: read_in_goesR_file reads each netCDF
+#   variable as a full array instead of element by element. The +/-X
+#   detector is selected for all times at once using the yaw flip flag.
+#2026-10-17, changes in 1.9: Added make_accumulator, add_to_accumulator
+#   and get_accumulated to combine the data read from multiple files.
+#   The readers no longer call np.concatenate for every file.
+#2026-10-17, changes in 2.0: Added read_files, which reads independent
+#   files at the same time with a pool of processes if read_workers
+#   in global_vars.py is greater than 1. Used by all native readers.
+#   Split get_west_detector into reading the file and
+#   match_west_detector.
+#2026-10-17, changes in 2.1: check_goes_data, check_goesR_data,
+#   check_goesR_RTdata, check_ephin_data and check_stereo_data collect
+#   the missing files and download them together with fetch_data.py
+#   (one request per file, several files at a time, resumable). The
+#   program exits only after all downloads have been attempted.
+#2026-10-17, changes in 2.2: Files that are read in are recorded in a
+#   catalog (data_catalog.py) with the time period they cover.
+#   check_data looks up the files for the requested dates in the catalog
+#   and only runs the check_*_data subroutines if the catalog doesn't
+#   cover the whole time period. The readers use the number of rows
+#   stored in the catalog to allocate the flux arrays.
+#2026-10-17, changes in 2.3: match_west_detector aligns the orientation
+#   flags to the flux times with a binary search instead of assuming
+#   that every flux time appears in the orientation file. The westward
+#   facing detector is returned as an array of integer codes (west_B,
+#   west_A, west_flip, west_missing) and read_in_goes selects the A or
+#   B detector fluxes for all times at once. Fluxes with no orientation
+#   flag are set to badval, as during a yaw flip. read_in_goes returns
+#   the detector for every time point rather than only for the last file.
+#2026-10-17, changes in 2.4: read_in_user_files removes the rows
+#   containing n/a or NaN with one boolean mask per file instead of
+#   deleting them one at a time and applies time_shift to all of the
+#   dates in a file at once.
+#2026-10-17, changes in 2.5: Added stream_user_files, which reads user
+#   files in chunks of user_chunk_size lines in a single pass, and
+#   stream_date_range, which keeps only the chunks in a date range.
+#   read_in_user_files is built on these and may be given a date range
+#   so that only that part of the files is kept in memory.
+#2026-10-17, changes in 2.6: Added read_in_sepem_window, which finds the
+#   lines at the start and end of a date range with a binary search
+#   over the SEPEM file and parses only those lines. Used by read_in_sepem
+#   when read_in_files is given startdate and enddate.
+#2026-10-17, changes in 2.7: Added decode_timestamps and the decode_*
+#   subroutines, which convert whole columns of time stamps to datetime64
+#   at once. Used by all of the readers in place of calling strptime or
+#   datetime for every row.
+#2026-10-17, changes in 2.8: The readers return dates as a numpy
+#   datetime64[us] array instead of a list of datetimes. Added
+#   to_datetime64, to_datetime and to_seconds to convert between the two.
+#   extract_date_range and read_in_stereo work on the arrays directly.
+#2026-10-17, changes in 2.9: Added extract_date_range_indices, which
+#   finds the date range by binary search. extract_date_range uses it.
+#2026-10-17, changes in 2.10: check_for_bad_data fills the bad points
+#   in each energy channel with one call to np.interp and prints a
+#   summary of the data gaps instead of a message for every point.
+#   Added find_data_gaps. Removed do_interpolation.
+#2026-10-17, changes in 2.11: Added a data quality mask with bit flags
+#   for fill values, GOES yaw flips and negative fluxes (make_quality_mask,
+#   usable_data). check_for_bad_data fills the points marked bad in the
+#   mask, which includes NaN values, and marks them as interpolated.
+#2026-10-17, changes in 2.12: Added find_time_resolution, which finds the
+#   most common time step with numpy, lists the data gaps and saves the
+#   result for each time axis.
+#2026-10-17, changes in 2.13: The names of the cached files include
+#   cache_version and badval, since the cached fluxes are saved after bad
+#   points are set to badval. Changing either one remakes the cache.
 
 
 datapath = gl.datapath
@@ -78,6 +160,37 @@ badval = gl.badval #bad data points will be set to this value; must be negative
 user_col = gl.user_col
 user_delim = gl.user_delim
 user_energy_bins = gl.user_energy_bins
+use_cache = gl.use_cache
+read_workers = gl.read_workers
+user_chunk_size = gl.user_chunk_size
+cachepath = datapath + '/cache'
+#Increase cache_version whenever a reader changes the values it returns so
+#that files parsed by the previous version are not read from the cache
+cache_version = 1
+
+#Codes for the westward facing GOES-13 - 15 EPEAD detector, the same as
+#the orientation flags in the orientation files
+west_B = 0 #B/E detector faces west
+west_A = 1 #A/W detector faces west
+west_flip = 2 #yaw flip in progress
+west_missing = -1 #no orientation flag for this time
+#Orientation flags recorded up to this long after a flux time stamp
+#(the 5 minute averaging period) are used for that time
+orien_tolerance = datetime.timedelta(minutes=5)
+
+#Bit flags in the data quality mask made by make_quality_mask. A point
+#is bad if any of quality_bad is set, unless it has been filled in by
+#interpolation in check_for_bad_data (quality_interp).
+quality_fill = 1 #fill value (badval), None or NaN
+quality_flip = 2 #GOES EPEAD detector orientation unknown (yaw flip)
+quality_negative = 4 #negative flux other than the fill value
+quality_interp = 8 #filled by linear interpolation in time
+quality_bad = quality_fill | quality_flip | quality_negative
+
+#Results of find_time_resolution for the most recent time axes, keyed by
+#the contents of the dates array
+time_resolution_cache = {}
+time_resolution_cache_size = 32
 
 def about_read_datasets():
     """ About read_datasets.py
@@ -163,6 +276,586 @@ def check_paths():
         os.mkdir(plotpath);
 
 
+def dates_to_epoch(dates):
+    """ Convert a list of datetimes to int64 microseconds since
+        1970-01-01 00:00:00.
+
+        INPUTS:
+
+        :dates: (datetime 1xm array) dates
+
+        OUTPUTS:
+
+        :epoch: (int64 1xm numpy array) microseconds since 1970-01-01
+
+    """
+    return np.array(dates, dtype='datetime64[us]').astype(np.int64)
+
+
+def epoch_to_dates(epoch):
+    """ Convert int64 microseconds since 1970-01-01 00:00:00 to a list
+        of datetimes.
+
+        INPUTS:
+
+        :epoch: (int64 1xm numpy array) microseconds since 1970-01-01
+
+        OUTPUTS:
+
+        :dates: (datetime 1xm array) dates
+
+    """
+    return np.asarray(epoch, dtype=np.int64).astype('datetime64[us]').tolist()
+
+
+def to_datetime64(dates):
+    """ Convert dates to the datetime64[us] time axis used throughout
+        the code. Accepts a list of datetimes, a datetime64 array, or
+        a single datetime.
+
+        INPUTS:
+
+        :dates: (datetime or datetime 1xm array) dates
+
+        OUTPUTS:
+
+        :dates: (datetime64[us] numpy array) dates
+
+    """
+    return np.asarray(dates, dtype='datetime64[us]')
+
+
+def to_datetime(dates):
+    """ Convert datetime64 values to datetime. Used where dates
+        leave the code, i.e. when writing json and csv files or
+        printing messages.
+
+        INPUTS:
+
+        :dates: (datetime64 or datetime64 1xm array) dates
+
+        OUTPUTS:
+
+        :dates: (datetime or datetime 1xm list) dates
+
+    """
+    return np.asarray(dates, dtype='datetime64[us]').tolist()
+
+
+def to_seconds(tdiff):
+    """ Convert a timedelta or timedelta64 (or array of them) to
+        seconds.
+
+        INPUTS:
+
+        :tdiff: (timedelta or timedelta64 1xm array) time differences
+
+        OUTPUTS:
+
+        :seconds: (float or float 1xm array) seconds
+
+    """
+    return np.asarray(tdiff, dtype='timedelta64[us]').astype(np.int64)/1.e6
+
+
+#Fixed-width time stamp formats handled by decode_timestamps.
+#Digit positions and separators in "YYYY-MM-DD HH:MM:SS"
+iso_format = "%Y-%m-%d %H:%M:%S"
+iso_fields = [(0,4), (5,7), (8,10), (11,13), (14,16), (17,19)]
+iso_separators = {4: b'-', 7: b'-', 10: b' ', 13: b':', 16: b':'}
+#GOES-R times are seconds since this reference time
+goesR_ref_date = np.datetime64('2000-01-01T12:00:00','us')
+month_abbr = {calendar.month_abbr[i].lower(): i for i in range(1,13)}
+
+
+def add_time_of_day(days, hour, minute, second):
+    """ Add hour, minute, second columns to an array of days.
+        
+        INPUTS:
+        
+        :days: (datetime64[D] 1xm numpy array) dates
+        :hour: (int 1xm array) hour 0 - 23
+        :minute: (int 1xm array) minute 0 - 59
+        :second: (int 1xm array) second 0 - 59
+        
+        OUTPUTS:
+        
+        :dates: (datetime64[us] 1xm numpy array) dates
+        
+    """
+    hour = np.asarray(hour, dtype=np.int64)
+    minute = np.asarray(minute, dtype=np.int64)
+    second = np.asarray(second, dtype=np.int64)
+    if np.any((hour < 0) | (hour > 23) | (minute < 0) | (minute > 59)
+        | (second < 0) | (second > 59)):
+        raise ValueError('add_time_of_day: hour, minute, or second out '
+            + 'of range')
+    return days.astype('datetime64[us]') \
+        + ((hour*3600 + minute*60 + second)*1000000).astype('timedelta64[us]')
+
+
+def decode_date_fields(year, month, day, hour=0, minute=0, second=0):
+    """ Convert whole columns of year, month, day, hour, minute, second
+        to datetime64 in one go.
+        
+        INPUTS:
+        
+        :year: (int 1xm array) 4 digit year
+        :month: (int 1xm array) month 1 - 12
+        :day: (int 1xm array) day of month
+        :hour: (int 1xm array) hour 0 - 23
+        :minute: (int 1xm array) minute 0 - 59
+        :second: (int 1xm array) second 0 - 59
+        
+        OUTPUTS:
+        
+        :dates: (datetime64[us] 1xm numpy array) dates; use
+            .astype(np.int64) for microseconds since 1970-01-01
+        
+        Raises ValueError if any of the fields is out of range, as
+        datetime.datetime would.
+        
+    """
+    year = np.asarray(year, dtype=np.int64)
+    month = np.asarray(month, dtype=np.int64)
+    day = np.asarray(day, dtype=np.int64)
+    months = ((year - 1970)*12 + month - 1).astype('datetime64[M]')
+    days = months.astype('datetime64[D]') + (day - 1)
+    if np.any((month < 1) | (month > 12) | (day < 1)
+        | (days.astype('datetime64[M]') != months)):
+        raise ValueError('decode_date_fields: month or day out of range')
+    return add_time_of_day(days, hour, minute, second)
+
+
+def decode_doy_fields(year, doy, hour=0, minute=0, second=0):
+    """ Convert whole columns of year, day of year, hour, minute,
+        second to datetime64 in one go ("%Y %j %H %M" style dates).
+        
+        INPUTS:
+        
+        :year: (int 1xm array) 4 digit year
+        :doy: (int 1xm array) day of year, 1 is January 1
+        :hour: (int 1xm array) hour 0 - 23
+        :minute: (int 1xm array) minute 0 - 59
+        :second: (int 1xm array) second 0 - 59
+        
+        OUTPUTS:
+        
+        :dates: (datetime64[us] 1xm numpy array) dates
+        
+    """
+    year = np.asarray(year, dtype=np.int64)
+    doy = np.asarray(doy, dtype=np.int64)
+    years = (year - 1970).astype('datetime64[Y]')
+    days = years.astype('datetime64[D]') + (doy - 1)
+    if np.any((doy < 1) | (days.astype('datetime64[Y]') != years)):
+        raise ValueError('decode_doy_fields: day of year out of range')
+    return add_time_of_day(days, hour, minute, second)
+
+
+def decode_iso_dates(strings):
+    """ Convert a whole column of "YYYY-MM-DD HH:MM:SS" time stamps
+        to datetime64 in one go. Only the first 19 characters of each
+        time stamp are used, as with strptime(row[0][0:19]).
+        The strings are viewed as a fixed-width byte array and the
+        digits are read directly from the bytes.
+        
+        INPUTS:
+        
+        :strings: (string 1xm array) time stamps
+        
+        OUTPUTS:
+        
+        :dates: (datetime64[us] 1xm numpy array) dates
+        
+        Raises ValueError if a time stamp doesn't match the format.
+        
+    """
+    nrow = len(strings)
+    if nrow == 0:
+        return np.array([], dtype='datetime64[us]')
+    chars = np.array(strings, dtype='S19').view(np.uint8).reshape(nrow,19)
+    digits = chars.astype(np.int64) - ord('0')
+
+    isdigit = np.ones(nrow, dtype=bool)
+    values = []
+    for first, last in iso_fields:
+        field = digits[:,first:last]
+        isdigit &= np.all((field >= 0) & (field <= 9), axis=1)
+        value = np.zeros(nrow, dtype=np.int64)
+        for k in range(last - first):
+            value = value*10 + field[:,k]
+        values.append(value)
+    for pos, sep in iso_separators.items():
+        isdigit &= chars[:,pos] == ord(sep)
+    if not np.all(isdigit):
+        i = np.flatnonzero(~isdigit)[0]
+        raise ValueError("time data '" + str(strings[i]) + "' does not "
+            + "match format '" + iso_format + "'")
+
+    return decode_date_fields(*values)
+
+
+def decode_month_names(names):
+    """ Convert a column of month abbreviations (Jan, Feb, ...) to
+        month numbers 1 - 12.
+        
+        INPUTS:
+        
+        :names: (string 1xm array) month abbreviations
+        
+        OUTPUTS:
+        
+        :month: (int 1xm numpy array) month numbers
+        
+    """
+    unique, inverse = np.unique(np.char.lower(np.asarray(names, dtype=str)),
+                            return_inverse=True)
+    try:
+        lookup = np.array([month_abbr[name] for name in unique], dtype=np.int64)
+    except KeyError as err:
+        raise ValueError('decode_month_names: unknown month ' + str(err))
+    return lookup[inverse]
+
+
+def decode_goesR_seconds(seconds):
+    """ Convert GOES-R time stamps in seconds since 2000-01-01 12:00:00
+        to datetime64.
+        
+        INPUTS:
+        
+        :seconds: (float 1xm array) seconds since the GOES-R reference
+            time
+        
+        OUTPUTS:
+        
+        :dates: (datetime64[us] 1xm numpy array) dates rounded to the
+            nearest microsecond
+        
+    """
+    seconds = np.asarray(seconds, dtype=float)
+    return goesR_ref_date \
+        + np.round(seconds*1.e6).astype(np.int64).astype('timedelta64[us]')
+
+
+def decode_timestamps(columns, fmt, epoch=False):
+    """ Shared decoder used by the readers to convert whole columns
+        of time stamps to datetime64 (or epoch) arrays in one go,
+        rather than calling datetime.strptime for every row.
+        
+        INPUTS:
+        
+        :columns: (list) the columns holding the time stamp as read
+            from the file; depends on fmt:
+            
+            * "%Y-%m-%d %H:%M:%S": [strings]
+            * "%Y %j %H %M": [year, doy, hour, minute]
+            * "%Y %m %d %H%M": [year, month, day, hhmm]
+            * "%Y %b %d %H%M": [year, month name, day, hhmm]
+            * "%Y %m %d %H %M": [year, month, day, hour, minute]
+            * "goesR": [seconds since 2000-01-01 12:00:00]
+            
+            Numerical columns may be strings or numbers.
+        :fmt: (string) one of the formats above
+        :epoch: (boolean) return int64 microseconds since 1970-01-01
+            instead of datetime64
+        
+        OUTPUTS:
+        
+        :dates: (datetime64[us] or int64 1xm numpy array) dates
+        
+    """
+    def ints(column):
+        return np.asarray(column).astype(np.int64)
+
+    if fmt == iso_format:
+        dates = decode_iso_dates(columns[0])
+    elif fmt == "%Y %j %H %M":
+        dates = decode_doy_fields(ints(columns[0]), ints(columns[1]),
+                    ints(columns[2]), ints(columns[3]))
+    elif fmt == "%Y %m %d %H%M" or fmt == "%Y %b %d %H%M":
+        if fmt == "%Y %b %d %H%M":
+            month = decode_month_names(columns[1])
+        else:
+            month = ints(columns[1])
+        hhmm = ints(columns[3])
+        dates = decode_date_fields(ints(columns[0]), month, ints(columns[2]),
+                    hhmm//100, hhmm % 100)
+    elif fmt == "%Y %m %d %H %M":
+        dates = decode_date_fields(ints(columns[0]), ints(columns[1]),
+                    ints(columns[2]), ints(columns[3]), ints(columns[4]))
+    elif fmt == "goesR":
+        dates = decode_goesR_seconds(columns[0])
+    else:
+        sys.exit('decode_timestamps: Unknown time stamp format ' + fmt)
+
+    if epoch:
+        return dates.astype(np.int64)
+    return dates
+
+
+def get_cache_filenames(filename, key):
+    """ Names of the files in the cache that hold the parsed contents
+        of a data file. The names include cache_version and badval so
+        that values parsed by an older reader or with a different fill
+        value are never used.
+
+        INPUTS:
+
+        :filename: (string) data file relative to datapath
+        :key: (string) identifies the way the file was parsed
+            (e.g. the columns that were read in)
+
+        OUTPUTS:
+
+        :fname_times: (string) file holding the dates
+        :fname_fluxes: (string) file holding the flux array
+        :fname_info: (string) file holding the size and modification
+            time of the original data file
+
+    """
+    base = cachepath + '/' + filename + '.' + key + '.v' + str(cache_version) \
+        + '.bad' + str(badval)
+    return base + '.times.npy', base + '.fluxes.npy', base + '.info.npy'
+
+
+def get_source_info(filename):
+    """ Size and modification time (ns) of a data file. Used to
+        determine if a cached version of the file is still valid.
+    """
+    stat = os.stat(datapath + '/' + filename)
+    return np.array([stat.st_size, stat.st_mtime_ns], dtype=np.int64)
+
+
+def read_cache(filename, key):
+    """ Read the cached version of a data file, if it exists and
+        the original file hasn't changed since the cache was written.
+        The fluxes are memory-mapped (copy-on-write) rather than read
+        into memory.
+
+        INPUTS:
+
+        :filename: (string) data file relative to datapath
+        :key: (string) identifies the way the file was parsed
+
+        OUTPUTS:
+
+        :dates: (datetime64 1xm array) dates or None if no valid cache
+        :fluxes: (float nxm array) fluxes or None if no valid cache
+
+    """
+    fname_times, fname_fluxes, fname_info = get_cache_filenames(filename, key)
+    if not os.path.isfile(fname_info):
+        return None, None
+
+    try:
+        info = np.load(fname_info)
+        if not np.array_equal(info, get_source_info(filename)):
+            return None, None
+        epoch = np.load(fname_times, mmap_mode='r')
+        fluxes = np.load(fname_fluxes, mmap_mode='c').view(np.ndarray)
+    except (OSError, ValueError):
+        print('read_cache: Could not read cached values for ' + filename
+            + '. Will read in the original file.')
+        return None, None
+
+    return np.asarray(epoch, dtype=np.int64).astype('datetime64[us]'), fluxes
+
+
+def write_cache(filename, key, dates, fluxes):
+    """ Save the parsed contents of a data file into the cache.
+        Files are first written with a temporary name and then renamed
+        so that an interrupted run can't leave a partial cache behind.
+        The info file is written last since its presence marks the
+        cache as complete.
+
+        INPUTS:
+
+        :filename: (string) data file relative to datapath
+        :key: (string) identifies the way the file was parsed
+        :dates: (datetime64 1xm array) dates
+        :fluxes: (float nxm array) fluxes
+
+        OUTPUTS:
+
+        None
+
+    """
+    fname_times, fname_fluxes, fname_info = get_cache_filenames(filename, key)
+    try:
+        os.makedirs(os.path.dirname(fname_info), exist_ok=True)
+        info = get_source_info(filename)
+        for fname, values in ((fname_times, dates_to_epoch(dates)),
+                        (fname_fluxes, np.asarray(fluxes, dtype=float)),
+                        (fname_info, info)):
+            with open(fname + '.tmp', 'wb') as outfile:
+                np.save(outfile, values)
+            os.replace(fname + '.tmp', fname)
+    except OSError:
+        print('write_cache: Could not write cached values for ' + filename
+            + '. Continuing without cache.')
+
+
+def read_with_cache(filename, key, reader, *args):
+    """ Read a data file with the subroutine reader. If use_cache is
+        set in global_vars.py, the cached version of the file is used
+        when available and a cached version is written the first time
+        the file is read.
+
+        INPUTS:
+
+        :filename: (string) data file relative to datapath
+        :key: (string) identifies the way the file was parsed; must
+            be different for every combination of reader and args
+        :reader: (function) reader(filename, *args) returns dates
+            and fluxes for a single file
+        :args: any additional arguments needed by reader
+
+        OUTPUTS:
+
+        :dates: (datetime64 1xm array) dates in the file
+        :fluxes: (float nxm array) fluxes in the file
+
+    """
+    if use_cache:
+        dates, fluxes = read_cache(filename, key)
+        if dates is not None:
+            print('Reading in cached values for ' + datapath + '/' + filename)
+            return dates, fluxes
+
+    dates, fluxes = reader(filename, *args)
+
+    if use_cache:
+        write_cache(filename, key, dates, fluxes)
+
+    return dates, fluxes
+
+
+def read_files(jobs):
+    """ Read in a set of independent files with read_with_cache.
+        If read_workers in global_vars.py is larger than 1, the files
+        are parsed at the same time by a pool of read_workers processes.
+        If the pool can't be started, or read_workers is 1, the files
+        are read one at a time.
+
+        INPUTS:
+
+        :jobs: (list) one entry per file, [filename, key, reader, args],
+            where args is a list of additional arguments for reader
+            (see read_with_cache)
+
+        OUTPUTS:
+
+        :results: (list) (dates, fluxes) for each file in the same order
+            as jobs
+
+    """
+    nworkers = min(read_workers, len(jobs))
+    if nworkers > 1:
+        try:
+            with concurrent.futures.ProcessPoolExecutor(max_workers=nworkers) \
+                as executor:
+                futures = [executor.submit(read_with_cache, job[0], job[1],
+                            job[2], *job[3]) for job in jobs]
+                #Results are collected in the order of the jobs, not the
+                #order in which they finish
+                return [future.result() for future in futures]
+        except (OSError, concurrent.futures.process.BrokenProcessPool) as err:
+            print('read_files: Could not read files in parallel (' + str(err)
+                + '). Reading in files one at a time.')
+
+    results = []
+    for job in jobs:
+        results.append(read_with_cache(job[0], job[1], job[2], *job[3]))
+    return results
+
+
+def make_accumulator(nrow=0):
+    """ Create an accumulator that combines the dates and fluxes read
+        from multiple files into one time vector and one contiguous
+        flux array. If the total number of time points is known ahead
+        of time, the flux array is allocated once with that size.
+        Otherwise it grows geometrically as files are added.
+
+        INPUTS:
+
+        :nrow: (int) expected total number of time points (optional)
+
+        OUTPUTS:
+
+        :accum: (dictionary) accumulator to be passed to
+            add_to_accumulator and get_accumulated
+
+    """
+    accum = {"dates": [],
+             "fluxes": None,
+             "nrow": 0, #number of time points filled
+             "capacity": nrow #number of time points allocated
+            }
+    return accum
+
+
+def add_to_accumulator(accum, dates, fluxes):
+    """ Add the dates and fluxes read from a single file to the end
+        of the accumulator.
+
+        INPUTS:
+
+        :accum: (dictionary) created by make_accumulator
+        :dates: (datetime64 1xm array) dates in the file
+        :fluxes: (float nxm array) fluxes in the file
+
+        OUTPUTS:
+
+        None; accum is updated
+
+    """
+    nchan = len(fluxes)
+    nadd = len(fluxes[0]) if nchan > 0 else 0
+    nrow = accum["nrow"]
+
+    if accum["fluxes"] is None:
+        accum["fluxes"] = np.zeros(shape=(nchan,max(accum["capacity"],nadd)))
+        accum["capacity"] = accum["fluxes"].shape[1]
+    elif nrow + nadd > accum["capacity"]:
+        #Double the size to avoid reallocating for every file
+        capacity = max(2*accum["capacity"], nrow + nadd)
+        all_fluxes = np.zeros(shape=(accum["fluxes"].shape[0],capacity))
+        all_fluxes[:,0:nrow] = accum["fluxes"][:,0:nrow]
+        accum["fluxes"] = all_fluxes
+        accum["capacity"] = capacity
+
+    accum["fluxes"][:,nrow:nrow+nadd] = fluxes
+    accum["dates"].append(to_datetime64(dates))
+    accum["nrow"] = nrow + nadd
+
+
+def get_accumulated(accum):
+    """ Return the dates and fluxes combined in the accumulator.
+
+        INPUTS:
+
+        :accum: (dictionary) created by make_accumulator
+
+        OUTPUTS:
+
+        :all_dates: (datetime64 1xm array) dates from all files
+        :all_fluxes: (float nxm array) fluxes from all files;
+            [] if nothing was added
+
+    """
+    all_dates = to_datetime64(np.concatenate(accum["dates"])) \
+                if len(accum["dates"]) > 0 else to_datetime64([])
+    if accum["fluxes"] is None:
+        return all_dates, []
+
+    all_fluxes = accum["fluxes"]
+    if accum["capacity"] != accum["nrow"]:
+        all_fluxes = np.ascontiguousarray(all_fluxes[:,0:accum["nrow"]])
+
+    return all_dates, all_fluxes
+
+
 def make_yearly_files(filename):
     """ Convert a large data set into yearly files.
         
@@ -434,6 +1127,8 @@ def check_goes_data(startdate, enddate, experiment, flux_type):
 
     #for every month that data is required, check if file is present or
     #needs to be downloaded.
+    downloads = [] #[url, destination] of missing files
+    messages = [] #error message if a missing file can't be downloaded
     for i in range(NFILES):
         year = get_years[i]
         month = get_months[i]
@@ -453,42 +1148,33 @@ def check_goes_data(startdate, enddate, experiment, flux_type):
         filenames1.append('GOES/' + fname1)
         filenames2.append('GOES/' + fname2)
 
+        url_base = ('https://www.ncei.noaa.gov/data/goes-space-environment-monitor/access/avg/' +
+                '%i/%02i/%s/csv/' % (year,month,satellite))
         if not exists1: #download file if not found on your computer
-            url = ('https://www.ncei.noaa.gov/data/goes-space-environment-monitor/access/avg/' +
-                '%i/%02i/%s/csv/%s' % (year,month,satellite,fname1))
-            print('Downloading GOES data: ' + url)
-            try:
-                urllib.request.urlopen(url)
-                wget.download(url, datapath + '/GOES/' + fname1)
-            except urllib.request.HTTPError:
-                sys.exit("Cannot access file at " + url +
+            url = url_base + fname1
+            downloads.append([[url, datapath + '/GOES/' + fname1]])
+            messages.append("Cannot access file at " + url +
                 ". Please check that selected spacecraft covers date range.")
 
-
         if not exists2: #download file if not found on your computer
-            url = ('https://www.ncei.noaa.gov/data/goes-space-environment-monitor/access/avg/' +
-               '%i/%02i/%s/csv/%s' % (year,month,satellite,fname2))
-            print('Downloading GOES data: ' + url)
-            try:
-                urllib.request.urlopen(url)
-                wget.download(url, datapath + '/GOES/' + fname2)
-            except urllib.request.HTTPError:
-                sys.exit("Cannot access file at " + url +
+            url = url_base + fname2
+            downloads.append([[url, datapath + '/GOES/' + fname2]])
+            messages.append("Cannot access file at " + url +
                ". Please check that selected spacecraft covers date range.")
 
         if (experiment == "GOES-13" or experiment == "GOES-14"
             or experiment == "GOES-15"):
             if not exists_orien: #download file if not found on your computer
-                url = ('https://www.ncei.noaa.gov/data/goes-space-environment-monitor/access/avg/' +
-                   '%i/%02i/%s/csv/%s' % (year,month,satellite,fname_orien))
-                print('Downloading GOES data: ' + url)
-                try:
-                    urllib.request.urlopen(url)
-                    wget.download(url, datapath + '/GOES/' + fname_orien)
-                except urllib.request.HTTPError:
-                    sys.exit("Cannot access orientation file at " + url +
+                url = url_base + fname_orien
+                downloads.append([[url, datapath + '/GOES/' + fname_orien]])
+                messages.append("Cannot access orientation file at " + url +
                    ". Please check that selected spacecraft covers date range.")
 
+    if len(downloads) > 0:
+        print('Downloading ' + str(len(downloads)) + ' GOES data files.')
+    fetched, errors = fetch.fetch_files(downloads)
+    fetch.check_fetched(downloads, fetched, errors, messages)
+
     return filenames1, filenames2, filenames_orien
 
 
@@ -544,12 +1230,11 @@ def check_goesR_data(startdate, enddate, experiment, flux_type):
         exists1 = os.path.isfile(datapath + '/GOES-R/' + fname1)
         if not exists1:
             url=('https://www.ngdc.noaa.gov/stp/space-weather/satellite-data/satellite-systems/goesr/solar_proton_events/sgps_sep2017_event_data/%s' % (fname1))
-            try:
-                urllib.request.urlopen(url)
-                wget.download(url, datapath + '/GOES-R/' + fname1)
-            except urllib.request.HTTPError:
-                sys.exit("Cannot access SEP event file at " + url +
-               ". Please check that the url is still active.")
+            downloads = [[[url, datapath + '/GOES-R/' + fname1]]]
+            fetched, errors = fetch.fetch_files(downloads)
+            fetch.check_fetched(downloads, fetched, errors,
+                ["Cannot access SEP event file at " + url +
+               ". Please check that the url is still active."])
         
         return filenames1, filenames2, filenames_orien
     
@@ -568,17 +1253,21 @@ def check_goesR_data(startdate, enddate, experiment, flux_type):
         satellite = 'goes17'
 
 
+    #GOES-R differential data has several possible version numbers
+    file_ext = ['_v1-0-1.nc', '_v2-0-0.nc', '_v3-0-0.nc', '_v3-0-1.nc']
+
     #for every day that data is required, check if file is present or
     #needs to be downloaded.
+    downloads = [] #[url, destination] for each version of missing files
+    download_fnames = [] #filenames associated with each download
+    download_index = [] #index in filenames1 for each download
+    messages = [] #error message if a missing file can't be downloaded
     for i in range(NFILES):
         date = startdate + datetime.timedelta(days=i)
         year = date.year
         month = date.month
         day = date.day
         date_suffix = 'd%i%02i%02i' % (year,month,day)
- 
-        #GOES-R differential data has three possible version numbers
-        file_ext = ['_v1-0-1.nc', '_v2-0-0.nc', '_v3-0-0.nc', '_v3-0-1.nc']
         
         foundfile = None
         for ext in file_ext:
@@ -589,22 +1278,29 @@ def check_goesR_data(startdate, enddate, experiment, flux_type):
             
         #Try versions
         if foundfile == None:
+            candidates = []
+            fnames = []
             for ext in file_ext:
                 fname_data = prefix + date_suffix + ext
                 url=('https://data.ngdc.noaa.gov/platforms/solar-space-observing-satellites/goes/%s/l2/data/sgps-l2-avg5m/%i/%02i/%s' % (satellite,year,month,fname_data))
-                try:
-                    urllib.request.urlopen(url)
-                    wget.download(url, datapath + '/GOES-R/' + fname_data)
-                    foundfile = fname_data
-                    break
-                except urllib.request.HTTPError:
-                    foundfile = None
-
-        if foundfile == None:
-            sys.exit("Cannot access GOES-R file at " + url +
+                candidates.append([url, datapath + '/GOES-R/' + fname_data])
+                fnames.append(fname_data)
+            downloads.append(candidates)
+            download_fnames.append(fnames)
+            download_index.append(i)
+            messages.append("Cannot access GOES-R file at " + url +
                ". Tried file versions " + str(file_ext) + ". Please check that selected spacecraft covers date range.")
   
-        filenames1.append('GOES-R/' + foundfile)
+        filenames1.append(foundfile)
+
+    if len(downloads) > 0:
+        print('Downloading ' + str(len(downloads)) + ' GOES-R data files.')
+    fetched, errors = fetch.fetch_files(downloads)
+    fetch.check_fetched(downloads, fetched, errors, messages)
+    for j in range(len(downloads)):
+        filenames1[download_index[j]] = download_fnames[j][fetched[j]]
+
+    filenames1 = ['GOES-R/' + fname for fname in filenames1]
         
     return filenames1, filenames2, filenames_orien
 
@@ -670,6 +1366,8 @@ def check_goesR_RTdata(startdate, enddate, experiment, flux_type):
 
     #for every day that data is required, check if file is present or
     #needs to be downloaded.
+    downloads = [] #[url, destination] of missing files
+    messages = [] #error message if a missing file can't be downloaded
     for i in range(NFILES):
         date = startdate + datetime.timedelta(days=i)
         year = date.year
@@ -683,13 +1381,14 @@ def check_goesR_RTdata(startdate, enddate, experiment, flux_type):
 
         if not exists1:
             url=('https://iswa.gsfc.nasa.gov/iswa_data_tree/observation/magnetosphere/goes_p/particle/%i/%02i/%s' % (year,month,fname1))
-            try:
-                urllib.request.urlopen(url)
-                wget.download(url, datapath + '/GOES-R/' + fname1)
-            except urllib.request.HTTPError:
-                sys.exit("Cannot access GOES-R file at " + url +
+            downloads.append([[url, datapath + '/GOES-R/' + fname1]])
+            messages.append("Cannot access GOES-R file at " + url +
                ". Please check that selected spacecraft covers date range.")
-  
+
+    if len(downloads) > 0:
+        print('Downloading ' + str(len(downloads)) + ' GOES-R data files.')
+    fetched, errors = fetch.fetch_files(downloads)
+    fetch.check_fetched(downloads, fetched, errors, messages)
 
     return filenames1, filenames2, filenames_orien
 
@@ -729,6 +1428,8 @@ def check_ephin_data(startdate, enddate, experiment, flux_type):
     filenames1 = []  #SEPEM, EPHIN, eps, or epead
 
     Nyr = endyear - styear + 1
+    downloads = [] #[url, destination] of missing files
+    messages = [] #error message if a missing file can't be downloaded
     for year in range(styear, endyear+1):
         fname = str(year) + '.l3i'
         filenames1.append('EPHIN/' + fname)
@@ -737,14 +1438,13 @@ def check_ephin_data(startdate, enddate, experiment, flux_type):
         if not exists: #download file if not found on your computer
             url = ('http://ulysses.physik.uni-kiel.de/costep/level3/l3i/10min/%s'
                     % (fname))
-            print('Downloading EPHIN data: ' + url)
-            try:
-                urllib.request.urlopen(url)
-                wget.download(url, datapath + '/EPHIN/' + fname)
-            except urllib.request.HTTPError:
-                sys.exit("Cannot access EPHIN file at " + url +
+            downloads.append([[url, datapath + '/EPHIN/' + fname]])
+            messages.append("Cannot access EPHIN file at " + url +
                ". Please check that selected spacecraft covers date range.")
 
+    fetched, errors = fetch.fetch_files(downloads)
+    fetch.check_fetched(downloads, fetched, errors, messages)
+
     return filenames1
 
 
@@ -870,6 +1570,8 @@ def check_stereo_data(startdate, enddate, experiment, flux_type):
     #https://izw1.caltech.edu/STEREO/DATA/Level1/Public/behind/1Minute/2006/Summed/H/H_summed_behind_2006_317_level1_11.txt
     #HET
     #https://izw1.caltech.edu/STEREO/DATA/HET/Behind/1minute/BeH06Dec.1m
+    downloads = [] #[url, destination] of missing files
+    messages = [] #error message if a missing file can't be downloaded
     #LET data
     for i in range(NFILESd):
         date = startdate + datetime.timedelta(days=i)
@@ -887,12 +1589,8 @@ def check_stereo_data(startdate, enddate, experiment, flux_type):
 
         if not exists1:
             url=(let_url_prefix + '%i/Summed/H/%s' % (year,fname1))
-            try:
-                urllib.request.urlopen(url)
-                wget.download(url, datapath + '/' + experiment + '/LET/' + fname1)
-                print("Downloaded file --> " + datapath + '/' + experiment + '/LET/' + fname1)
-            except urllib.request.HTTPError:
-                sys.exit("Cannot access " + experiment + " file at " + url +
+            downloads.append([[url, datapath + '/' + experiment + '/LET/' + fname1]])
+            messages.append("Cannot access " + experiment + " file at " + url +
                 ". Please check that selected spacecraft covers date range.")
 
 
@@ -925,19 +1623,95 @@ def check_stereo_data(startdate, enddate, experiment, flux_type):
 
         if not exists2:
             url=het_url_prefix + fname2
-            try:
-                urllib.request.urlopen(url)
-                wget.download(url,datapath + '/' + experiment + '/HET/' + fname2)
-                print("Downloaded file --> " + datapath + '/' + experiment + '/HET/' + fname2)
-            except urllib.request.HTTPError:
-                sys.exit("Cannot access " + experiment + " file at " + url +
+            downloads.append([[url, datapath + '/' + experiment + '/HET/' + fname2]])
+            messages.append("Cannot access " + experiment + " file at " + url +
                     ". Please check that selected spacecraft covers date range.")
 
+    if len(downloads) > 0:
+        print('Downloading ' + str(len(downloads)) + ' ' + experiment
+            + ' data files.')
+    fetched, errors = fetch.fetch_files(downloads)
+    fetch.check_fetched(downloads, fetched, errors, messages)
 
     return filenames1, filenames2
 
 
 
+def get_catalog_instruments(experiment, flux_type):
+    """ The instruments (types of files) listed in the catalog for
+        each native experiment, in the order of filenames1, filenames2
+        and filenames_orien returned by check_data.
+
+        INPUTS:
+
+        :experiment: (string) name of native experiment
+        :flux_type: (string) "integral" or "differential"
+
+        OUTPUTS:
+
+        :instruments: (string array) instrument for each set of files
+
+    """
+    if experiment == "SEPEM" or experiment == "SEPEMv3":
+        return ['SEPEM']
+    if experiment == "SRAG12":
+        return ['SRAG12']
+    if experiment == "GOES-08" or experiment == "GOES-10" or \
+        experiment == "GOES-11" or experiment == "GOES-12":
+        return ['EPS','HEPAD']
+    if experiment == "GOES-13" or experiment == "GOES-14" or \
+        experiment == "GOES-15":
+        return ['EPEAD','HEPAD','orientation']
+    if experiment == "GOES-16" or experiment == "GOES-17":
+        return ['SGPS']
+    if experiment == "EPHIN" or experiment == "EPHIN_REleASE":
+        return ['EPHIN']
+    if 'STEREO' in experiment:
+        return ['LET','HET']
+
+    return []
+
+
+def lookup_catalog(startdate, enddate, experiment, flux_type):
+    """ Find the files covering the requested dates in the catalog
+        of files that have already been read in (data_catalog.py).
+        
+        INPUTS:
+        
+        :startdate: (datetime) start of time period specified by user
+        :enddate: (datetime) end of time period entered by user
+        :experiment: (string) name of native experiment
+        :flux_type: (string) "integral" or "differential"
+        
+        OUTPUTS:
+        
+        :filenames: (tuple) filenames1, filenames2, filenames_orien as
+            returned by check_data or None if the catalog doesn't contain
+            every file needed for the time period
+        
+    """
+    instruments = get_catalog_instruments(experiment, flux_type)
+    if len(instruments) == 0:
+        return None
+
+    filenames = [[],[],[]]
+    for k in range(len(instruments)):
+        filenames[k] = catalog.lookup_files(experiment, instruments[k],
+                            flux_type, startdate, enddate)
+        if filenames[k] is None:
+            return None
+
+    #GOES files are read in sets of one eps/epead, hepad and orientation
+    #file for each month
+    if experiment[0:4] == "GOES" and experiment != "GOES-16" \
+        and experiment != "GOES-17":
+        for k in range(1,len(instruments)):
+            if len(filenames[k]) != len(filenames[0]):
+                return None
+
+    return filenames[0], filenames[1], filenames[2]
+
+
 def check_data(startdate, enddate, experiment, flux_type, user_file):
     """Check that the files containing the data are in the data directory. If
         the files for the requested dates aren't present, they will be
@@ -995,6 +1769,12 @@ def check_data(startdate, enddate, experiment, flux_type, user_file):
 
         return filenames1, filenames2, filenames_orien
 
+    #Files that have been read in before are listed in the catalog
+    filenames = lookup_catalog(startdate, enddate, experiment, flux_type)
+    if filenames is not None:
+        print('Found the requested data in the catalog of files.')
+        return filenames
+
     #SEPEM data set is continuous, but too long; prefer yearly files
     #Check if user has yearly files; if not:
         #check if user has original SEPEM, then create yearly files
@@ -1086,6 +1866,55 @@ def find_goes_data_dimensions(filename):
     return nhead, nrow
 
 
+def read_in_goes_csv(filename, columns):
+    """ Read the dates and the requested columns from a GOES csv file
+        (EPS, EPEAD, HEPAD or orientation flag files) in a single pass.
+        The header is skipped by searching for the string 'data:' and
+        the data below the column header line is read in one go.
+        
+        INPUTS:
+        
+        :filename: (string) name of GOES file containing data
+        :columns: (int array) columns to read in
+        
+        OUTPUTS:
+        
+        :dates: (datetime64 1xm array) time points in the file
+        :values: (float nxm array) values in the n requested columns for
+            m time points, as written in the file
+        
+    """
+    ncol = len(columns)
+    #Date column is read in with the requested columns
+    dtype = [('date','datetime64[ms]')]
+    for j in range(ncol):
+        dtype.append(('col' + str(j), float))
+
+    print('Reading in file ' + datapath + '/' + filename)
+    with open(datapath + '/' + filename) as csvfile:
+        #GOES data has very large headers; figure out where the data
+        #starts inside the file
+        for line in csvfile:
+            if 'data:' in line: #location of line before column headers
+                break
+        csvfile.readline() #skip column header line
+        data = np.loadtxt(csvfile, delimiter=',', usecols=[0] + list(columns),
+                        dtype=dtype, ndmin=1)
+
+    #Times are truncated to the second as in the original files
+    dates = data['date'].astype('datetime64[s]').astype('datetime64[us]')
+    values = np.zeros(shape=(ncol,len(data)))
+    for j in range(ncol):
+        values[j] = data['col' + str(j)]
+
+    return dates, values
+
+
+def get_goes_cache_key(columns):
+    """ Key identifying the columns read from a GOES file in the cache. """
+    return 'cols' + '-'.join([str(col) for col in columns])
+
+
 def get_west_detector(filename, dates):
     """ For GOES-13+, identify which detector is facing west from the
         orientation flag files. Get an orientation for each data point.
@@ -1095,57 +1924,240 @@ def get_west_detector(filename, dates):
         INPUTS:
         
         :filename: (string) file containing satellite orientation
-        :dates: (datetime 1xn array) n dates during user specified
+        :dates: (datetime64 1xn array) n dates during user specified
             time period
             
         OUTPUTS:
         
-        :west_detector: (string 1xn array) detector (A or B) identified
-            as facing westward for each time point
+        :west_detector: (int 1xn array) code of the detector identified
+            as facing westward for each time point (see match_west_detector)
        
     """
-    nhead, nrow = find_goes_data_dimensions(filename)
-    orien_dates = []
-    orientation = []
+    orien_dates, values = read_with_cache(filename, get_goes_cache_key([1]),
+                                        read_in_goes_csv, [1])
+    west_detector = match_west_detector(orien_dates, values[0], dates)
+    return west_detector
 
-    with open(datapath + '/' + filename) as orienfile:
-        #GOES data has very large headers; figure out where the data
-        #starts inside the file and skip the required number of lines
-        readCSV = csv.reader(orienfile, delimiter=',')
-        for k in range(nhead):
-            next(readCSV)  #to line with column headers
 
+def match_west_detector(orien_dates, orientation, dates):
+    """ Identify the westward facing detector at each time in dates
+        using the orientation flags read in from the orientation file.
+        See get_west_detector.
+        
+        Orientation data is in 1 minute intervals while flux data is in
+        5 minute intervals. Each flux time is given the first orientation
+        flag at or after the flux time, as long as it is within
+        orien_tolerance. Missing or extra minutes in the orientation file
+        are allowed.
+        
+        INPUTS:
+        
+        :orien_dates: (datetime64 1xp array) times in the orientation file
+        :orientation: (float 1xp array) orientation flags
+        :dates: (datetime64 1xn array) n dates during user specified
+            time period
+            
+        OUTPUTS:
+        
+        :west_detector: (int 1xn array) west_B, west_A or west_flip for
+            each time point, or west_missing if there is no orientation
+            flag for that time
+       
+    """
+    orien_times = dates_to_epoch(orien_dates)
+    orientation = np.asarray(orientation)
+    times = dates_to_epoch(dates)
+    west_detector = np.full(len(times), west_missing, dtype=np.int8)
+    if len(orien_times) == 0 or len(times) == 0:
+        return west_detector
+
+    if np.any(np.diff(orien_times) < 0):
+        order = np.argsort(orien_times, kind='stable')
+        orien_times = orien_times[order]
+        orientation = orientation[order]
+
+    idx = np.searchsorted(orien_times, times, side='left')
+    tolerance = orien_tolerance // datetime.timedelta(microseconds=1)
+    found = idx < len(orien_times)
+    found[found] = orien_times[idx[found]] - times[found] < tolerance
+    flags = orientation[idx[found]]
+    known = (flags == west_B) | (flags == west_A) | (flags == west_flip)
+    west_detector[np.flatnonzero(found)[known]] = flags[known]
+
+    nmissing = np.count_nonzero(west_detector == west_missing)
+    if nmissing > 0:
+        print('match_west_detector: No orientation flag found for '
+            + str(nmissing) + ' of ' + str(len(times)) + ' time points. '
+            'Setting these fluxes to ' + str(badval) + '.')
+
+    return west_detector
+
+
+def read_in_sepem_file(filename):
+    """ Read in a single SEPEM data file from the computer.
+        
+        INPUTS:
+        
+        :filename: (string) name of file containing SEPEM data
+            
+        OUTPUTS:
+        
+        :dates: (datetime64 1xm array) time points in the file
+        :fluxes: (float nxm array) fluxes for n energy channels and m
+            time points
+    
+    """
+    print('Reading in file ' + datapath + '/' + filename)
+    with open(datapath + '/' + filename) as csvfile:
+        readCSV = csv.reader(csvfile, delimiter=',')
+        has_header = csv.Sniffer().has_header(csvfile.readline())
+        if has_header:
+            next(readCSV)  # Skip single header row.
+        ncol = len(next(readCSV))
+        csvfile.seek(0) #back to beginning of file
+        if has_header:
+            next(readCSV)  # Skip header row.
+        nrow = len(csvfile.readlines())
+        #print('There are ' + str(ncol) + ' columns and ' + str(nrow) +
+        #    ' rows of data in ' + filename)
+
+        #Define arrays that hold dates and fluxes
+        str_dates = []
+        fluxes = np.zeros(shape=(ncol-1,nrow))
+
+        csvfile.seek(0) #back to beginning of file
+        if has_header:
+            next(readCSV)  # Skip header row.
+
+        count = 0
         for row in readCSV:
-            date = datetime.datetime.strptime(row[0][0:19],
+            str_dates.append(row[0])
+            for j in range(1,ncol):
+                flux = float(row[j])
+                if flux < 0:
+                    flux = badval
+                fluxes[j-1][count] = flux
+            count = count + 1
+
+    dates = decode_timestamps([str_dates], iso_format)
+    return dates, fluxes
+
+
+def find_line_offset(infile, data_start, size, date, after):
+    """ Binary search for the first line in a file with a time stamp
+        at (after=False) or after (after=True) date. The lines must be
+        in time order and start with the date in YYYY-MM-DD HH:MM:SS
+        format.
+        
+        INPUTS:
+        
+        :infile: (file) file opened in binary mode
+        :data_start: (int) byte offset of the first data line
+        :size: (int) size of the file in bytes
+        :date: (datetime) time to search for
+        :after: (bool) find the first line after date rather than at
+            or after date
+        
+        OUTPUTS:
+        
+        :offset: (int) byte offset of the start of the line or size
+            if there is no such line
+        
+    """
+    def line_start(pos):
+        #Start of the first line beginning at or after pos
+        if pos <= data_start:
+            return data_start
+        infile.seek(pos - 1)
+        infile.readline()
+        return infile.tell()
+
+    def is_past(pos):
+        infile.seek(line_start(pos))
+        line = infile.readline()
+        if line.strip() == b'':
+            return True
+        line_date = datetime.datetime.strptime(line[0:19].decode(),
                                             "%Y-%m-%d %H:%M:%S")
-            orien_dates.append(date)
-            orientation.append(float(row[1]))
+        if after:
+            return line_date > date
+        return line_date >= date
+
+    low = data_start
+    high = size
+    while low < high:
+        mid = (low + high)//2
+        if is_past(mid):
+            high = mid
+        else:
+            low = mid + 1
 
-    orienfile.close()
+    return line_start(low)
 
-    #orientation data is in 1 minute intervals while flux data is in 5
-    #minute intervals. Identify W facing detector for flux times.
-    #Assume that time stamps match every 5 minutes.
-    date_index = 0
-    west_detector = []
-    for i in range(nrow):
-        if orien_dates[i] == dates[date_index]:
-            if orientation[i] == 0:
-                west_detector.append("B")
-            if orientation[i] == 1:
-                west_detector.append("A")
-            if orientation[i] == 2:
-                west_detector.append("Flip")
-            date_index = date_index + 1
-            if date_index == len(dates):
-                break
 
-    #print('There were ' + str(len(dates)) + ' input dates and there are ' +
-    #        str(len(west_detector)) + ' detector orientations.')
-    return west_detector
+def read_in_sepem_window(filename, startdate, enddate):
+    """ Read in only the part of a SEPEM data file between startdate
+        and enddate. The lines at the start and end of the date range
+        are found with a binary search over the file (find_line_offset)
+        and only the lines in between are parsed. The last point before
+        startdate and the first point after enddate are also included so
+        that extract_date_range gives the same result as when the whole
+        file is read.
+        
+        INPUTS:
+        
+        :filename: (string) name of file containing SEPEM data
+        :startdate: (datetime) start of desired time period
+        :enddate: (datetime) end of desired time period
+            
+        OUTPUTS:
+        
+        :dates: (datetime64 1xm array) time points in the date range
+        :fluxes: (float nxm array) fluxes for n energy channels and m
+            time points
+    
+    """
+    print('Reading in ' + str(startdate) + ' to ' + str(enddate) + ' from '
+        + datapath + '/' + filename)
+    with open(datapath + '/' + filename, 'rb') as infile:
+        firstline = infile.readline()
+        has_header = csv.Sniffer().has_header(firstline.decode())
+        data_start = len(firstline) if has_header else 0
+        size = infile.seek(0, os.SEEK_END)
+
+        start = find_line_offset(infile, data_start, size, startdate, False)
+        end = find_line_offset(infile, data_start, size, enddate, True)
+        #Include the last point before startdate
+        if start > data_start:
+            back = max(data_start, start - 4096)
+            infile.seek(back)
+            chunk = infile.read(start - back)
+            start = back + chunk.rfind(b'\n', 0, len(chunk) - 1) + 1
+        #Include the first point after enddate
+        infile.seek(end)
+        infile.readline()
+        end = infile.tell()
+
+        infile.seek(start)
+        lines = infile.read(end - start).decode().splitlines()
+
+    str_dates = []
+    values = []
+    for row in csv.reader(lines):
+        if len(row) == 0:
+            continue
+        str_dates.append(row[0])
+        values.append([float(value) for value in row[1:]])
+
+    dates = decode_timestamps([str_dates], iso_format)
+
+    fluxes = np.array(values, dtype=float).T.copy()
+    fluxes[fluxes < 0] = badval
+    return dates, fluxes
 
 
-def read_in_sepem(experiment, flux_type, filenames1):
+def read_in_sepem(experiment, flux_type, filenames1, startdate=None,
+                enddate=None):
     """ Read in SEPEM data files from the computer.
         
         INPUTS:
@@ -1154,64 +2166,83 @@ def read_in_sepem(experiment, flux_type, filenames1):
         :flux_type: (string) integral or differential
         :filenames1: (string array) names of files containing
             SEPEM data in desired time range (yearly files)
+        :startdate: (datetime) start of desired time period (optional)
+        :enddate: (datetime) end of desired time period (optional)
             
         OUTPUTS:
         
-        :all_dates: (datetime 1xm array) time points for every time in
+        :all_dates: (datetime64 1xm array) time points for every time in
             all the data points in the files contained in filenames1
         :all_fluxes: (float nxm array) fluxes for n energy channels and m
             time points
     
         Note that all_dates and all_fluxes will be trimmed down to the
         user time period of interest.
+        
+        If startdate and enddate are specified, only the lines in the
+        date range are read from files that haven't been cached
+        (read_in_sepem_window).
     """
     NFILES = len(filenames1)
+    if startdate is not None and enddate is not None:
+        accum = make_accumulator()
+        for fname in filenames1:
+            dates = None
+            if use_cache:
+                dates, fluxes = read_cache(fname, 'sepem')
+            if dates is None:
+                dates, fluxes = read_in_sepem_window(fname, startdate, enddate)
+            if len(dates) > 0:
+                add_to_accumulator(accum, dates, fluxes)
+        all_dates, all_fluxes = get_accumulated(accum)
+        return all_dates, all_fluxes
+
+    accum = make_accumulator(catalog.count_rows(filenames1))
+    results = read_files([[fname, 'sepem', read_in_sepem_file, []]
+                        for fname in filenames1])
+    catalog.register_files(experiment, 'SEPEM', flux_type, filenames1,
+                        [result[0] for result in results])
     for i in range(NFILES):
-        print('Reading in file ' + datapath + '/' + filenames1[i])
-        with open(datapath + '/' + filenames1[i]) as csvfile:
-            readCSV = csv.reader(csvfile, delimiter=',')
-            has_header = csv.Sniffer().has_header(csvfile.readline())
-            if has_header:
-                next(readCSV)  # Skip single header row.
-            ncol = len(next(readCSV))
-            csvfile.seek(0) #back to beginning of file
-            if has_header:
-                next(readCSV)  # Skip header row.
-            nrow = len(csvfile.readlines())
-            #print('There are ' + str(ncol) + ' columns and ' + str(nrow) +
-            #    ' rows of data in ' + filenames1[i])
-
-            #Define arrays that hold dates and fluxes
-            dates = []
-            fluxes = np.zeros(shape=(ncol-1,nrow))
-
-            csvfile.seek(0) #back to beginning of file
-            if has_header:
-                next(readCSV)  # Skip header row.
-
-            count = 0
-            for row in readCSV:
-                date = datetime.datetime.strptime(row[0][0:19],
-                                                "%Y-%m-%d %H:%M:%S")
-                dates.append(date)
-                for j in range(1,ncol):
-                    flux = float(row[j])
-                    if flux < 0:
-                        flux = badval
-                    fluxes[j-1][count] = flux
-                count = count + 1
+        dates, fluxes = results[i]
         #If reading in multiple files, then combine all data into one array
         #SEPEM currently only has one file, but making generalized
-        if i==0:
-            all_fluxes = fluxes
-            all_dates = dates
-        else:
-            all_fluxes = np.concatenate((all_fluxes,fluxes),axis=1)
-            all_dates = all_dates + dates
+        add_to_accumulator(accum, dates, fluxes)
 
+    all_dates, all_fluxes = get_accumulated(accum)
     return all_dates, all_fluxes
 
 
+def read_in_srag12_file(filename):
+    """ Read in a single file of the SRAG1.2 data set.
+        The fluxes on the first line of the file are kept, but not
+        the date.
+    """
+    fluxes = []
+    str_dates = []
+
+    print("reading filename " + filename)
+    with open(datapath + '/' + filename) as file:
+        #Get number of columns in file
+        #Fill in first row so can have correct format array
+        firstline = file.readline().strip().split(",")
+        ncol = len(firstline) - 1
+        for i in range(ncol):
+            fluxes.append([float(firstline[i+1])])
+    
+        for line in file:
+            if line == "": continue
+            
+            row = line.strip().split(",")
+            if row[0] == "0": continue
+            for i in range(ncol):
+                fluxes[i].append(float(row[i+1]))
+            
+            str_dates.append(row[0])
+
+    dates = decode_timestamps([str_dates], iso_format)
+    return dates, np.array(fluxes)
+
+
 def read_in_srag12(experiment, filenames1):
     """ Read in the data set created by Shaowen Hu (NASA JSC SRAG)
         that generates a consistent and recalibrated GOES data set.
@@ -1220,29 +2251,17 @@ def read_in_srag12(experiment, filenames1):
     fluxes = []
     all_dates = []
 
-    for filenm in filenames1:
-        print("reading filename " + filenm)
-        with open(datapath + '/' + filenm) as file:
-            #Get number of columns in file
-            #Fill in first row so can have correct format array
-            firstline = file.readline().strip().split(",")
-            ncol = len(firstline) - 1
-            for i in range(ncol):
-                fluxes.append([float(firstline[i+1])])
-        
-            for line in file:
-                if line == "": continue
-                
-                row = line.strip().split(",")
-                if row[0] == "0": continue
-                for i in range(ncol):
-                    fluxes[i].append(float(row[i+1]))
-                
-                date = datetime.datetime.strptime(row[0][0:19],
-                                                "%Y-%m-%d %H:%M:%S")
-                all_dates.append(date)
+    results = read_files([[filenm, 'srag12', read_in_srag12_file, []]
+                        for filenm in filenames1])
+    catalog.register_files(experiment, 'SRAG12', 'differential', filenames1,
+                        [result[0] for result in results])
+    for dates, file_fluxes in results:
+        all_dates.append(dates)
+        fluxes.append(file_fluxes)
+
+    all_dates = to_datetime64(np.concatenate(all_dates))
 
-    all_fluxes = np.array(fluxes)
+    all_fluxes = np.concatenate(fluxes, axis=1)
     
     return all_dates, all_fluxes
 
@@ -1267,7 +2286,7 @@ def read_in_goes(experiment, flux_type, filenames1, filenames2,
             
         OUTPUTS:
         
-        :all_dates: (datetime 1xm array) time points for every time in
+        :all_dates: (datetime64 1xm array) time points for every time in
             all the data points in the files contained in filenames1
         :all_fluxes: (float nxm array) fluxes for n energy channels and m
             time points
@@ -1320,13 +2339,18 @@ def read_in_goes(experiment, flux_type, filenames1, filenames2,
     nhcol = len(hepad_columns)
     totcol = ncol + nhcol
 
-    #Read in fluxes from files
+    is_epead = (experiment == "GOES-13" or experiment == "GOES-14"
+                or experiment == "GOES-15")
+    #For GOES-13+, read the A and B detector columns in one go
+    if is_epead:
+        read_columns = columns + columnsB
+    else:
+        read_columns = columns
+
+    #The eps/epead, hepad and orientation files are independent of
+    #each other and may be read in at the same time
+    jobs = []
     for i in range(NFILES):
-        #FIRST set of files for lower energy eps or epead
-        nhead, nrow = find_goes_data_dimensions(filenames1[i])
-        dates = []
-        fluxes = np.zeros(shape=(totcol,nrow))
-        
         #GOES-14 and GOES-15 files between 2019-09-01 to 2020-03-07 have one
         #column missing in the hepad file. Check the date in the filenames1
         #and apply the correct hepad columns for those specific files.
@@ -1341,82 +2365,131 @@ def read_in_goes(experiment, flux_type, filenames1, filenames2,
                     hepad_columns = [8,11,14,17]
                 if flux_type == "integral":
                     hepad_columns = [17]
-            
-        
-        print('Reading in file ' + datapath + '/' + filenames1[i])
-        with open(datapath + '/' + filenames1[i]) as csvfile:
-            #GOES data has very large headers; figure out where the data
-            #starts inside the file and skip the required number of lines
-            readCSV = csv.reader(csvfile, delimiter=',')
-            for k in range(nhead):
-                next(readCSV)  #to start of data
-
-            #Get dates first; need dates to identify spacecraft orientation
-            #for GOES-13+
-            for row in readCSV:
-                date = datetime.datetime.strptime(row[0][0:19],
-                                                "%Y-%m-%d %H:%M:%S")
-                dates.append(date)
-
-            if (experiment == "GOES-13" or experiment == "GOES-14"
-                or experiment == "GOES-15"):
-                west_detector = get_west_detector(filenames_orien[i], dates)
-
-
-            #Go back and get fluxes
-            count = 0
-            csvfile.seek(0)
-            for k in range(nhead):
-                next(readCSV)  #to start of data
-            for row in readCSV:
-                for j in range(ncol):
-                    flux = float(row[columns[j]])
-                    #Account for orientation
-                    if (experiment == "GOES-13" or experiment == "GOES-14"
-                        or experiment == "GOES-15"):
-                        if west_detector[count] == "B":
-                            flux = float(row[columnsB[j]])
-                        if west_detector[count] == "Flip":
-                            flux = badval
-                    if flux < 0:
-                        flux = badval
-                    fluxes[j][count] = flux
-                count = count + 1
-        csvfile.close()
 
+        jobs.append([filenames1[i], get_goes_cache_key(read_columns),
+                    read_in_goes_csv, [read_columns]])
+        jobs.append([filenames2[i], get_goes_cache_key(hepad_columns),
+                    read_in_goes_csv, [hepad_columns]])
+        if is_epead:
+            jobs.append([filenames_orien[i], get_goes_cache_key([1]),
+                    read_in_goes_csv, [[1]]])
+
+    results = read_files(jobs)
+    njobs = 3 if is_epead else 2
+    instruments = ['EPEAD','HEPAD','orientation'] if is_epead \
+                    else ['EPS','HEPAD']
+    all_filenames = [filenames1, filenames2, filenames_orien]
+    for k in range(njobs):
+        catalog.register_files(experiment, instruments[k], flux_type,
+                    all_filenames[k], [result[0] for result in results[k::njobs]])
+
+    #Read in fluxes from files
+    accum = make_accumulator(catalog.count_rows(filenames1))
+    all_west = []
+    for i in range(NFILES):
+        #FIRST set of files for lower energy eps or epead
+        dates, values = results[njobs*i]
+        nrow = len(dates)
+        fluxes = np.zeros(shape=(totcol,nrow))
+
+        #Need dates to identify spacecraft orientation for GOES-13+
+        if is_epead:
+            orien_dates, orientation = results[njobs*i + 2]
+            west = match_west_detector(orien_dates, orientation[0], dates)
+            all_west.append(west)
+            #Account for orientation; A detector unless B is facing west
+            fluxes[0:ncol] = np.where(west == west_B, values[ncol:2*ncol],
+                                values[0:ncol])
+            fluxes[0:ncol,(west == west_flip) | (west == west_missing)] \
+                = badval
+        else:
+            fluxes[0:ncol] = values[0:ncol]
 
         #SECOND set of files for higher energy hepad
-        nhead, nrow = find_goes_data_dimensions(filenames2[i])
-        with open(datapath + '/' + filenames2[i]) as csvfile:
-            readCSV = csv.reader(csvfile, delimiter=',')
-            for k in range(nhead):
-                next(readCSV)  #to start of data
-
-            count = 0
-            for row in readCSV:
-                for j in range(nhcol):
-                    flux = float(row[hepad_columns[j]])
-                    if flux < 0:
-                        flux = badval
-                    fluxes[ncol+j][count] = flux
-                count = count + 1
-        csvfile.close()
+        hdates, hvalues = results[njobs*i + 1]
+        fluxes[ncol:totcol,0:len(hdates)] = hvalues
+
+        fluxes[fluxes < 0] = badval
 
         #If reading in multiple files, then combine all data into one array
-        if all_fluxes == []:
-            all_fluxes = fluxes
-            all_dates = dates
-        else:
-            all_fluxes = np.concatenate((all_fluxes,fluxes),axis=1)
-            all_dates = all_dates + dates
+        add_to_accumulator(accum, dates, fluxes)
     
-    if all_dates == []:
+    all_dates, all_fluxes = get_accumulated(accum)
+    if len(all_dates) == 0:
         print("read_in_goes: Did not find the data you were looking for.")
+    if is_epead:
+        west_detector = np.concatenate(all_west) if NFILES > 0 \
+                        else np.zeros(0, dtype=np.int8)
         
     return all_dates, all_fluxes, west_detector
 
 
 
+def read_in_goesR_file(filename):
+    """ Read in a single GOES-R netcdf file. See read_in_goesR.
+        
+        INPUTS:
+        
+        :filename: (string) file containing the GOES-R netcdf data
+        
+        OUTPUTS:
+        
+        :dates: (datetime64 1xm array) time points in the file
+        :fluxes: (float nxm array) fluxes for 13 differential channels
+            and the >500 MeV integral channel for m time points
+        
+    """
+    ndiff_chan = 13 #5
+    conversion = 1000. #keV/MeV
+    
+    print('Reading in file ' + datapath + '/' + filename)
+    infile = os.path.expanduser(datapath + "/" + filename)
+    data = netCDF4.Dataset(infile)
+    
+    if "v3-0" in filename:
+        time_key = "time"
+        flip_key = "yaw_flip_flag"
+    else:
+        time_key = "L2_SciData_TimeStamp"
+        flip_key = "YawFlipFlag"
+
+    #Read each variable in one go; fill values are masked by netCDF4
+    #and are set to NaN. Fluxes are kept in the precision of the file
+    #until they are converted to MeV.
+    time_sec = np.ma.filled(data.variables[time_key][:].astype(float), np.nan)
+    flip_flag = np.ma.filled(data.variables[flip_key][:], 0)
+    #[288 time step, 2 +/-X, 13 energy chan]
+    diff_flux = np.ma.filled(data.variables["AvgDiffProtonFlux"][:], np.nan)
+    #[288 time step, 2 +/-X]
+    int_flux = np.ma.filled(data.variables["AvgIntProtonFlux"][:], np.nan)
+    data.close()
+
+    ntstep = len(time_sec)
+    #GOES-R times are wrt reference time of 2000-01-01 12:00:00
+    dates = decode_timestamps([time_sec], "goesR")
+
+    #Orientation flag; index 1 when flipped
+    #if flip_flag > 1:
+    #    idx = None #exclude these points because in process of flip
+    idx = np.where(flip_flag == 1, 1, 0)
+    tidx = np.arange(ntstep)
+    
+    #13 differential channels, one integral channel
+    #5 minute time steps
+    fluxes = np.zeros(shape=(ndiff_chan+1,ntstep))
+
+    #Extract the 13 differential channels
+    flux = diff_flux[tidx,idx,0:ndiff_chan].T
+    flux[flux < 0] = badval
+    fluxes[0:ndiff_chan] = flux*conversion
+
+    flux = int_flux[tidx,idx]
+    flux[flux < 0] = badval
+    fluxes[-1] = flux
+
+    return dates, fluxes
+
+
 def read_in_goesR(experiment, flux_type, filenames1):
     """Read in GOES-R data from your computer.
         Appears that only differential channels + one >500 MeV
@@ -1449,7 +2522,7 @@ def read_in_goesR(experiment, flux_type, filenames1):
             
         OUTPUTS:
         
-        :all_dates: (datetime 1xm array) time points for every time in
+        :all_dates: (datetime64 1xm array) time points for every time in
             all the data points in the files contained in filenames1
         :all_fluxes: (float nxm array) fluxes for n energy channels and m
             time points
@@ -1458,75 +2531,77 @@ def read_in_goesR(experiment, flux_type, filenames1):
         user time period of interest.
         
     """
-    ndiff_chan = 13 #5
-    conversion = 1000. #keV/MeV
-    
     NFILES = len(filenames1)
     all_dates = []
     all_fluxes = []
     west_detector = [] #place holder, will be filled if needed
 
-    #GOES-R times are wrt reference time of 2000-01-01 12:00:00
-    ref_date = datetime.datetime(year=2000, month=1, day=1, hour=12)
-    
     #Read in fluxes from files
+    accum = make_accumulator(catalog.count_rows(filenames1))
+    results = read_files([[fname, 'goesR', read_in_goesR_file, []]
+                        for fname in filenames1])
+    catalog.register_files(experiment, 'SGPS', flux_type, filenames1,
+                        [result[0] for result in results])
     for i in range(NFILES):
-        infile = os.path.expanduser(datapath + "/" + filenames1[i])
-        data = netCDF4.Dataset(infile)
+        dates, fluxes = results[i]
+        add_to_accumulator(accum, dates, fluxes)
+    all_dates, all_fluxes = get_accumulated(accum)
+
+
+    return all_dates, all_fluxes, west_detector
+
+
+
+def read_in_goesR_RT_file(filename):
+    """ Read in a single day of GOES-R real time integral fluxes.
+        See read_in_goesR_RT.
         
-        if "v3-0" in filenames1[i]:
-            ntstep = len(data.variables["time"])
-        else:
-            ntstep = len(data.variables["L2_SciData_TimeStamp"])
+        INPUTS:
         
-        #13 differential channels, one integral channel
-        #5 minute time steps
-        fluxes = np.zeros(shape=(ndiff_chan+1,ntstep))
+        :filename: (string) file containing the GOES-R real time data
         
-        for j in range(ntstep):
-            if "v3-0" in filenames1[i]:
-                time_sec = float(data.variables["time"][j].data)
-            else:
-                time_sec = float(data.variables["L2_SciData_TimeStamp"][j].data)
-            td = datetime.timedelta(seconds=time_sec)
-            date = ref_date + td
-            all_dates.append(date)
+        OUTPUTS:
+        
+        :dates: (datetime64 1xm array) time points in the file
+        :fluxes: (float 6xm array) fluxes for 6 integral channels
+            and m time points
+        
+    """
+    n_chan = 6
+    
+    print('Reading in file ' + datapath + '/' + filename)
+    with open(datapath + "/" + filename) as infile:
+    
+        #6 integral channels
+        #5 minute time steps up to 00:00 of the next day
+        #Exclude last time step at midnight of next day or will
+        #end up with repeat entries for the same time.
+        date_fields = []
+        fluxes = np.zeros(shape=(n_chan,288))
+        j = 0 #counter for number of time steps in file
+    
+        for row in infile:
+            if row[0] == "#": continue
+            if row[0] == ":": continue
+            if j == 288: continue
             
-            #Orientation flag
-            if "v3-0" in filenames1[i]:
-                flip_flag = data.variables["yaw_flip_flag"][j]
-            else:
-                flip_flag = data.variables["YawFlipFlag"][j]
-            idx = 0
-            if flip_flag == 1:
-                idx = 1
-            #if flip_flag > 1:
-            #    idx = None #exclude these points because in process of flip
+            row = row.split()
             
-            #Extract the 13 differential channels
-            for k in range(ndiff_chan):
-                ###TEMP###
-                #kk = k + 8
-                #[288 time step, 2 +/-X, 13 energy chan]
-                
-                flux = data.variables["AvgDiffProtonFlux"][j][idx][k]
+            #Get Date: year, month, day, HHMM
+            date_fields.append(row[0:4])
+            
+            for k in range(n_chan):
+                flux = float(row[6+k])
                 if flux < 0:
                     flux = badval
-                fluxes[k][j] = flux*conversion
+                fluxes[k][j] = flux
             
+            j = j+1 #count dates
 
-            flux = data.variables["AvgIntProtonFlux"][j][idx]
-            if flux < 0:
-                flux = badval
-            fluxes[-1][j] = flux
-                
-        if all_fluxes == []:
-            all_fluxes = fluxes
-        else:
-            all_fluxes = np.concatenate((all_fluxes,fluxes),axis=1)
-
-
-    return all_dates, all_fluxes, west_detector
+    #Files for the current day are not complete
+    dates = decode_timestamps(np.array(date_fields, dtype=str).reshape(-1,4).T,
+                "%Y %m %d %H%M")
+    return dates, fluxes[:,0:j]
 
 
 
@@ -1559,7 +2634,7 @@ def read_in_goesR_RT(experiment, flux_type, filenames1):
             
         OUTPUTS:
         
-        :all_dates: (datetime 1xm array) time points for every time in
+        :all_dates: (datetime64 1xm array) time points for every time in
             all the data points in the files contained in filenames1
         :all_fluxes: (float nxm array) fluxes for n energy channels and m
             time points
@@ -1568,8 +2643,6 @@ def read_in_goesR_RT(experiment, flux_type, filenames1):
         user time period of interest.
         
     """
-    n_chan = 6
-    
     NFILES = len(filenames1)
     all_dates = []
     all_fluxes = []
@@ -1577,50 +2650,79 @@ def read_in_goesR_RT(experiment, flux_type, filenames1):
 
     
     #Read in fluxes from files
+    accum = make_accumulator(catalog.count_rows(filenames1))
+    results = read_files([[fname, 'goesR_RT', read_in_goesR_RT_file, []]
+                        for fname in filenames1])
+    catalog.register_files(experiment, 'SGPS', flux_type, filenames1,
+                        [result[0] for result in results])
     for i in range(NFILES):
-        with open(datapath + "/" + filenames1[i]) as infile:
-        
-            #6 integral channels
-            #5 minute time steps up to 00:00 of the next day
-            #Exclude last time step at midnight of next day or will
-            #end up with repeat entries for the same time.
-            fluxes = np.zeros(shape=(n_chan,288))
-            j = 0 #counter for number of time steps in file
-        
-            for row in infile:
-                if row[0] == "#": continue
-                if row[0] == ":": continue
-                if j == 288: continue
-                
-                row = row.split()
-                
-                #Get Date
-                year = int(row[0])
-                month = int(row[1])
-                day = int(row[2])
-                hour = int(row[3][0:2])
-                minute = int(row[3][2:4])
-                date = datetime.datetime(year=year,month=month,day=day,hour=hour,minute=minute)
-                all_dates.append(date)
-                
-                for k in range(n_chan):
-                    flux = float(row[6+k])
-                    if flux < 0:
-                        flux = badval
-                    fluxes[k][j] = flux
-                
-                j = j+1 #count dates
-                    
-        if all_fluxes == []:
-            all_fluxes = fluxes
-        else:
-            all_fluxes = np.concatenate((all_fluxes,fluxes[:,0:len(all_dates)]),axis=1)
+        dates, fluxes = results[i]
+        add_to_accumulator(accum, dates, fluxes)
+    all_dates, all_fluxes = get_accumulated(accum)
 
     return all_dates, all_fluxes, west_detector
 
 
 
 
+def read_in_ephin_file(filename):
+    """ Read in a single EPHIN file from your computer.
+        
+        INPUTS:
+        
+        :filename: (string) name of file containing EPHIN data
+            
+        OUTPUTS:
+        
+        :dates: (datetime64 1xm array) time points in the file
+        :fluxes: (float nxm array) fluxes for n energy channels and m
+            time points
+    
+    """
+    datecols = [0,1,2,4,5] #yr, mth, dy, hr, min
+    fluxcols = [8,9,10,11]
+    ncol= len(fluxcols)
+
+    print('Reading in file ' + datapath + '/' + filename)
+    with open(datapath + '/' + filename) as csvfile:
+        #Count header lines indicated by hash #
+        nhead = 0
+        for line in csvfile:
+            line = line.lstrip()
+            if line[0] == "#":
+                nhead = nhead + 1
+            else:
+                break
+        #number of lines containing data
+        nrow = len(csvfile.readlines())+1
+
+        #Define arrays that hold dates and fluxes
+        date_fields = []
+        fluxes = np.zeros(shape=(ncol,nrow))
+
+        csvfile.seek(0) #back to beginning of file
+        for k in range(nhead):
+            csvfile.readline()  # Skip header rows.
+
+        count = 0
+        for line in csvfile:
+            if line == '': continue
+            if line[0] == "#": continue
+
+            row = line.split()
+            date_fields.append([row[col] for col in datecols])
+            for j in range(ncol):
+                flux = float(row[fluxcols[j]])
+                if flux < 0:
+                    flux = badval
+                fluxes[j][count] = flux
+            count = count + 1
+
+    dates = decode_timestamps(np.array(date_fields, dtype=str).reshape(-1,5).T,
+                "%Y %m %d %H %M")
+    return dates, fluxes
+
+
 def read_in_ephin(experiment, flux_type, filenames1):
     """ Read in EPHIN files from your computer.
         
@@ -1633,7 +2735,7 @@ def read_in_ephin(experiment, flux_type, filenames1):
             
         OUTPUTS:
         
-        :all_dates: (datetime 1xm array) time points for every time in
+        :all_dates: (datetime64 1xm array) time points for every time in
             all the data points in the files contained in filenames1
         :all_fluxes: (float nxm array) fluxes for n energy channels and m
             time points
@@ -1643,64 +2745,81 @@ def read_in_ephin(experiment, flux_type, filenames1):
     
     """
     NFILES = len(filenames1)
+    accum = make_accumulator(catalog.count_rows(filenames1))
 
-    datecols = [0,1,2,4,5] #yr, mth, dy, hr, min
-    fluxcols = [8,9,10,11]
-    ncol= len(fluxcols)
-
+    results = read_files([[fname, 'ephin', read_in_ephin_file, []]
+                        for fname in filenames1])
+    catalog.register_files(experiment, 'EPHIN', flux_type, filenames1,
+                        [result[0] for result in results])
     for i in range(NFILES):
-        print('Reading in file ' + datapath + '/' + filenames1[i])
-        with open(datapath + '/' + filenames1[i]) as csvfile:
-            #Count header lines indicated by hash #
-            nhead = 0
-            for line in csvfile:
-                line = line.lstrip()
-                if line[0] == "#":
-                    nhead = nhead + 1
-                else:
-                    break
-            #number of lines containing data
-            nrow = len(csvfile.readlines())+1
-
-            #Define arrays that hold dates and fluxes
-            dates = []
-            fluxes = np.zeros(shape=(ncol,nrow))
-
-            csvfile.seek(0) #back to beginning of file
-            for k in range(nhead):
-                csvfile.readline()  # Skip header rows.
-
-            count = 0
-            for line in csvfile:
-                if line == '': continue
-                if line[0] == "#": continue
-
-                row = line.split()
-                yr = int(row[datecols[0]])
-                mnth = int(row[datecols[1]])
-                dy = int(row[datecols[2]])
-                hr = int(row[datecols[3]])
-                min = int(row[datecols[4]])
-                date = datetime.datetime(yr,mnth,dy,hr,min,0,0)
-                dates.append(date)
-                for j in range(ncol):
-                    flux = float(row[fluxcols[j]])
-                    if flux < 0:
-                        flux = badval
-                    fluxes[j][count] = flux
-                count = count + 1
+        dates, fluxes = results[i]
         #If reading in multiple files, then combine all data into one array
         #SEPEM currently only has one file, but making generalized
-        if i==0:
-            all_fluxes = fluxes
-            all_dates = dates
-        else:
-            all_fluxes = np.concatenate((all_fluxes,fluxes),axis=1)
-            all_dates = all_dates + dates
+        add_to_accumulator(accum, dates, fluxes)
 
+    all_dates, all_fluxes = get_accumulated(accum)
     return all_dates, all_fluxes
 
 
+def read_in_ephin_release_file(filename):
+    """ Read in a single EPHIN REleASE file from your computer.
+        
+        INPUTS:
+        
+        :filename: (string) name of file containing EPHIN REleASE data
+            
+        OUTPUTS:
+        
+        :dates: (datetime64 1xm array) time points in the file
+        :fluxes: (float nxm array) fluxes for n energy channels and m
+            time points
+    
+    """
+    datecols = [0] #yr, mth, dy, hr, min
+    fluxcols = [1,2,3,4]
+    ncol= len(fluxcols)
+
+    print('Reading in file ' + datapath + '/' + filename)
+    with open(datapath + '/' + filename) as csvfile:
+        #Count header lines indicated by hash #
+        nhead = 0
+        for line in csvfile:
+            line = line.lstrip()
+            if line == '':
+                nhead = nhead + 1
+            elif line[0] == "#":
+                nhead = nhead + 1
+            else:
+                break
+        #number of lines containing data
+        nrow = len(csvfile.readlines())+1
+
+        #Define arrays that hold dates and fluxes
+        str_dates = []
+        fluxes = np.zeros(shape=(ncol,nrow))
+
+        csvfile.seek(0) #back to beginning of file
+        for k in range(nhead):
+            csvfile.readline()  # Skip header rows.
+
+        count = 0
+        for line in csvfile:
+            if line == '': continue
+            if line[0] == "#": continue
+
+            row = line.split(';')
+            str_dates.append(row[0])
+            for j in range(ncol):
+                flux = float(row[fluxcols[j]])
+                if flux < 0:
+                    flux = badval
+                fluxes[j][count] = flux
+            count = count + 1
+
+    dates = decode_timestamps([str_dates], iso_format)
+    return dates, fluxes
+
+
 def read_in_ephin_release(experiment, flux_type, filenames1):
     """ Read in EPHIN files from your computer.
         
@@ -1713,7 +2832,7 @@ def read_in_ephin_release(experiment, flux_type, filenames1):
             
         OUTPUTS:
         
-        :all_dates: (datetime 1xm array) time points for every time in
+        :all_dates: (datetime64 1xm array) time points for every time in
             all the data points in the files contained in filenames1
         :all_fluxes: (float nxm array) fluxes for n energy channels and m
             time points
@@ -1723,63 +2842,162 @@ def read_in_ephin_release(experiment, flux_type, filenames1):
     
     """
     NFILES = len(filenames1)
+    accum = make_accumulator(catalog.count_rows(filenames1))
 
-    datecols = [0] #yr, mth, dy, hr, min
-    fluxcols = [1,2,3,4]
-    ncol= len(fluxcols)
-
+    results = read_files([[fname, 'ephin_release', read_in_ephin_release_file, []]
+                        for fname in filenames1])
+    catalog.register_files(experiment, 'EPHIN', flux_type, filenames1,
+                        [result[0] for result in results])
     for i in range(NFILES):
-        print('Reading in file ' + datapath + '/' + filenames1[i])
-        with open(datapath + '/' + filenames1[i]) as csvfile:
-            #Count header lines indicated by hash #
-            nhead = 0
-            for line in csvfile:
-                line = line.lstrip()
-                if line == '':
-                    nhead = nhead + 1
-                elif line[0] == "#":
-                    nhead = nhead + 1
-                else:
-                    break
-            #number of lines containing data
-            nrow = len(csvfile.readlines())+1
-
-            #Define arrays that hold dates and fluxes
-            dates = []
-            fluxes = np.zeros(shape=(ncol,nrow))
-
-            csvfile.seek(0) #back to beginning of file
-            for k in range(nhead):
-                csvfile.readline()  # Skip header rows.
-
-            count = 0
-            for line in csvfile:
-                if line == '': continue
-                if line[0] == "#": continue
-
-                row = line.split(';')
-                date = datetime.datetime.strptime(row[0][0:19],
-                                                "%Y-%m-%d %H:%M:%S")
-                dates.append(date)
-                for j in range(ncol):
-                    flux = float(row[fluxcols[j]])
-                    if flux < 0:
-                        flux = badval
-                    fluxes[j][count] = flux
-                count = count + 1
+        dates, fluxes = results[i]
         #If reading in multiple files, then combine all data into one array
         #SEPEM currently only has one file, but making generalized
-        if i==0:
-            all_fluxes = fluxes
-            all_dates = dates
-        else:
-            all_fluxes = np.concatenate((all_fluxes,fluxes),axis=1)
-            all_dates = all_dates + dates
+        add_to_accumulator(accum, dates, fluxes)
 
+    all_dates, all_fluxes = get_accumulated(accum)
     return all_dates, all_fluxes
 
 
 
+def read_in_stereo_let_file(filename):
+    """ Read in a single STEREO LET (summed) daily file.
+        
+        INPUTS:
+        
+        :filename: (string) name of file containing LET data
+            
+        OUTPUTS:
+        
+        :datesL: (datetime64 1xm array) time points in the file
+        :fluxesL: (float nxm array) fluxes for n energy channels and m
+            time points
+    
+    """
+    datecolsL = [0,1,2,3,4] #yr, doy (frac), hour, min, sec - not used
+    fluxcolsL = [7,8,9] #1.8-3.6, 4-6, 6-10, 10-15 <-- always empty
+    ncolL = len(fluxcolsL)
+
+    print('Reading in file ' + datapath + '/' + filename)
+    with open(datapath + '/' + filename) as infile:
+        #Count header lines up until "BEGIN DATA"
+        #Count remaining lines of data
+        nhead = 0
+        nrowL = 0
+        is_header = True
+        for line in infile:
+            line = line.lstrip()
+            if is_header:
+                nhead = nhead + 1
+            
+            if 'BEGIN DATA' in line:
+                #nhead = nhead + 1
+                is_header = False
+            
+            if not is_header and line != '': #empty line at end of file
+                nrowL = nrowL + 1
+        
+        #print("LET data header rows: " + str(nhead) + ", data rows: " + str(nrowL))
+        #Define arrays that hold dates and fluxes
+        date_fields = []
+        fluxesL = np.zeros(shape=(ncolL,nrowL))
+
+        infile.seek(0) #back to beginning of file
+        for k in range(nhead):
+            infile.readline()  # Skip header rows.
+
+        count = 0
+        for line in infile:
+            line = line.lstrip()
+            if line == '': continue
+            if line[0] == "#": continue
+
+            row = line.split()
+            #year, doy (frac), hour, minute; ignore seconds to match with HET
+            date_fields.append(row[0:4])
+            
+            for j in range(ncolL):
+                flux = float(row[fluxcolsL[j]])
+                if flux < 0:
+                    flux = badval
+                fluxesL[j][count] = flux
+            count = count + 1
+
+    date_fields = np.array(date_fields, dtype=str).reshape(-1,4).T
+    doy = np.floor(date_fields[1].astype(float))
+    datesL = decode_timestamps([date_fields[0], doy, date_fields[2],
+                date_fields[3]], "%Y %j %H %M")
+    return datesL, fluxesL
+
+
+def read_in_stereo_het_file(filename):
+    """ Read in a single STEREO HET file.
+        
+        INPUTS:
+        
+        :filename: (string) name of file containing HET data
+            
+        OUTPUTS:
+        
+        :datesH: (datetime64 1xm array) time points in the file
+        :fluxesH: (float nxm array) fluxes for n energy channels and m
+            time points
+    
+    """
+    datecolsH = [1,2,3,4] #yr, doy, dy, hr, min - not used
+    fluxcolsH = [11, 13, 15, 17, 19, 21, 23, 25, 27, 29, 31]
+    ncolH = len(fluxcolsH)
+
+    print('Reading in file ' + datapath + '/' + filename)
+    with open(datapath + '/' + filename) as infile:
+        #Count header lines up until "BEGIN DATA"
+        #Count remaining lines of data
+        nhead = 0
+        nrowH = 0
+        is_header = True
+        for line in infile:
+            line = line.lstrip()
+            if is_header:
+                nhead = nhead + 1
+            
+            if '#End' in line:
+               # nhead = nhead + 1
+                is_header = False
+            
+            if not is_header and line != '': #empty line at end of file
+                nrowH = nrowH + 1
+        
+        #print("HET data header rows: " + str(nhead) + ", data rows: " + str(nrowH))
+        #Define arrays that hold dates and fluxes
+        date_fields = []
+        fluxesH = np.zeros(shape=(ncolH,nrowH))
+
+        infile.seek(0) #back to beginning of file
+        for k in range(nhead):
+            infile.readline()  # Skip header rows.
+
+        count = 0
+        for line in infile:
+            line = line.lstrip()
+            if line == '': continue
+            if line[0] == "#": continue
+
+            row = line.split()
+            
+            #Date 0 2021 Jan 1 0000
+            date_fields.append(row[1:5])
+            
+            for j in range(ncolH):
+                flux = float(row[fluxcolsH[j]])
+                if flux < 0:
+                    flux = badval
+                fluxesH[j][count] = flux
+            count = count + 1
+
+    datesH = decode_timestamps(np.array(date_fields, dtype=str).reshape(-1,4).T,
+                "%Y %b %d %H%M") #2001 Jan 1 1545
+    return datesH, fluxesH
+
+
 def read_in_stereo(experiment, flux_type, filenames1, filenames2):
     """ Read in STEREO-A or STEREO-B LET (summed) and HET files
         and combine together to make a time profile across
@@ -1796,151 +3014,36 @@ def read_in_stereo(experiment, flux_type, filenames1, filenames2):
     NFILESL = len(filenames1) #LET, daily
     NFILESH = len(filenames2) #HET, yearly
 
-    datecolsL = [0,1,2,3,4] #yr, doy (frac), hour, min, sec - not used
-    fluxcolsL = [7,8,9] #1.8-3.6, 4-6, 6-10, 10-15 <-- always empty
-    ncolL = len(fluxcolsL)
-
-    datecolsH = [1,2,3,4] #yr, doy, dy, hr, min - not used
-    fluxcolsH = [11, 13, 15, 17, 19, 21, 23, 25, 27, 29, 31]
-    ncolH = len(fluxcolsH)
+    ncolL = 3
+    ncolH = 11
 
     
     #READ IN LET
+    accumL = make_accumulator(catalog.count_rows(filenames1))
+    results = read_files([[fname, 'stereo_let', read_in_stereo_let_file, []]
+                        for fname in filenames1])
+    catalog.register_files(experiment, 'LET', flux_type, filenames1,
+                        [result[0] for result in results])
     for i in range(NFILESL):
-        print('Reading in file ' + datapath + '/' + filenames1[i])
-        with open(datapath + '/' + filenames1[i]) as infile:
-            #Count header lines up until "BEGIN DATA"
-            #Count remaining lines of data
-            nhead = 0
-            nrowL = 0
-            is_header = True
-            for line in infile:
-                line = line.lstrip()
-                if is_header:
-                    nhead = nhead + 1
-                
-                if 'BEGIN DATA' in line:
-                    #nhead = nhead + 1
-                    is_header = False
-                
-                if not is_header and line != '': #empty line at end of file
-                    nrowL = nrowL + 1
-            
-            #print("LET data header rows: " + str(nhead) + ", data rows: " + str(nrowL))
-            #Define arrays that hold dates and fluxes
-            datesL = []
-            fluxesL = np.zeros(shape=(ncolL,nrowL))
-
-            infile.seek(0) #back to beginning of file
-            for k in range(nhead):
-                infile.readline()  # Skip header rows.
-
-            count = 0
-            for line in infile:
-                line = line.lstrip()
-                if line == '': continue
-                if line[0] == "#": continue
-
-                row = line.split()
-                year = int(row[0])
-                doy = math.floor(float(row[1]))
-                hour = int(row[2])
-                minute = int(row[3])
-                sec = int(row[4])
-                
-                str_date = str(year) + " " + str(doy) + " " + str(hour) + " " \
-                    + str(minute)
-                date = datetime.datetime.strptime(str_date,"%Y %j %H %M")
-                
-                #doy_date = datetime.datetime(year=year,month=1,day=1) + datetime.timedelta(days=doy-1)
-                #month = doy_date.month
-                #day = doy_date.day
-                
-                #date = datetime.datetime(year=year,month=month,day=day,
-                #        hour=hour,minute=minute,second=0)  #ignore seconds to match with HET
-                datesL.append(date)
-                
-                for j in range(ncolL):
-                    flux = float(row[fluxcolsL[j]])
-                    if flux < 0:
-                        flux = badval
-                    fluxesL[j][count] = flux
-                count = count + 1
+        datesL, fluxesL = results[i]
         
         #If reading in multiple files, then combine all data into one array
-        if i==0:
-            all_fluxesL = fluxesL
-            all_datesL = datesL
-        else:
-            all_fluxesL = np.concatenate((all_fluxesL,fluxesL),axis=1)
-            all_datesL = all_datesL + datesL
+        add_to_accumulator(accumL, datesL, fluxesL)
+    all_datesL, all_fluxesL = get_accumulated(accumL)
             
             
     #READ IN HET
+    accumH = make_accumulator(catalog.count_rows(filenames2))
+    results = read_files([[fname, 'stereo_het', read_in_stereo_het_file, []]
+                        for fname in filenames2])
+    catalog.register_files(experiment, 'HET', flux_type, filenames2,
+                        [result[0] for result in results])
     for i in range(NFILESH):
-        print('Reading in file ' + datapath + '/' + filenames2[i])
-        with open(datapath + '/' + filenames2[i]) as infile:
-            #Count header lines up until "BEGIN DATA"
-            #Count remaining lines of data
-            nhead = 0
-            nrowH = 0
-            is_header = True
-            for line in infile:
-                line = line.lstrip()
-                if is_header:
-                    nhead = nhead + 1
-                
-                if '#End' in line:
-                   # nhead = nhead + 1
-                    is_header = False
-                
-                if not is_header and line != '': #empty line at end of file
-                    nrowH = nrowH + 1
-            
-            #print("HET data header rows: " + str(nhead) + ", data rows: " + str(nrowH))
-            #Define arrays that hold dates and fluxes
-            datesH = []
-            fluxesH = np.zeros(shape=(ncolH,nrowH))
-
-            infile.seek(0) #back to beginning of file
-            for k in range(nhead):
-                infile.readline()  # Skip header rows.
-
-            count = 0
-            for line in infile:
-                line = line.lstrip()
-                if line == '': continue
-                if line[0] == "#": continue
-
-                row = line.split()
-                
-                #Date 0 2021 Jan 1 0000
-                year = int(row[1])
-                str_month = row[2] #str
-                day = int(row[3])
-                str_hr_min = row[4]
-               # hr = int(str_hr_min[0:2])
-               # min = int(str_hr_min[2:4])
-                
-                str_date = str(year) + " " + str_month + " " + str(day) + " " + str_hr_min
-                date = datetime.datetime.strptime(str_date, '%Y %b %d %H%M') #2001 Jan 1 1545
- 
-                datesH.append(date)
-                
-                for j in range(ncolH):
-                    flux = float(row[fluxcolsH[j]])
-                    if flux < 0:
-                        flux = badval
-                    fluxesH[j][count] = flux
-                count = count + 1
+        datesH, fluxesH = results[i]
         
         #If reading in multiple files, then combine all data into one array
-        if i==0:
-            all_fluxesH = fluxesH
-            all_datesH = datesH
-        else:
-            all_fluxesH = np.concatenate((all_fluxesH,fluxesH),axis=1)
-            all_datesH = all_datesH + datesH
+        add_to_accumulator(accumH, datesH, fluxesH)
+    all_datesH, all_fluxesH = get_accumulated(accumH)
 
     #Now we have the LET and HET data for every minute in different arrays.
     #The HET rows must be appended at the end of the LET rows (to go up
@@ -1959,7 +3062,7 @@ def read_in_stereo(experiment, flux_type, filenames1, filenames2):
                                     all_datesH, all_fluxesH)
 
 
-    print("There are " + str(len(datesL_trim)) + " LET time points and " + str(len(datesH_trim)) + " HET time points between " + str(first_date) + " and " + str(last_date))
+    print("There are " + str(len(datesL_trim)) + " LET time points and " + str(len(datesH_trim)) + " HET time points between " + str(to_datetime(first_date)) + " and " + str(to_datetime(last_date)))
     
  
 #    all_dates = datesL_trim
@@ -1968,34 +3071,24 @@ def read_in_stereo(experiment, flux_type, filenames1, filenames2):
     #There may be data gaps in the LET and HET data sets, so make a time point for
     #every minute between the first_date and last_date, then fill in
     #with the appropriate data.
-    nmins = math.ceil((last_date - first_date).total_seconds()/60.) + 1
-    dates_all_min = []
-    fluxes_all_min = np.zeros(shape=(ncolL+ncolH,nmins))
-    for ii in range(nmins):
-        time = first_date + datetime.timedelta(minutes = ii)
-        dates_all_min.append(time)
-
-        #CHECK FOR FLUX AT TIME IN LET
-        try:
-            idx_LET = datesL_trim.index(time)
-            for kk in range(ncolL):
-                fluxes_all_min[kk][ii] = fluxesL_trim[kk][idx_LET]
-        except:
-            for kk in range(ncolL):
-                fluxes_all_min[kk][ii] = badval
-
-        #CHECK FOR FLUX AT TIME IN HET
-        try:
-            idx_HET = datesH_trim.index(time)
-            for kk in range(ncolH):
-                fluxes_all_min[ncolL + kk][ii] = fluxesH_trim[kk][idx_HET]
-        except:
-            for kk in range(ncolH):
-                fluxes_all_min[ncolL + kk][ii] = badval
+    nmins = math.ceil(to_seconds(last_date - first_date)/60.) + 1
+    dates_all_min = first_date + np.arange(nmins)*np.timedelta64(1,'m')
+    fluxes_all_min = np.full((ncolL+ncolH,nmins), float(badval))
+
+    #Fill in the first LET and HET flux at each minute, if there is one
+    for dates_trim, fluxes_trim, row in ((datesL_trim, fluxesL_trim, 0),
+                                        (datesH_trim, fluxesH_trim, ncolL)):
+        order = np.argsort(dates_trim, kind='stable')
+        sorted_dates = dates_trim[order]
+        idx = np.searchsorted(sorted_dates, dates_all_min)
+        found = idx < len(sorted_dates)
+        found[found] = sorted_dates[idx[found]] == dates_all_min[found]
+        fluxes_all_min[row:row+len(fluxes_trim),found] \
+            = fluxes_trim[:,order[idx[found]]]
 
     print("read_in_stereo: Filled in flux values for all minutes between:")
-    print(dates_all_min[0])
-    print(dates_all_min[-1])
+    print(to_datetime(dates_all_min[0]))
+    print(to_datetime(dates_all_min[-1]))
     print("Final flux array " + str(fluxes_all_min[:,0].size) + " " + str(fluxes_all_min[0,:].size) +
     " dates size " + str(len(dates_all_min)))
 
@@ -2009,7 +3102,7 @@ def read_in_stereo(experiment, flux_type, filenames1, filenames2):
 
 
 def read_in_files(experiment, flux_type, filenames1, filenames2,
-                filenames_orien, options):
+                filenames_orien, options, startdate=None, enddate=None):
     """ Read in the appropriate data files with the correct format. Return an
         array with dates and fluxes. Bad flux values (any negative flux) are set
         to -1. Format is defined to work with the files downloaded directly from
@@ -2033,15 +3126,19 @@ def read_in_files(experiment, flux_type, filenames1, filenames2,
         :filenames_orien: (string array if GOES, files containing
             satellite orientation
         :options: (string array) options that may be applied to GOES data
+        :startdate: (datetime) start of time period of interest (optional)
+        :enddate: (datetime) end of time period of interest (optional);
+            if specified, only the part of the SEPEM files covering the
+            time period is read in
         
         OUTPUTS:
         
-        :all_dates: (datetime 1xm array) time points for every time in
+        :all_dates: (datetime64 1xm array) time points for every time in
             all the data points in the files contained in filenames1
         :all_fluxes: (float nxm array) fluxes for n energy channels and m
             time points
-        :west_detector: (string 1xm array) if GOES, indicates which detector
-            is westward facing for every time point
+        :west_detector: (int 1xm array) if GOES-13 - 15, code indicating
+            which detector is westward facing for every time point
     
         Note that all_dates and all_fluxes will be trimmed down to the
         user time period of interest.
@@ -2053,7 +3150,8 @@ def read_in_files(experiment, flux_type, filenames1, filenames2,
     west_detector = []
 
     if experiment == "SEPEM" or experiment == "SEPEMv3":
-        all_dates, all_fluxes = read_in_sepem(experiment, flux_type, filenames1)
+        all_dates, all_fluxes = read_in_sepem(experiment, flux_type, filenames1,
+                    startdate, enddate)
         return all_dates, all_fluxes, west_detector
 
     if experiment == "SRAG12":
@@ -2111,7 +3209,189 @@ def convert_decimal_hour(decimal_hours):
     return hours, minutes, seconds
 
 
-def read_in_user_files(filenames1):
+def get_user_columns():
+    """ Columns in the user files that contain the fluxes in user_col.
+        If the columns are separated by whitespace, the date takes two
+        columns, so the columns are shifted by one.
+    """
+    user_col_mod = []
+    for j in range(len(user_col)):
+        if user_delim == " " or user_delim == "":
+            #date takes two columns if separated by whitespace
+            #adjust the user input columns to account for this
+            user_col_mod.append(user_col[j] + 1)
+        else:
+            user_col_mod.append(user_col[j])
+    return user_col_mod
+
+
+def convert_user_chunk(str_dates, values, shift):
+    """ Convert the strings read from a set of lines in a user file
+        to dates and fluxes. Fluxes that are n/a (REleASE) are set to
+        NaN and negative fluxes to badval. Rows with a NaN in any
+        channel are removed and the time shift is applied.
+        
+        INPUTS:
+        
+        :str_dates: (string 1xm array) dates in YYYY-MM-DD HH:MM:SS format
+        :values: (string mxn array) flux values for n user columns
+        :shift: (timedelta) time shift applied to all dates
+        
+        OUTPUTS:
+        
+        :dates: (datetime64 1xp array) dates of the rows that were kept
+        :fluxes: (float nxp array) fluxes of the rows that were kept
+        
+    """
+    fluxes = np.array(values)
+    fluxes[fluxes == 'n/a'] = 'nan'
+    fluxes = fluxes.astype(float).T
+    fluxes[fluxes < 0] = badval
+
+    #Remove dates that have None values (because they were n/a in REleASE)
+    keep = ~np.isnan(np.sum(fluxes, axis=0))
+    fluxes = np.ascontiguousarray(fluxes[:,keep])
+
+    #apply a time shift to user data with the variable set in global_vars
+    dates = np.array(str_dates, dtype='datetime64[us]')[keep] \
+            + np.timedelta64(shift // datetime.timedelta(microseconds=1), 'us')
+
+    return dates, fluxes
+
+
+def stream_user_file(filename, shift, chunk_size=None):
+    """ Read in a user file in chunks of chunk_size lines. The file is
+        read once, line by line, and only one chunk at a time is held
+        in memory. See read_in_user_files for the file format.
+        
+        INPUTS:
+        
+        :filename: (string) user file relative to datapath
+        :shift: (timedelta) time shift applied to all dates
+        :chunk_size: (int) number of lines in each chunk; defaults
+            to user_chunk_size in global_vars.py
+        
+        OUTPUTS:
+        
+        Yields (dates, fluxes) for each chunk, where dates is a
+        datetime 1xm array and fluxes a float nxm array. Rows with
+        n/a or NaN fluxes are not included.
+        
+    """
+    if chunk_size is None:
+        chunk_size = user_chunk_size
+    user_col_mod = get_user_columns()
+    whitespace = (user_delim == " " or user_delim == "")
+
+    with open(datapath + '/' + filename) as csvfile:
+        str_dates = []
+        values = []
+        header = True
+        for line in csvfile:
+            #Header lines indicated by hash # or quotes and empty lines
+            #at the beginning of the file
+            if header:
+                stripped = line.lstrip()
+                if stripped == '' or stripped[0] == "#" or stripped[0] == '\"':
+                    continue
+                header = False
+
+            if line == " " or line == "":
+                continue
+            if whitespace:
+                row = line.split()
+                str_dates.append(row[0][0:10] + ' ' + row[1][0:8])
+            else:
+                row = line.split(user_delim)
+                str_dates.append(row[0][0:19])
+
+            if user_col_mod == [] or max(user_col_mod) >= len(row):
+                sys.exit("read_datasets: read_in_user_files: Something is "
+                    "wrong with reading in the user files (mismatch in "
+                    "number of columns). Did you set "
+                    "the correct information in library/read_datasets.py, "
+                    "including the delimeter?")
+            values.append([row[col].rstrip() for col in user_col_mod])
+
+            if len(values) == chunk_size:
+                yield convert_user_chunk(str_dates, values, shift)
+                str_dates = []
+                values = []
+
+        if len(values) > 0:
+            yield convert_user_chunk(str_dates, values, shift)
+
+
+def stream_user_files(filenames1, chunk_size=None):
+    """ Read in a set of user files in chunks. Allow user to add a time
+        shift to files using the global_var time_shift to specify the
+        time shift in hours. See stream_user_file.
+        
+        INPUTS:
+    
+        :filenames1: (string array) the user files containing the data that
+            span the desired time range
+        :chunk_size: (int) number of lines in each chunk
+       
+        OUTPUTS:
+       
+        Yields (dates, fluxes) for each chunk of each file
+       
+    """
+    print('Reading in user-specified files.')
+    shift = datetime.timedelta(0)
+    if gl.time_shift != 0:
+        print("!!!!!!!Shifting times by time_shift in global_vars.py: " \
+            + str(gl.time_shift) + " hours. Set to zero if do not want to shift.")
+        hours, minutes, seconds = convert_decimal_hour(gl.time_shift)
+        shift = datetime.timedelta(hours=hours, minutes=minutes,
+                                    seconds=seconds)
+
+    for filename in filenames1:
+        print('Reading in ' + datapath + '/' + filename)
+        for chunk in stream_user_file(filename, shift, chunk_size):
+            yield chunk
+
+
+def stream_date_range(startdate, enddate, chunks):
+    """ Keep only the parts of a stream of (dates, fluxes) chunks that
+        fall between startdate and enddate. Uses the same rules as
+        extract_date_range: if there are no points in the date range,
+        the first point after startdate is kept. Reading stops once
+        the stream has passed enddate.
+        
+        INPUTS:
+        
+        :startdate: (datetime) start of desired time period
+        :enddate: (datetime) end of desired time period
+        :chunks: (iterator) (dates, fluxes) chunks in time order, e.g.
+            from stream_user_files
+        
+        OUTPUTS:
+        
+        Yields (dates, fluxes) chunks within the date range
+        
+    """
+    startdate = to_datetime64(startdate)
+    enddate = to_datetime64(enddate)
+    found = False
+    for dates, fluxes in chunks:
+        if len(dates) == 0:
+            continue
+        nst = np.searchsorted(dates, startdate, side='left')
+        nend = np.searchsorted(dates, enddate, side='right')
+        if nend > nst:
+            found = True
+            yield dates[nst:nend], fluxes[:,nst:nend]
+        elif not found and nst < len(dates):
+            #grab at least one data point
+            yield dates[nst:nst+1], fluxes[:,nst:nst+1]
+            return
+        if found and nend < len(dates):
+            return
+
+
+def read_in_user_files(filenames1, startdate=None, enddate=None):
     """ Read in file containing flux time profile information that was
         specified by the user.
         The first column MUST contain the date in YYYY-MM-DD HH:MM:SS
@@ -2129,134 +3409,99 @@ def read_in_user_files(filenames1):
         to specify the time shift in hours. A negative value shifts earlier, a
         positive value shifts later.
         
+        The files are read in chunks (stream_user_files). If startdate and
+        enddate are specified, only the data in that date range is kept
+        (stream_date_range), so the full files are never held in memory.
+        
         INPUTS:
     
         :filenames1: (string array) the user files containing the data that
             span the desired time range
+        :startdate: (datetime) start of time period to keep (optional)
+        :enddate: (datetime) end of time period to keep (optional)
        
         OUTPUTS:
        
-        :all_dates: (datetime 1xm array) time points for every time in
+        :all_dates: (datetime64 1xm array) time points for every time in
             all the data points in the files contained in filenames1
         :all_fluxes: (float nxm array) fluxes for n energy channels and m
             time points
        
     """
-    print('Reading in user-specified files.')
-    if gl.time_shift != 0:
-        print("!!!!!!!Shifting times by time_shift in global_vars.py: " \
-            + str(gl.time_shift) + " hours. Set to zero if do not want to shift.")
-    NFILES = len(filenames1)
-    ncol = len(user_col) #include column for date
-    for i in range(NFILES):
-        print('Reading in ' + datapath + '/' + filenames1[i])
-        with open(datapath + '/' + filenames1[i]) as csvfile:
-            #Count header lines indicated by hash #
-            nhead = 0
-            for line in csvfile:
-                line = line.lstrip()
-                if line == '' or line == '\n':
-                    nhead = nhead + 1
-                elif line[0] == "#" or line[0] == '\"':
-                    nhead = nhead + 1
-                else:
-                    break
-            #number of lines containing data
-            nrow = len(csvfile.readlines())+1
-
-            #Define arrays that hold dates and fluxes
-            dates = []
-            fluxes = np.zeros(shape=(ncol,nrow))
-
-            csvfile.seek(0) #back to beginning of file
-            for k in range(nhead):
-                csvfile.readline()  # Skip header rows.
-
-            user_col_mod = []
-            for j in range(len(user_col)):
-                if user_delim == " " or user_delim == "":
-                    #date takes two columns if separated by whitespace
-                    #adjust the user input columns to account for this
-                    user_col_mod.append(user_col[j] + 1)
-                else:
-                    user_col_mod.append(user_col[j])
-
-            count = 0
-            for line in csvfile:
-                if line == " " or line == "":
-                    continue
-                if user_delim == " " or user_delim == "":
-                    row = line.split()
-                    str_date = row[0][0:10] + ' ' + row[1][0:8]
-                if user_delim != " " and user_delim != "":
-                    row = line.split(user_delim)
-                    str_date = row[0][0:19]
-
-                date = datetime.datetime.strptime(str_date,
-                                                "%Y-%m-%d %H:%M:%S")
-                #apply a time shift to user data with the variable set in
-                #global_vars
-                if gl.time_shift != 0:
-                    hours, minutes, seconds = convert_decimal_hour(gl.time_shift)
-                    date = date + datetime.timedelta(hours=hours, minutes=minutes,\
-                                                        seconds=seconds)
-                    
-                dates.append(date)
-                
-                for j in range(len(user_col_mod)):
-                    #print("Read in flux for column " + str(user_col[j]) + ': '\
-                    #    + str(date)) #+ ' ' + row[user_col[j]])
-                    #print(row)
-                    if user_col_mod ==[] or j >= len(user_col_mod) \
-                        or user_col_mod[j] >= len(row):
-                        sys.exit("read_datasets: read_in_user_files: Something is "
-                            "wrong with reading in the user files (mismatch in "
-                            "number of columns). Did you set "
-                            "the correct information in library/read_datasets.py, "
-                            "including the delimeter?")
-                    row[user_col_mod[j]] = row[user_col_mod[j]].rstrip()
-                    if row[user_col_mod[j]] == 'n/a': #REleASE
-                        flux = None
-                    else:
-                        flux = float(row[user_col_mod[j]])
-                        if flux < 0:
-                            flux = badval
-                    fluxes[j][count] = flux
-                count = count + 1
-
-        #Remove dates that have None values (because they were n/a in REleASE)
-        for k in range(len(dates)-1,-1,-1):
-            if None in fluxes[:,k] or np.isnan(np.sum(fluxes[:,k])):
-                del dates[k]
-                fluxes = np.delete(fluxes, k, 1)
+    chunks = stream_user_files(filenames1)
+    if startdate is not None and enddate is not None:
+        chunks = stream_date_range(startdate, enddate, chunks)
 
+    accum = make_accumulator()
+    for dates, fluxes in chunks:
         #If reading in multiple files, then combine all data into one array
-        #SEPEM currently only has one file, but making generalized
-        if i==0:
-            all_fluxes = fluxes
-            all_dates = dates
-        else:
-            all_fluxes = np.concatenate((all_fluxes,fluxes),axis=1)
-            all_dates = all_dates + dates
+        add_to_accumulator(accum, dates, fluxes)
 
+    all_dates, all_fluxes = get_accumulated(accum)
     return all_dates, all_fluxes
 
 
+def extract_date_range_indices(startdate,enddate,all_dates):
+    """ Find the indices that bound the dates in the range specified by
+        the user. all_dates must be in time order. The last time point on
+        or before startdate and enddate are found by binary search.
+        The time point at startdate is included if there is one, otherwise
+        the range starts with the next time point. The range ends with the
+        last time point on or before enddate. At least one data point is
+        included if there are any points on or after startdate.
+        
+        all_dates[nst:nend] and all_fluxes[:,nst:nend] are the points in
+        the date range, so the caller can take views without a copy.
+        
+        INPUTS:
+        
+        :startdate: (datetime) start of desired time period
+        :enddate: (datetime) end of desired time period
+        :all_dates: (datetime64 1xm array) time points in time order
+        
+        OUTPUTS:
+        
+        :nst: (int) index of first time point in range
+        :nend: (int) one past the index of the last time point in range
+        
+    """
+    all_dates = to_datetime64(all_dates)
+    startdate = to_datetime64(startdate)
+    enddate = to_datetime64(enddate)
+    ndates = len(all_dates)
+    if ndates == 0:
+        return 0, 0
+    #last time point on or before startdate and enddate
+    nst = max(int(np.searchsorted(all_dates, startdate, side='right')) - 1, 0)
+    nend = max(int(np.searchsorted(all_dates, enddate, side='right')) - 1, 0)
+    if all_dates[nst] < startdate:
+        nst = nst + 1 #move one step past the start time if no
+                    #time point on exactly the start time
+    nst = min(nst,ndates) #make sure nst is not psat the length of the array
+    nend = min(nend+1, ndates)  #add 1 to include nend in date range
+    
+    if nst == nend and nend < ndates:
+        nend = nend + 1 #grab at least one data point at index nst
+    
+    return nst, nend
+
+
 def extract_date_range(startdate,enddate,all_dates,all_fluxes):
     """ Extract fluxes only for the dates in the range specified by the user.
+        The indices are found with extract_date_range_indices.
         
         INPUTS:
         
         :startdate: (datetime) start of desired time period
         :enddate: (datetime) end of desired time period
-        :all_dates: (datetime 1xm array) time points for every time in
+        :all_dates: (datetime64 1xm array) time points for every time in
             all the data points in the files contained in filenames1
         :all_fluxes: (float nxm array) fluxes for n energy channels and m
             time points
         
         OUTPUTS:
         
-        :dates: (datetime 1xp array) dates for p time points within
+        :dates: (datetime64 1xp array) dates for p time points within
             the date range specified by startdate and enddate
         :fluxes: (float nxp array) flux time profiles for n energy channels
             and p time points
@@ -2264,22 +3509,8 @@ def extract_date_range(startdate,enddate,all_dates,all_fluxes):
     """
     #print('Extracting fluxes for dates: ' + str(startdate) + ' to '
     #    + str(enddate))
-    ndates = len(all_dates)
-    nst = 0
-    nend = 0
-    for i in range(ndates):
-        if all_dates[i] <= startdate:
-            nst = i
-        if all_dates[i] <= enddate:
-            nend = i
-    if all_dates[nst] < startdate:
-        nst = nst + 1 #move one step past the start time if no
-                    #time point on exactly the start time
-    nst = min(nst,ndates) #make sure nst is not psat the length of the array
-    nend = min(nend+1, ndates)  #add 1 to include nend in date range
-    
-    if nst == nend and nend < ndates:
-        nend = nend + 1 #grab at least one data point at index nst
+    all_dates = to_datetime64(all_dates)
+    nst, nend = extract_date_range_indices(startdate,enddate,all_dates)
     
     dates = all_dates[nst:nend]
     fluxes = all_fluxes[:,nst:nend]
@@ -2287,119 +3518,176 @@ def extract_date_range(startdate,enddate,all_dates,all_fluxes):
     return dates, fluxes
 
 
-def do_interpolation(i,dates,flux):
-    """ If bad fluxes (flux < 0) are found in the data, find the first prior
-        data point and the first following data point that have good flux values.
-        Perform linear interpolation in time:
+def find_time_resolution(dates):
+    """ Find the time resolution of a time profile as the most common
+        difference between consecutive time points. If more than one
+        difference is the most common, the first one in the time profile
+        is used. Time steps longer than the time resolution are reported
+        as data gaps.
         
-        F(t) = F1 + (t - t1)*(F2 - F1)/(t2 - t1)
+        The result is saved for each time axis, so calling again with
+        the same dates doesn't repeat the calculation.
         
-        This subroutine does the calculation for a single instance of bad data
-        that corresponds to array index i.
+        INPUTS:
+        
+        :dates: (datetime64 1xm array) dates of the time profile
+            
+        OUTPUTS:
+        
+        :info: (dict) {"time_resolution": (timedelta) most common
+            time step, "cadences": (timedelta list) every distinct time step,
+            "counts": (int list) number of each time step in cadences,
+            "gaps": [[date before gap, date after gap], ...] (datetime)}
+       
+    """
+    dates = to_datetime64(dates)
+    if len(dates) <= 1:
+        sys.exit("determine_time_resolution: Require more than 1 data point "
+                "to determine time resolution. Please extend your "
+                "requested time range and try again. Exiting.")
+
+    key = (len(dates), dates[0], dates[-1], hash(dates.tobytes()))
+    if key in time_resolution_cache:
+        return time_resolution_cache[key]
+
+    time_diff = np.diff(dates)
+    cadences, first, counts = np.unique(time_diff, return_index=True,
+                                    return_counts=True)
+    most_common = np.flatnonzero(counts == counts.max())
+    best = most_common[np.argmin(first[most_common])]
+    gap_index = np.flatnonzero(time_diff > cadences[best])
+    info = {"time_resolution": cadences[best].item(),
+            "cadences": cadences.tolist(),
+            "counts": counts.tolist(),
+            "gaps": [[before, after] for before, after in
+                    zip(to_datetime(dates[gap_index]),
+                        to_datetime(dates[gap_index+1]))]}
+
+    if len(time_resolution_cache) >= time_resolution_cache_size:
+        del time_resolution_cache[next(iter(time_resolution_cache))]
+    time_resolution_cache[key] = info
+    return info
+
+
+def make_quality_mask(fluxes,west_detector=[]):
+    """ Make a data quality mask with the same shape as fluxes that
+        records why each bad point is bad as bit flags: quality_fill,
+        quality_flip or quality_negative. Good points are 0.
         
         INPUTS:
         
-        :i: (integer) index of time point to interpolate
-        :dates: (datetime 1xp array) dates for p time points within
-            the date range specified by startdate and enddate
-        :fluxes: (float 1xp array) flux time profiles for n energy channels
-            and p time points
+        :fluxes: (float nxp or 1xp array) flux time profiles for n energy
+            channels and p time points; None values are allowed
+        :west_detector: (int 1xp array) code of the westward GOES detector
+            for each time point, as returned by read_in_goes. Fill values
+            at times when the orientation is unknown are marked quality_flip.
             
         OUTPUTS:
         
-        :interp_flux: (float 1xp array) flux time profile with any negative
-            flux values replaced with linear interpolation with time
+        :quality: (uint8 nxp or 1xp array) data quality flags
        
     """
-    ndates = len(dates)
-
-    #If first point is bad point, use the next good point to fill gap
-    if i == 0:
-        for j in range(i,ndates-1):
-            if flux[j] != badval and flux[j] != None:
-                postflux = flux[j]
-                postdate = dates[j]
-                print('First point in array is bad. The first good value after '
-                    'the gap is on '+ str(dates[j]) + ' with value '
-                    + str(flux[j]))
-                break
-        preflux = postflux
-
-    #If last point is bad point, use the first prior good point to fill gap
-    if i == ndates - 1:
-        for j in range(i,-1,-1):
-            if flux[j] != badval and flux[j] != None:
-                preflux = flux[j]
-                predate = dates[j]
-                print('Last point in the array is bad. The first good value '
-                    'previous to gap is on '+ str(dates[j]) + ' with value '
-                    + str(flux[j]))
-                break
-        postflux = preflux
-
-    #Within the flux array
-    if i != 0 and i != ndates-1:
-        #search for first previous good value prior to the gap
-        for j in range(i,-1,-1):
-            if flux[j] != badval and flux[j] != None:
-                preflux = flux[j]
-                predate = dates[j]
-                print('The first good value previous to gap is on '
-                    + str(dates[j]) + ' with value ' + str(flux[j]))
-                break
-            if j == 0:
-                sys.exit('There is a data gap at the beginning of the '
-                        'selected time period. Program cannot estimate '
-                        'flux in data gap.')
-
-        #search for first previous good value after to the gap
-        for j in range(i,ndates-1):
-            if flux[j] != badval and flux[j] != None:
-                postflux = flux[j]
-                postdate = dates[j]
-                print('The first good value after to gap is on '
-                    + str(dates[j]) + ' with value ' + str(flux[j]))
-                break
-            if j == ndates-2 and flux[j] == badval:
-                if flux[ndates-1] != badval and flux[ndates-1] != None:
-                    postflux = flux[ndates-1]
-                    postdate = dates[ndates-1]
-                else:
-                    postflux = preflux
-                    postdate = predate
-                    print(' Bad values continue to the end of the data set. '
-                        'Using the first good value previous to gap on '
-                        + str(postdate) + ' with value ' + str(postflux))
-
-    if preflux == postflux:
-        interp_flux = preflux
-    if preflux != postflux:
-        interp_flux = preflux + (dates[i] - predate).total_seconds()\
-             *(postflux - preflux)/(postdate - predate).total_seconds()
-    print('Filling gap at time ' + str(dates[i])
-            + ' with interpolated flux ' + str(interp_flux))
-    return interp_flux
-
-
-def check_for_bad_data(dates,fluxes,energy_bins,dointerp=True):
-    """ Search the data for bad values (flux < 0) and fill the missing data with
+    values = np.asarray(fluxes, dtype=float) #None values become NaN
+    quality = np.zeros(values.shape, dtype=np.uint8)
+    quality[(values == badval) | np.isnan(values)] = quality_fill
+    quality[(values < 0) & (values != badval)] = quality_negative
+    if len(west_detector) > 0:
+        west = np.asarray(west_detector)
+        flipped = (west == west_flip) | (west == west_missing)
+        quality[...,flipped] = np.where(quality[...,flipped] == quality_fill,
+                                    quality_flip, quality[...,flipped])
+    return quality
+
+
+def usable_data(fluxes,quality=None):
+    """ Identify the points that can be used in the calculations: points
+        that were good or were filled by interpolation and are not NaN.
+        
+        INPUTS:
+        
+        :fluxes: (float nxp or 1xp array) flux time profiles
+        :quality: (uint8 nxp or 1xp array) data quality flags from
+            make_quality_mask and check_for_bad_data. Made from fluxes
+            if not specified.
+            
+        OUTPUTS:
+        
+        :usable: (bool nxp or 1xp array) True for points that can be used
+       
+    """
+    values = np.asarray(fluxes, dtype=float)
+    if quality is None:
+        quality = make_quality_mask(values)
+    return ~np.isnan(values) & (((quality & quality_bad) == 0)
+                | ((quality & quality_interp) != 0))
+
+
+def find_data_gaps(dates,bad):
+    """ Summarize the bad data points in each energy channel as a count
+        and a list of spans of consecutive bad points.
+        
+        INPUTS:
+        
+        :dates: (datetime64 1xp array) dates for p time points
+        :bad: (bool nxp array) True where the flux is bad for n energy
+            channels and p time points
+            
+        OUTPUTS:
+        
+        :gaps: (list of n dicts) for each energy channel,
+            {"count": number of bad points,
+             "spans": [[first date, last date], ...]} with one
+            [first date, last date] pair (datetime) per gap
+       
+    """
+    gaps = []
+    for i in range(len(bad)):
+        #+1 at the first point of each gap and -1 one past its last point
+        edges = np.diff(np.concatenate(([0], bad[i].astype(np.int8), [0])))
+        first = np.flatnonzero(edges == 1)
+        last = np.flatnonzero(edges == -1) - 1
+        spans = [[first_date, last_date] for first_date, last_date
+                in zip(to_datetime(dates[first]), to_datetime(dates[last]))]
+        gaps.append({"count": int(np.count_nonzero(bad[i])), "spans": spans})
+    return gaps
+
+
+def check_for_bad_data(dates,fluxes,energy_bins,dointerp=True,
+                return_gaps=False,quality=None):
+    """ Search the data for bad values (flux < 0, None or NaN) as marked in
+        the data quality mask and fill the missing data with
         an estimate flux found by performing a linear interpolation with time,
-        using the good flux values immediately surrounding the data gap.
+        using the good flux values immediately surrounding the data gap:
+        
+        F(t) = F1 + (t - t1)*(F2 - F1)/(t2 - t1)
+        
+        Bad points at the start of the time period are filled with the first
+        good value and bad points at the end of the time period are filled
+        with the last good value.
+        
+        The points are filled for each energy channel at once and a summary
+        of the data gaps is printed for each channel.
         
         INPUTS:
         
-        :dates: (datetime 1xp array) dates for p time points within
+        :dates: (datetime64 1xp array) dates for p time points within
             the date range specified by startdate and enddate
         :fluxes: (float nxp array) flux time profiles for n energy channels
             and p time points
         :energy_bins: (float nx2 array) energy bins associated with fluxes
         :dointerp: (bool) Set True to perform linear interpolation in time,
             otherwise will fill bad data points with None values
+        :return_gaps: (bool) Set True to also return the gap summary
+        :quality: (uint8 nxp array) data quality flags from make_quality_mask.
+            Made from fluxes if not specified. Points that are filled in
+            are marked with quality_interp.
             
         OUTPUT:
         
-        :fluxes: (float 1xp array) flux time profile with any negative
+        :fluxes: (float nxp array) flux time profiles with any negative
             flux values replaced with linear interpolated of None values
+        :gaps: (list of n dicts) only if return_gaps is True; count and
+            spans of bad points for each energy channel (see find_data_gaps)
        
     """
     if dointerp:
@@ -2408,48 +3696,47 @@ def check_for_bad_data(dates,fluxes,energy_bins,dointerp=True):
     else:
         print('Checking for bad data values and filling with None values. ')
 
-    ndates = len(dates)
+    dates = to_datetime64(dates)
     nbins = len(energy_bins)
+    values = np.asarray(fluxes[:nbins], dtype=float)
+    if quality is None:
+        quality = make_quality_mask(values)
+    bad = ~usable_data(values, quality[:nbins])
+    gaps = find_data_gaps(dates,bad)
+    if dointerp and bad.any():
+        seconds = to_seconds(dates - dates[0])
+
+    for i in range(nbins):
+        if gaps[i]["count"] == 0:
+            continue
+        print('There are ' + str(gaps[i]["count"]) + ' bad data points in '
+            + str(len(gaps[i]["spans"])) + ' data gaps for energy bin '
+            + str(energy_bins[i][0]) + ' - ' + str(energy_bins[i][1]) + ':')
+        for first_date, last_date in gaps[i]["spans"]:
+            print('    ' + str(first_date) + ' to ' + str(last_date))
+
+        if not dointerp:
+            print('Filling in missing values with None ')
+            fluxes[i,bad[i]] = None #results in NaN value in np array
+            continue
+
+        good = ~bad[i]
+        if not good.any():
+            sys.exit('check_for_bad_data: There are no good flux values for '
+                    'energy bin ' + str(energy_bins[i][0]) + ' - '
+                    + str(energy_bins[i][1]) + '. Program cannot estimate '
+                    'flux in data gap.')
+        print('Filling in missing values with linear interpolation in time.')
+        #np.interp holds the first and last good values constant
+        #across gaps at the start and end of the time period
+        fluxes[i,bad[i]] = np.interp(seconds[bad[i]], seconds[good],
+                                    values[i,good])
+        quality[i,bad[i]] |= quality_interp
 
-    for j in range(ndates):  #flux at each time
-        for i in range(nbins):
-            if fluxes[i,j] == None: #bad data
-                #estimate flux with interpolation in time
-                if dointerp:
-                    print('There is a data gap for time ' + str(dates[j])
-                            + ' and energy bin ' + str(energy_bins[i][0]) + ' - '
-                            + str(energy_bins[i][1]) + '.'
-                            + ' Filling in missing value with linear '
-                            + 'interpolation in time.')
-                    interp_flux = do_interpolation(j,dates,fluxes[i,:])
-                    fluxes[i,j] = interp_flux
-                else:
-                    print('There is a data gap for time ' + str(dates[j])
-                            + ' and energy bin ' + str(energy_bins[i][0]) + ' - '
-                            + str(energy_bins[i][1]) + '.'
-                            + ' Filling in missing value with None ')
-                    fluxes[i,j] = None
-
-            elif fluxes[i,j] < 0:
-                #estimate flux with interpolation in time
-                if dointerp:
-                    print('There is a data gap for time ' + str(dates[j])
-                            + ' and energy bin ' + str(energy_bins[i][0]) + ' - '
-                            + str(energy_bins[i][1]) + '.'
-                            + ' Filling in missing value with linear '
-                            + 'interpolation in time.')
-                    interp_flux = do_interpolation(j,dates,fluxes[i,:])
-                    fluxes[i,j] = interp_flux
-                else:
-                    print('There is a data gap for time ' + str(dates[j])
-                            + ' and energy bin ' + str(energy_bins[i][0]) + ' - '
-                            + str(energy_bins[i][1]) + '.'
-                            + ' Filling in missing value with None ')
-                    fluxes[i,j] = None #results in NaN value in np array
-
-    
     print('Finished checking for bad data.')
     print()
+    if return_gaps:
+        return fluxes, gaps
     return fluxes
 
 
@@ -2467,8 +3754,8 @@ def define_energy_bins(experiment,flux_type,west_detector,options):
         
         :experiment: (string) name of experiment or "user"
         :flux_type: (string) integral or differential
-        :west_detector: (string 1xp array) array indicating which GOES detector
-            is facing westward for each time point
+        :west_detector: (int 1xp array) code indicating which GOES detector
+            is facing westward for each time point (west_A, west_B, etc)
         :options: (string array) possible options to apply to data (GOES)
         
         OUTPUTS:
@@ -2562,8 +3849,10 @@ def define_energy_bins(experiment,flux_type,west_detector,options):
                            [700.0,-1]]
             if "Bruno2017" in options:
                 #EPEAD CHANNELS P6 and P7
+                nwestA = np.count_nonzero(np.asarray(west_detector) == west_A)
+                nwestB = np.count_nonzero(np.asarray(west_detector) == west_B)
                 if "uncorrected" in options:
-                    if west_detector.count("A") >= west_detector.count("B"):
+                    if nwestA >= nwestB:
                         #A detector bins
                         if experiment == "GOES-13":
                             energy_bins[4] = [93.3,129.0]
@@ -2571,7 +3860,7 @@ def define_energy_bins(experiment,flux_type,west_detector,options):
                         if experiment == "GOES-15":
                             energy_bins[4] = [97.5,134.8]
                             energy_bins[5] = [142.2,199.0]
-                    if west_detector.count("B") > west_detector.count("A"):
+                    if nwestB > nwestA:
                         #B detector bins
                         if experiment == "GOES-13":
                             energy_bins[4] = [92.3,127.5]
@@ -2580,7 +3869,7 @@ def define_energy_bins(experiment,flux_type,west_detector,options):
                             energy_bins[4] = [95.9,132.3]
                             energy_bins[5] = [144.6,202.3]
                 if "corrected" in options or "uncorrected" not in options: #Z89 applied
-                    if west_detector.count("A") >= west_detector.count("B"):
+                    if nwestA >= nwestB:
                         #A detector bins
                         if experiment == "GOES-13":
                             energy_bins[4] = [93.3,129.1]
@@ -2588,7 +3877,7 @@ def define_energy_bins(experiment,flux_type,west_detector,options):
                         if experiment == "GOES-15":
                             energy_bins[4] = [97.9,135.3]
                             energy_bins[5] = [145.0,202.3]
-                    if west_detector.count("B") > west_detector.count("A"):
+                    if nwestB > nwestA:
                         #B detector bins
                         if experiment == "GOES-13":
                             energy_bins[4] = [92.4,127.8]
@@ -1,4 +1,5 @@
 from library import read_datasets as datasets
+from library import data_store as store
 from library import global_vars as vars
 from library import ccmc_json_handler as ccmc_json
 from library import derive_background as bgsub
@@ -24,10 +25,9 @@ import array as arr
 import pandas as pd
 import scipy
 from scipy import signal
-from statistics import mode
 from lmfit import minimize, Parameters
 
-__version__ = "3.13"
+__version__ = "3.25"
 __author__ = "Katie Whitman"
 __maintainer__ = "Katie Whitman"
 __email__ = "kathryn.whitman@nasa.gov"
@@ -291,6 +291,44 @@ __email__ = "kathryn.whitman@nasa.gov"
 #   read_datasets.py v1.3. Added STEREO-A and -B to list of allowed instruments.
 #2023-06-19, changes in v3.13: Updated fluence plot in run_all to have the
 #   correct units.
+#2026-10-17, changes in v3.14: read_in_flux_files reads the data through
+#   data_store.read_in_data, which takes the fluxes for native data sets
+#   from a memory-mapped full-mission store when available.
+#2026-10-17, changes in v3.15: The time axis is carried through the
+#   calculations as a numpy datetime64 array. Event times are still
+#   datetime and dates are converted to datetime when written to file.
+#2026-10-17, changes in v3.16: read_in_flux_files returns a data quality
+#   mask with the fluxes. It is used in place of checking for None, badval
+#   and NaN values in calculate_fluence and from_differential_to_integral_flux.
+#2026-10-17, changes in v3.17: determine_time_resolution uses
+#   datasets.find_time_resolution, which saves the result for each time axis.
+#2026-10-17, changes in v3.18: from_differential_to_integral_flux
+#   integrates the power law between bin centers analytically for all time
+#   steps at once (integrate_power_law) instead of calling scipy quad for
+#   every bin pair and time step.
+#2026-10-17, changes in v3.19: Added from_differential_to_integral_fluxes,
+#   which makes the integral fluxes for all of the energy thresholds
+#   together. extract_integral_fluxes fills a single array.
+#2026-10-17, changes in v3.20: Added calculate_threshold_crossings, which
+#   finds the event start and end for all thresholds at once from runs of
+#   points above and below threshold. calculate_event_info uses it.
+#2026-10-17, changes in v3.21: Added find_all_threshold_crossings, which
+#   finds every event for each threshold in a long time series. Used by
+#   sep_catalog.py to make event lists for a whole mission.
+#2026-10-17, changes in v3.22: The runs above and below threshold are found
+#   once by find_threshold_runs. calculate_event_info finds the later event
+#   for DetectPreviousEvent and TwoPeaks from the same runs, starting at the
+#   index of the first event's end time, instead of copying the remaining
+#   dates and fluxes and recalculating.
+#2026-10-17, changes in v3.23: calculate_umasep_info finds the delayed
+#   times for all thresholds with one sorted search and averages 10 minutes
+#   of data at any time resolution. A delayed time after the end of the time
+#   range no longer exits; the flux is set to None and an insufficient_data
+#   flag is returned for the threshold.
+#2026-10-17, changes in v3.24: The UMASEP insufficient_data flag is written
+#   to the sep_values csv file (UMASEP Insufficient Data column).
+#2026-10-17, changes in v3.25: find_all_threshold_crossings finds each
+#   event with find_event instead of its own copy of the event rules.
 ########################################################################
 
 #See full program description in all_program_info() below
@@ -708,18 +746,88 @@ def all_program_info(): #only for documentation purposes
     """
 
 
+def integrate_power_law(flux, energy, slope, start_energy, end_energy):
+    """ Integrate the power law F(E) = flux*(E/energy)**slope between
+        start_energy and end_energy analytically. Works on arrays element
+        by element.
+        
+        The integral is flux*energy*(x2**(slope+1) - x1**(slope+1))/(slope+1)
+        with x = E/energy, or flux*energy*ln(end_energy/start_energy) for
+        a slope of -1. It is written with expm1 so that slopes close to -1
+        are accurate.
+        
+        INPUTS:
+        
+        :flux: (float array) - flux at energy
+        :energy: (float array) - energy where flux is known
+        :slope: (float array) - power law index in log-log space
+        :start_energy: (float array) - bottom of integral
+        :end_energy: (float array) - top of integral
+        
+        OUTPUTS:
+        
+        :fint: (float array) - integral of the power law
+        
+    """
+    index = slope + 1.
+    log_start = np.log(start_energy/energy)
+    log_range = np.log(end_energy/start_energy)
+    #expm1(index*log_range)/index goes to log_range for a slope of -1
+    flat = index == 0
+    safe_index = np.where(flat, 1., index)
+    ratio = np.where(flat, log_range, np.expm1(safe_index*log_range)/safe_index)
+    return flux*energy*np.exp(index*log_start)*ratio
+
+
 def from_differential_to_integral_flux(experiment, min_energy, energy_bins,
-                fluxes, options, doBGSub):
+                fluxes, options, doBGSub, quality=None):
+    """ If user selected differential fluxes, convert to integral fluxes to
+        caluculate operational threshold crossings (>10 MeV protons exceed 10
+        pfu, >100 MeV protons exceed 1 pfu).
+        Calculates a single integral flux with
+        from_differential_to_integral_fluxes.
+       
+        INPUTS:
+        
+        :experiment: (string)
+        :min_energy: (float) - bottom energy for integral flux calculation
+        :energy_bins: (float 1xn array) - bins for each energy channel
+        :fluxes: (float nxm array) - fluxes with time for each energy channel
+        :options: (string array) - effective energies for GOES channels
+        :quality: (uint8 nxm array) - data quality flags for fluxes from
+            check_for_bad_data; made from fluxes if not specified
+        
+        OUTPUTS:
+        
+        :integral_fluxes: (float 1xm array) - estimate integral flux for >min_energy
+            (Returns all zero values if no energy bins above min_energy)
+            
+    """
+    integral_fluxes = from_differential_to_integral_fluxes(experiment,
+                        [min_energy], energy_bins, fluxes, options, doBGSub,
+                        quality)
+    return integral_fluxes[0]
+
+
+def from_differential_to_integral_fluxes(experiment, min_energies,
+                energy_bins, fluxes, options, doBGSub, quality=None):
     """ If user selected differential fluxes, convert to integral fluxes to
         caluculate operational threshold crossings (>10 MeV protons exceed 10
         pfu, >100 MeV protons exceed 1 pfu).
         Assume that the measured fluxes correspond to the center of the energy
         bin and use power law interpolation to extrapolate integral fluxes
-        above user input min_energy.
+        above user input min_energy. The power law between each pair of
+        bin centers is integrated analytically (integrate_power_law) for
+        all time steps at once.
         The intent is to calculate >10 MeV and >100 MeV fluxes, but leaving
         flexibility for user to define the minimum energy for the integral flux.
         An integral flux will be provided for each timestamp (e.g. every 5 mins).
         
+        The integral fluxes for all of the minimum energies are made together.
+        The integral between two bin centers above a minimum energy is the
+        same for every minimum energy, so it is calculated once. Only the
+        pairs of bins that contain a minimum energy are integrated again.
+        
         Note that if bad values were not interpolated in previous steps,
         they will have been set to None in check_for_bad_data, which translated
         to NaN in numpy arrays.
@@ -727,29 +835,42 @@ def from_differential_to_integral_flux(experiment, min_energy, energy_bins,
         INPUTS:
         
         :experiment: (string)
-        :min_energy: (float) - bottom energy for integral flux calculation
+        :min_energies: (float 1xp array) - bottom energies for integral flux
+            calculation
         :energy_bins: (float 1xn array) - bins for each energy channel
         :fluxes: (float nxm array) - fluxes with time for each energy channel
         :options: (string array) - effective energies for GOES channels
+        :quality: (uint8 nxm array) - data quality flags for fluxes from
+            check_for_bad_data; made from fluxes if not specified
         
         OUTPUTS:
         
-        :integral_fluxes: (float 1xm array) - estimate integral flux for >min_energy
-            (Returns all zero values if no energy bins above min_energy)
+        :integral_fluxes: (float pxm array) - estimate integral flux for
+            >min_energies[k] in row k (all zero values if no energy bins
+            above min_energies[k])
             
     """
-    print('Converting differential flux to integral flux for >'
-            + str(min_energy) + 'MeV.')
     nbins = len(energy_bins)
     nflux = len(fluxes[0])
+    nthresh = len(min_energies)
+    integral_fluxes = np.zeros((nthresh, nflux))
+
     #Check requested min_energy inside data energy range
-    if min_energy < energy_bins[0][0] or min_energy >= energy_bins[nbins-1][0]:
-        print('The selected minimum energy ' + str(min_energy) + ' to create'
-                ' integral fluxes is outside of the range of the data: '
-                + str(energy_bins[0][0]) + ' - '
-                + str(max(energy_bins[nbins-1][0],energy_bins[nbins-1][1])))
-        print('Setting all >'+ str(min_energy) + ' fluxes to zero.')
-        integral_fluxes = [0]*nflux
+    in_range = []
+    for k in range(nthresh):
+        min_energy = min_energies[k]
+        print('Converting differential flux to integral flux for >'
+                + str(min_energy) + 'MeV.')
+        if min_energy < energy_bins[0][0] \
+            or min_energy >= energy_bins[nbins-1][0]:
+            print('The selected minimum energy ' + str(min_energy) + ' to create'
+                    ' integral fluxes is outside of the range of the data: '
+                    + str(energy_bins[0][0]) + ' - '
+                    + str(max(energy_bins[nbins-1][0],energy_bins[nbins-1][1])))
+            print('Setting all >'+ str(min_energy) + ' fluxes to zero.')
+        else:
+            in_range.append(k)
+    if not in_range:
         return integral_fluxes
 
     #Calculate bin center in log space for each energy bin
@@ -777,6 +898,8 @@ def from_differential_to_integral_flux(experiment, min_energy, energy_bins,
                     'include 110 - 900 MeV. if not please comment out this '
                     'section in from_differential_to_integral_flux.')
         fluxes = np.delete(fluxes,remove_bin,0)
+        if quality is not None:
+            quality = np.delete(quality,remove_bin,0)
         energy_bins = np.delete(energy_bins,remove_bin,0)
         bin_center = np.delete(bin_center,remove_bin,0)
         nbins = nbins-1
@@ -789,131 +912,96 @@ def from_differential_to_integral_flux(experiment, min_energy, energy_bins,
     #integral channel. This happens for HEPAD. If the integral channel is the
     #last channel, then the flux will be added. If it is a middle bin, it will
     #be skipped.
-    integral_fluxes = []
-    integral_fluxes_check = []
-    for j in range(nflux):  #flux at each time
-        sum_flux = 0
-        ninc = 0 #number of energy bins included in integral flux estimate
-        for i in range(nbins-1):
-            if bin_center[i+1] < min_energy:
-                continue
-            else:
-                if energy_bins[i][1] == -1 or energy_bins[i+1][1] == -1:
-                    #bin is already an integral flux, e.g. last HEPAD bin
-                    continue
-                if math.isnan(fluxes[i,j]) or math.isnan(fluxes[i+1,j]): #data gap
-                    continue
-                
-                if fluxes[i,j] < 0 or fluxes[i+1,j] < 0: #bad data
-                    sys.exit('from_differential_to_integral_flux: '
-                            + 'Bad flux data value of ' + str(fluxes[i,j])
-                            + ' and ' + str(fluxes[i+1,j]) +
-                            ' found for bin ' + str(i) + ','
-                            + str(j) + '. This should not happen. '
-                            + 'Did you call check_for_bad_data() first?')
-
-
-                if fluxes[i,j] == 0 or fluxes[i+1,j] == 0: #add 0 flux
-                    ninc = ninc + 1
-                    continue
-
-                F1 = fluxes[i,j]
-                F2 = fluxes[i+1,j]
-                if F1 == 0 or F1 == None or math.isnan(F1):
-                    sys.exit('from_differential_to_integral_flux: found bin '
-                            'flux of ' + str(fluxes[i,j])
-                            + '. Should not happen here, bin [i,j] ['
-                            + str(i) + ',' + str(j) + '].' )
+    #All of the time steps are integrated at once. Row k of the arrays
+    #below is the pair of bins pairs[k] and pairs[k]+1.
+    fluxes = np.asarray(fluxes, dtype=float)
+    energy_bins = np.asarray(energy_bins, dtype=float)
+    bin_center = np.asarray(bin_center, dtype=float)
+    is_integral = energy_bins[:,1] == -1
+    pairs = np.flatnonzero(~is_integral[:-1] & ~is_integral[1:])
+    F1 = fluxes[pairs]
+    F2 = fluxes[pairs+1]
+    negative = (F1 < 0) | (F2 < 0) #bad data
+
+    #Data gaps are skipped; 0 flux is included with an integral of 0
+    usable = datasets.usable_data(fluxes, quality)
+    included = usable[pairs] & usable[pairs+1]
+    nonzero = included & (F1 != 0) & (F2 != 0)
+
+    E1 = bin_center[pairs,np.newaxis]
+    E2 = bin_center[pairs+1,np.newaxis]
+    endE = E2.copy()
+    endE[pairs+1 == nbins-1] = energy_bins[nbins-1][1] #extend to edge of last bin
+
+    F1 = np.where(nonzero, F1, 1.)
+    F2 = np.where(nonzero, F2, 1.)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.log(F2/F1)/np.log(E2/E1)
+
+    def integrate_pairs(use, startE):
+        #Integral from startE to the end of each pair of bins in use
+        with np.errstate(divide='ignore', invalid='ignore', over='ignore'):
+            fint = integrate_power_law(F1[use], E1[use], slope[use],
+                            startE, endE[use])
+        fint = np.where(nonzero[use], fint, 0.)
+        nnan = np.count_nonzero(np.isnan(fint))
+        if nnan > 0:
+            print("from_differential_to_integral_flux: flux integral "
+                "across bins is NaN for " + str(nnan) + " bins and time "
+                "steps. Setting to zero.")
+            fint[np.isnan(fint)] = 0
+        fint[fint < 1e-10] = 0
+        return fint
+
+    #Integral across the whole of each pair of bins
+    whole = integrate_pairs(slice(None), E1)
+
+    for k in in_range:
+        min_energy = min_energies[k]
+        use = bin_center[pairs+1] >= min_energy
+        if negative[use].any():
+            j, m = np.argwhere(negative[use].T)[0]
+            i = pairs[use][m]
+            sys.exit('from_differential_to_integral_flux: '
+                    + 'Bad flux data value of ' + str(fluxes[i,j])
+                    + ' and ' + str(fluxes[i+1,j]) +
+                    ' found for bin ' + str(i) + ','
+                    + str(j) + '. This should not happen. '
+                    + 'Did you call check_for_bad_data() first?')
 
-                if F2 == 0 or F2 == None or math.isnan(F2):
-                    sys.exit('from_differential_to_integral_flux: found bin '
-                            'flux of '  + str(fluxes[i+1,j])
-                            + '. Should not happen here, bin [i+1,j] '
-                            '['+ str(i+1) + ',' + str(j) + '].' )
-
-                
-                #FOR GOES differential corrected fluxes, subtract a
-                #static value as background before estimating integral
-                #####Leaving this piece of code in as a comment because it
-                #points to the problem of high background levels in the
-                #corrected GOES differential fluxes. Added this piece of
-                #code when wanted to compare to another experiment or perhaps
-                #the integral 
-                #   330 - 420 MeV: 0.001804912
-                #   420 - 510 MeV: 0.001014797
-                #   510 - 700 MeV: 0.000431988
-                #   >700 MeV:      0.00013735
-#                if 'GOES' in experiment and 'uncorrected' not in options\
-#                    and not doBGSub:
-#                    if energy_bins[i][0] == 330.0 and energy_bins[i][1] == 420.0:
-#                        F1 = F1 - 0.001804912
-#                        if F1 < 0: F1 = 0
-#                    if energy_bins[i+1][0] == 330.0 and energy_bins[i+1][1] == 420.0:
-#                        F2 = F2 - 0.001804912
-#                        if F2 < 0: F2 = 0
-#
-#                    if energy_bins[i][0] == 420.0 and energy_bins[i][1] == 510.0:
-#                        F1 = F1 - 0.001014797
-#                        if F1 < 0: F1 = 0
-#                    if energy_bins[i+1][0] == 420.0 and energy_bins[i+1][1] == 510.0:
-#                        F2 = F2 - 0.001014797
-#                        if F2 < 0: F2 = 0
-#
-#                    if energy_bins[i][0] == 510.0 and energy_bins[i][1] == 700.0:
-#                        F1 = F1 - 0.000431988
-#                        if F1 < 0: F1 = 0
-#                    if energy_bins[i+1][0] == 510.0 and energy_bins[i+1][1] == 700.0:
-#                        F2 = F2 - 0.000431988
-#                        if F2 < 0: F2 = 0
-#
-#                if F1 == 0 or F2 == 0: #add 0 flux
-#                    ninc = ninc + 1
-#                    continue
-                 
-                logF1 = np.log(F1)
-                logF2 = np.log(F2)
-                logE1 = np.log(bin_center[i])
-                logE2 = np.log(bin_center[i+1])
-                endE = bin_center[i+1]
-                if i+1 == nbins-1:
-                    endE = energy_bins[nbins-1][1] #extend to edge of last bin
-
-                f = lambda x:exp(logF1
-                            + (np.log(x)-logE1)*(logF2-logF1)/(logE2-logE1))
-                startE = max(bin_center[i],min_energy)
-                fint = scipy.integrate.quad(f,startE,endE)
-                if math.isnan(fint[0]):
-                    print("from_differential_to_integral_flux: flux integral"
-                        "across bins is NaN. Setting to zero. Bin values are "
-                        + str(F1) + ' and ' + str(F2))
-                    fint = [0]
-                if fint[0] < 1e-10:
-                    fint = [0]
-                sum_flux = sum_flux + fint[0]
-                ninc = ninc + 1
+        #Pairs of bins that contain min_energy start at min_energy
+        fint = whole[use]
+        part = E1[use,0] < min_energy
+        if part.any():
+            part_pairs = np.flatnonzero(use)[part]
+            fint[part] = integrate_pairs(part_pairs, min_energy)
+        integral_fluxes[k] = np.sum(fint, axis=0)
+        ninc = np.count_nonzero(included[use], axis=0)
 
         #if last bin is integral, add (HEPAD)
-        if energy_bins[nbins-1][1] == -1 and fluxes[nbins-1,j] >= 0:
-            intflx = fluxes[nbins-1,j]
+        if energy_bins[nbins-1][1] == -1:
+            intflx = fluxes[nbins-1]
+            has_flux = intflx >= 0
+            #The background subtraction for >700 MeV has always tested the
+            #second to last bin, so it is not applied to the last bin
             if 'GOES' in experiment and 'uncorrected' not in options\
                 and not doBGSub:
-                if energy_bins[i][0] == 700.0 and energy_bins[i][1] == -1:
-                        intflx = intflx - 0.00013735
-                        if intflx < 0: intflx = 0
-            
-            sum_flux = sum_flux + intflx
-            ninc = ninc + 1
+                if energy_bins[nbins-2][0] == 700.0 \
+                    and energy_bins[nbins-2][1] == -1:
+                    intflx = np.maximum(intflx - 0.00013735, 0)
 
-        if ninc == 0:
-            sum_flux = -1
-        integral_fluxes.append(sum_flux)
+            integral_fluxes[k] = integral_fluxes[k] \
+                                + np.where(has_flux, intflx, 0)
+            ninc = ninc + has_flux
+
+        integral_fluxes[k,ninc == 0] = -1
 
     return integral_fluxes
 
 
 
 def extract_integral_fluxes(fluxes, experiment, flux_type, flux_thresholds,
-            energy_thresholds, energy_bins, options, doBGSub):
+            energy_thresholds, energy_bins, options, doBGSub, quality=None):
     """ Select or create the integral fluxes that correspond to the desired
         energy thresholds.
         If the user selected differential fluxes, then the
@@ -938,6 +1026,7 @@ def extract_integral_fluxes(fluxes, experiment, flux_type, flux_thresholds,
         :energy_bins: (float 1xn array) - bins for each energy channel in fluxes
         :options: (string array) - bg subtraction, effective energies for
             GOES channels
+        :quality: (uint8 nxm array) - data quality flags for fluxes
             
         OUTPUTS:
         
@@ -949,43 +1038,28 @@ def extract_integral_fluxes(fluxes, experiment, flux_type, flux_thresholds,
     nenergy = len(energy_bins)
 
     #Calculate integral fluxes corresponding the the energy_thresholds
-    integral_fluxes = []
     if flux_type == "differential":
-        for i in range(nthresh):
-            integral_flux = from_differential_to_integral_flux(experiment, \
-                            energy_thresholds[i], energy_bins, fluxes, options, doBGSub)
-            if i == 0:
-                integral_fluxes = [np.array(integral_flux)]
-            else:
-                integral_fluxes = np.concatenate((integral_fluxes,
-                                        [np.array(integral_flux)]))
+        integral_fluxes = from_differential_to_integral_fluxes(experiment,
+                            energy_thresholds, energy_bins, fluxes, options,
+                            doBGSub, quality)
     if flux_type == "integral":
-        for i in range(nthresh):
-            found_thresh = False
-            for j in range(nenergy):
-                if energy_bins[j][0] == energy_thresholds[i]:
-                    found_thresh = True
-                    if len(integral_fluxes) == 0:
-                        integral_fluxes = [np.array(fluxes[j,:])]
-                    else:
-                        integral_fluxes = np.concatenate((integral_fluxes,
-                                                [np.array(fluxes[j,:])]))
-            #if the energy channel is not present in the input fluxes
-            if not found_thresh:
-                print("Didn't find energy threshold for " \
-                + str(energy_thresholds[i]) + ", " + str(flux_thresholds[i]))
-                if len(integral_fluxes) == 0:
-                    integral_fluxes = [np.array([-999]*len(fluxes[0,:]))]
-                else:
-                    integral_fluxes = np.concatenate((integral_fluxes,
-                                        [np.array([-999]*len(fluxes[0,:]))]))
-
-        if len(integral_fluxes) == 0:
+        if nthresh == 0:
             sys.exit("There were no integral fluxes with the requested energy "
                     "thresholds. Exiting.")
-        if len(integral_fluxes) != len(energy_thresholds):
-            sys.exit("Integral fluxes do not exist for some of the energy "
+        integral_fluxes = np.zeros((nthresh, len(fluxes[0])))
+        for i in range(nthresh):
+            found = [j for j in range(nenergy)
+                    if energy_bins[j][0] == energy_thresholds[i]]
+            if len(found) > 1:
+                sys.exit("Integral fluxes do not exist for some of the energy "
                     "thresholds. Exiting.")
+            if found:
+                integral_fluxes[i] = fluxes[found[0],:]
+            else:
+                #if the energy channel is not present in the input fluxes
+                print("Didn't find energy threshold for " \
+                + str(energy_thresholds[i]) + ", " + str(flux_thresholds[i]))
+                integral_fluxes[i] = -999
 
     return integral_fluxes
 
@@ -1028,7 +1102,7 @@ def calculate_threshold_crossing(energy_threshold,flux_threshold,dates,fluxes):
         :energy_threshold: (float) - energy channel for which the
             flux threshold value should be applied
         :flux_threshold: (float) - flux threshold value
-        :dates: (datetime 1xn array) - dates associated with the flux time profile
+        :dates: (datetime64 1xn array) - dates associated with the flux time profile
         :fluxes: (float 1xn array) - flux with time for the single energy channel
                 associated with energy_threshold
         
@@ -1046,67 +1120,298 @@ def calculate_threshold_crossing(energy_threshold,flux_threshold,dates,fluxes):
     #energy_threshold, e.g. 10 MeV --> integral flux for >10 MeV protons
     #dates contain all of the datetimes for each data point
     #fluxes are a 1D array of integral fluxes (not multiple energy channels)
-    print('Calculating threshold crossings and SEP event characteristics.')
-
+    crossing_time,peak_flux,peak_time,rise_time,event_end_time,duration = \
+        calculate_threshold_crossings([energy_threshold], [flux_threshold],
+                    dates, [fluxes])
+
+    return crossing_time[0],peak_flux[0],peak_time[0],rise_time[0],\
+        event_end_time[0],duration[0]
+
+
+def find_threshold_runs(flux_thresholds, dates, fluxes):
+    """ Find the runs of points above and below threshold that define the
+        start and end of SEP events for several thresholds at once.
+        
+        The event starts at the first point of the first npoints (3)
+        consecutive points at or above threshold and ends at the first point
+        of npoints points at or below endfac*threshold. A point above
+        endfac*threshold starts the count over and NaN values don't
+        change the count. Only a single point is needed if the time resolution
+        is longer than 15 minutes.
+        The runs of points are found with cumulative sums over the whole
+        (threshold, time) array, rather than stepping through each time.
+        The count of points below endfac*threshold starts over at every point
+        above it, including the first point of any event (endfac <= 1), so
+        the same ends array can be used for every event in the time period.
+        
+        INPUTS:
+        
+        :flux_thresholds: (float 1xn array) - flux threshold values
+        :dates: (datetime64 1xm array) - dates associated with the flux time
+            profiles
+        :fluxes: (float nxm array) - flux time profile for each of the
+            energy channels to which the thresholds are applied
+        
+        OUTPUTS:
+        
+        :npoints: (int) - number of points required above or below threshold
+        :starts: (bool nxm array) - True at each time where an event can
+            start
+        :ends: (bool nxm array) - True at each time that completes npoints
+            points at or below endfac*threshold; an event that started
+            earlier ends npoints-1 points before
+        
+    """
+    dates = datasets.to_datetime64(dates)
     ndates = len(dates)
-    end_threshold = vars.endfac*flux_threshold
+    nthresh = len(flux_thresholds)
+    fluxes = np.asarray(fluxes, dtype=float).reshape(nthresh, ndates)
+    thresholds = np.asarray(flux_thresholds, dtype=float)[:,np.newaxis]
+    end_thresholds = vars.endfac*thresholds
                     #endfac = 0.85 used by SRAG operators;
                     #Can specify value in library/global_vars.py
 
-    threshold_crossed = False
-    event_ended = False
-    peak_flux = 0
-    peak_time = 0
-    crossing_time = 0 #define in case threshold not crossed
-    rise_time = 0 #define in case threshold not crossed
-    event_end_time = 0
-    duration = 0
     npoints = 3 #require 3 points above threshold
     tdiff = determine_time_resolution(dates)
     tdiff = tdiff.total_seconds()/(60) #time resolution of data set
     if tdiff > 15:
         npoints = 1 #time resolution >15 mins, require one point above threshold
 
-    for i in range(ndates):
-        if not threshold_crossed:
-            if(fluxes[i] >= flux_threshold):
-                start_counter = 0
-                if i+(npoints-1) < ndates:
-                    for ii in range(npoints):
-                        if fluxes[i+ii] >= flux_threshold:
-                            start_counter = start_counter + 1
-                if start_counter == npoints:
-                    crossing_time = dates[i]
-                    threshold_crossed = True
-        if threshold_crossed and not event_ended:
-            if (fluxes[i] >= end_threshold):
-                end_counter = 0  #reset if go back above threshold
-            if (fluxes[i] <= end_threshold): #flux drops below 85% threshold
-                end_counter = end_counter + 1
-                if end_counter == npoints: #N consecutive points triggers end
-                    event_ended = True
-                    event_end_time = dates[i-(npoints-1)] #correct back time steps
-
-    #In case that date range ended before fell before threshold,
-    #use the last time in the file
-    if crossing_time != 0 and event_end_time == 0:
-        event_end_time = dates[ndates-1]
+    #Number of points at or above threshold in the npoints starting at
+    #each time; an event can start where all are above
+    above = np.cumsum(fluxes >= thresholds, axis=1)
+    above = np.concatenate((np.zeros((nthresh,1),dtype=int), above), axis=1)
+    nstart = max(ndates - npoints + 1, 0)
+    starts = np.zeros((nthresh,ndates), dtype=bool)
+    starts[:,:nstart] = above[:,npoints:npoints+nstart] - above[:,:nstart] \
+                        == npoints
+
+    #The end count starts over at each point at or above end_threshold
+    #(a point equal to end_threshold counts as the first point below) and
+    #goes up by one for each point at or below end_threshold
+    index = np.arange(ndates)
+    below = fluxes <= end_thresholds
+    last_reset = np.maximum.accumulate(np.where(fluxes >= end_thresholds,
+                        index, 0), axis=1)
+    nbelow = np.cumsum(below, axis=1)
+    before_reset = np.take_along_axis(nbelow - below, last_reset, axis=1)
+    ends = nbelow - before_reset >= npoints
+
+    return npoints, starts, ends
+
+
+def find_event(energy_threshold, flux_threshold, dates, flux, npoints,
+                starts, ends, first=0):
+    """ Find the first SEP event that starts at or after index first for
+        a single threshold, using the runs found by find_threshold_runs for
+        the whole time period. Gives the same results as
+        calculate_threshold_crossing for dates[first:] and flux[first:].
+        
+        If the time resolution of dates[first:] calls for a different number
+        of points above threshold than the whole time period, the event is
+        found with calculate_threshold_crossing instead.
+        
+        INPUTS:
+        
+        :energy_threshold: (float) - energy channel for which the
+            flux threshold value is applied
+        :flux_threshold: (float) - flux threshold value
+        :dates: (datetime64 1xm array) - dates for the whole time period
+        :flux: (float 1xm array) - flux time profile for the energy channel
+        :npoints: (int), :starts: (bool 1xm array), :ends: (bool 1xm array)
+            - runs for this threshold from find_threshold_runs
+        :first: (int) - index of the first time to consider
+        
+        OUTPUTS:
+        
+        :crossing_time: (datetime)
+        :peak_flux: (float) - maximum flux value between start and end time
+        :peak_time: (datetime)
+        :rise_time: (timedelta) - (peak_time - crossing_time)
+        :event_end_time: (datetime)
+        :duration: (timedelta) - (event_end_time - crossing_time)
+        
+    """
+    ndates = len(dates)
+    if first > 0:
+        tdiff = determine_time_resolution(dates[first:])
+        if (tdiff.total_seconds()/60 > 15) != (npoints == 1):
+            return calculate_threshold_crossing(energy_threshold,
+                        flux_threshold, dates[first:], flux[first:])
+
+    crossing_time = 0 #define in case threshold not crossed
+    peak_flux = 0
+    peak_time = 0
+    rise_time = 0 #define in case threshold not crossed
+    event_end_time = 0
+    duration = 0
+    if first >= ndates:
+        return crossing_time,peak_flux,peak_time,rise_time,event_end_time,\
+            duration
+    start = first + np.argmax(starts[first:])
+    if not starts[start]:
+        return crossing_time,peak_flux,peak_time,rise_time,event_end_time,\
+            duration
+
+    crossing_time = datasets.to_datetime(dates[start])
+    end = start + np.argmax(ends[start:])
+    if ends[end]:
+        end = end - (npoints-1) #correct back time steps
+        event_end_time = datasets.to_datetime(dates[end])
+    else:
+        #In case that date range ended before fell before threshold,
+        #use the last time in the file
+        event_end_time = datasets.to_datetime(dates[ndates-1])
         print("!!!!File ended before SEP event ended for >"
-            + str(energy_threshold) + ", " + str(flux_threshold) + " pfu! "
-            "Using the last time in the date range as the event end time. "
-            "Extend your date range to get an improved estimate of the event "
-            "end time and duration.")
-
-    if crossing_time != 0:
-        #Find peak flux within event start and stop time
-        for i in range(ndates):
-            if dates[i] >= crossing_time and dates[i] <= event_end_time:
-                if fluxes[i] > peak_flux:
-                    peak_flux = fluxes[i]
-                    peak_time = dates[i]
-        if peak_time != 0:
-            rise_time = peak_time - crossing_time
-            duration = event_end_time - crossing_time
+            + str(energy_threshold) + ", " + str(flux_threshold)
+            + " pfu! Using the last time in the date range as the event "
+            "end time. Extend your date range to get an improved estimate "
+            "of the event end time and duration.")
+
+    #Find peak flux within event start and stop time
+    nst = first + np.searchsorted(dates[first:],
+                    datasets.to_datetime64(crossing_time), side='left')
+    nend = first + np.searchsorted(dates[first:],
+                    datasets.to_datetime64(event_end_time), side='right')
+    event_fluxes = flux[nst:nend]
+    positive = event_fluxes > 0
+    if positive.any():
+        ipeak = np.argmax(np.where(positive, event_fluxes, -np.inf))
+        peak_flux = event_fluxes[ipeak]
+        peak_time = datasets.to_datetime(dates[nst+ipeak])
+        rise_time = peak_time - crossing_time
+        duration = event_end_time - crossing_time
+
+    return crossing_time,peak_flux,peak_time,rise_time,event_end_time,duration
+
+
+def calculate_threshold_crossings(energy_thresholds,flux_thresholds,dates,
+                fluxes):
+    """ Calculate the threshold crossing time, peak flux, peak time,
+        rise time, event end time and duration for several thresholds at
+        once. Gives the same results as calling calculate_threshold_crossing
+        for each threshold; see that subroutine for the definitions.
+        The runs of points above and below threshold are found for all
+        thresholds together by find_threshold_runs.
+        
+        INPUTS:
+        
+        :energy_thresholds: (float 1xn array) - energy channels for which the
+            flux threshold values should be applied
+        :flux_thresholds: (float 1xn array) - flux threshold values
+        :dates: (datetime64 1xm array) - dates associated with the flux time
+            profiles
+        :fluxes: (float nxm array) - flux time profile for each of the
+            energy channels in energy_thresholds
+        
+        OUTPUTS:
+        
+        :crossing_time: (datetime 1xn array)
+        :peak_flux: (float 1xn array) - maximum flux value between start and
+            end time
+        :peak_time: (datetime 1xn array)
+        :rise_time: (timedelta 1xn array) - (peak_time - crossing_time)
+        :event_end_time: (datetime 1xn array)
+        :duration: (timedelta 1xn array) - (event_end_time - crossing_time)
+        
+    """
+    print('Calculating threshold crossings and SEP event characteristics.')
+
+    dates = datasets.to_datetime64(dates)
+    nthresh = len(flux_thresholds)
+    fluxes = np.asarray(fluxes, dtype=float).reshape(nthresh, len(dates))
+    npoints, starts, ends = find_threshold_runs(flux_thresholds, dates,
+                                fluxes)
+
+    crossing_time = [0]*nthresh
+    peak_flux = [0]*nthresh
+    peak_time = [0]*nthresh
+    rise_time = [0]*nthresh
+    event_end_time = [0]*nthresh
+    duration = [0]*nthresh
+    for i in range(nthresh):
+        crossing_time[i],peak_flux[i],peak_time[i],rise_time[i],\
+            event_end_time[i],duration[i] = find_event(energy_thresholds[i],
+                flux_thresholds[i], dates, fluxes[i], npoints, starts[i],
+                ends[i])
+
+    return crossing_time,peak_flux,peak_time,rise_time,event_end_time,duration
+
+
+def find_all_threshold_crossings(energy_thresholds,flux_thresholds,dates,
+                fluxes):
+    """ Find every SEP event in a long time series, e.g. a whole mission,
+        for each threshold. Each event is found with find_event, so is
+        defined in the same way as in calculate_threshold_crossings. After
+        an event ends, the search for the next event starts at the point
+        after the event end time.
+        An event that is still above threshold at the end of the time series
+        is given the last time as its end time.
+
+        The runs of points above and below threshold are found for the whole
+        time series at once with find_threshold_runs.
+
+        INPUTS:
+
+        :energy_thresholds: (float 1xn array) - energy channels for which the
+            flux threshold values should be applied
+        :flux_thresholds: (float 1xn array) - flux threshold values
+        :dates: (datetime64 1xm array) - dates associated with the flux time
+            profiles
+        :fluxes: (float nxm array) - flux time profile for each of the
+            energy channels in energy_thresholds
+
+        OUTPUTS:
+
+        For each of the n thresholds, a list with an entry for each event:
+
+        :crossing_time: (datetime nxp list)
+        :peak_flux: (float nxp list) - maximum flux value between start and
+            end time
+        :peak_time: (datetime nxp list)
+        :rise_time: (timedelta nxp list) - (peak_time - crossing_time)
+        :event_end_time: (datetime nxp list)
+        :duration: (timedelta nxp list) - (event_end_time - crossing_time)
+
+    """
+    print('Finding all threshold crossings.')
+
+    dates = datasets.to_datetime64(dates)
+    ndates = len(dates)
+    nthresh = len(flux_thresholds)
+    fluxes = np.asarray(fluxes, dtype=float).reshape(nthresh, ndates)
+
+    crossing_time = [[] for i in range(nthresh)]
+    peak_flux = [[] for i in range(nthresh)]
+    peak_time = [[] for i in range(nthresh)]
+    rise_time = [[] for i in range(nthresh)]
+    event_end_time = [[] for i in range(nthresh)]
+    duration = [[] for i in range(nthresh)]
+
+    for i in range(nthresh):
+        #One threshold at a time to limit memory for a long time series
+        flux = fluxes[i]
+        npoints, starts, ends = find_threshold_runs([flux_thresholds[i]],
+                                    dates, flux)
+
+        first = 0
+        while True:
+            ct,pf,pt,rt,eet,dur = find_event(energy_thresholds[i],
+                        flux_thresholds[i], dates, flux, npoints, starts[0],
+                        ends[0], first)
+            if ct == 0: #no more events
+                break
+            crossing_time[i].append(ct)
+            peak_flux[i].append(pf)
+            peak_time[i].append(pt)
+            rise_time[i].append(rt)
+            event_end_time[i].append(eet)
+            duration[i].append(dur)
+            #Start looking for the next event after the end of this one
+            first = np.searchsorted(dates, datasets.to_datetime64(eet),
+                        side='right')
+            if first >= ndates - 1: #a single point can't be searched
+                break
 
     return crossing_time,peak_flux,peak_time,rise_time,event_end_time,duration
 
@@ -1198,24 +1503,19 @@ def determine_time_resolution(dates):
         
         INPUTS:
         
-        :dates: (datetime 1xm array) - dates associated with flux time profile
+        :dates: (datetime64 1xm array) - dates associated with flux time profile
         
         OUTPUTS:
         
         :time_resolution: (time delta object)
         
     """
-    ndates = len(dates)
-    time_diff = [a - b for a,b in zip(dates[1:ndates],dates[0:ndates-1])]
-    if not time_diff:
-        sys.exit("determine_time_resolution: Require more than 1 data point "
-                "to determine time resolution. Please extend your "
-                "requested time range and try again. Exiting.")
-    time_resolution = mode(time_diff)
+    #Saved for each time axis (see datasets.find_time_resolution)
+    time_resolution = datasets.find_time_resolution(dates)["time_resolution"]
     return time_resolution
 
 
-def calculate_fluence(dates, flux):
+def calculate_fluence(dates, flux, quality=None):
     """ This subroutine sums up all of the flux in the 1xn array "flux". The
         "dates" and "flux" arrays input here should reflect only the intensities
         between the SEP start and stop times, determined by the subroutine
@@ -1227,7 +1527,8 @@ def calculate_fluence(dates, flux):
         The flux will be multiplied by time_resolution and summed for all of the
         data between the start and end times. Negative or bad flux values
         should have been set to None or interpolated with check_bad_data().
-        None values will be skipped.
+        Points that are marked bad in the data quality mask and were not
+        interpolated are skipped.
         
         The time resolution is found by taking the difference between
         every consecutive data point. The most common difference is
@@ -1242,32 +1543,31 @@ def calculate_fluence(dates, flux):
         
         :flux: (float 1xn array) - intensity time series for a single energy bin
             or single integral channel (1D array).
-        :dates: (datetime 1xn array) - datetimes that correspond to the fluxes
+        :dates: (datetime64 1xn array) - datetimes that correspond to the fluxes
+        :quality: (uint8 1xn array) - data quality flags for flux from
+            check_for_bad_data; made from flux if not specified
         
         OUTPUTS:
         
         :fluence: (float) - sum of all the flux values in flux
         
     """
-    ndates = len(dates)
     time_resolution = determine_time_resolution(dates)
     
 #    print("calculate_fluence: Identified a time resolution of "
 #            + str(time_resolution.total_seconds()) + " seconds.")
     
-    fluence = 0
-    for i in range(ndates):
-        if flux[i] == None or flux[i] == badval or math.isnan(flux[i]):
-            continue
-
-        if flux[i] >= 0:  #0 flux ok for models
-                fluence = fluence + flux[i]*time_resolution.total_seconds()
-        else:
-            sys.exit('calculate_fluence: Bad flux data value of ' + str(flux[i]) +
-                    ' found for bin ' + str(i) + ', '
-                    + str(dates[i]) + '. This should not happen. '
-                    + 'Did you call check_for_bad_data() first?')
-                    
+    flux = np.asarray(flux, dtype=float)
+    negative = np.flatnonzero((flux < 0) & (flux != badval))
+    if len(negative) > 0:
+        i = negative[0]
+        sys.exit('calculate_fluence: Bad flux data value of ' + str(flux[i]) +
+                ' found for bin ' + str(i) + ', '
+                + str(datasets.to_datetime(dates[i])) + '. This should not happen. '
+                + 'Did you call check_for_bad_data() first?')
+
+    usable = datasets.usable_data(flux, quality) #0 flux ok for models
+    fluence = np.sum(flux[usable])*time_resolution.total_seconds()
     fluence = fluence*4.0*math.pi #multiply 4pi steradians
     return fluence
 
@@ -1275,7 +1575,7 @@ def calculate_fluence(dates, flux):
 def get_fluence_spectrum(experiment, flux_type, options, doBGSub,
                 model_name, energy_threshold,
                 flux_threshold, sep_dates, sep_fluxes, energy_bins,
-                diff_thresh, save_file):
+                diff_thresh, save_file, sep_quality=None):
     """ Calculate the fluence spectrum for each of the energy channels in the
         user selected data set. If the user selected differential fluxes, then
         the fluence values correspond to each energy bin. If the user selected
@@ -1294,7 +1594,7 @@ def get_fluence_spectrum(experiment, flux_type, options, doBGSub,
         :energy_threshold: (float) - energy channel to which the
             flux threshold value is applied
         :flux_threshold: (float) - flux threshold value
-        :sep_dates: (datetime 1xm array) - dates trimmed between SEP start and
+        :sep_dates: (datetime64 1xm array) - dates trimmed between SEP start and
             end times
         :sep_fluxes: (float nxm array) - flux time profiles for each energy channel
             trimmed between SEP start and end times
@@ -1302,6 +1602,7 @@ def get_fluence_spectrum(experiment, flux_type, options, doBGSub,
         :diff_thresh: (boolean) - indicates if the energy_threshold and
             flux_threshold refer to a differential channel (True)
         :save_file: (boolean) - set True to save fluence values to file
+        :sep_quality: (uint8 nxm array) - data quality flags for sep_fluxes
         
         OUTPUTS:
         
@@ -1314,7 +1615,10 @@ def get_fluence_spectrum(experiment, flux_type, options, doBGSub,
     energies = np.zeros(shape=(nenergy))
     for i in range(nenergy):
         #Multiplied by 4pi sr (units of e.g. 1/[cm^2] or 1/[MeV cm^2])
-        fluence[i] = calculate_fluence(sep_dates, sep_fluxes[i,:])
+        quality = None
+        if sep_quality is not None:
+            quality = sep_quality[i,:]
+        fluence[i] = calculate_fluence(sep_dates, sep_fluxes[i,:], quality)
         if energy_bins[i][1] != -1:
             energies[i] = math.sqrt(energy_bins[i][0]*energy_bins[i][1])
         else:
@@ -1322,9 +1626,10 @@ def get_fluence_spectrum(experiment, flux_type, options, doBGSub,
 
     if save_file:
         #Write fluence to file
-        year = sep_dates[0].year
-        month = sep_dates[0].month
-        day = sep_dates[0].day
+        first_date = datasets.to_datetime(sep_dates[0])
+        year = first_date.year
+        month = first_date.month
+        day = first_date.day
         mod1 = 'gt'
         mod2 = '>'
         unit = flux_units_integral #'pfu'
@@ -1351,8 +1656,9 @@ def get_fluence_spectrum(experiment, flux_type, options, doBGSub,
         fout.write('\"#Event defined by ' + mod2 + str(energy_threshold) \
                     + ' '+ energy_units + ', ' + str(flux_threshold) \
                     +' '+ unit + '; start time '
-                    + str(sep_dates[0]) + ', end time '
-                    + str(sep_dates[len(sep_dates)-1]) + '\"\n')
+                    + str(first_date) + ', end time '
+                    + str(datasets.to_datetime(sep_dates[len(sep_dates)-1]))
+                    + '\"\n')
         if flux_type == "differential":
             fout.write("#Elow,Emid,Ehigh,Fluence " +
                         fluence_units_differential + "\n")
@@ -1406,7 +1712,7 @@ def calculate_event_info(energy_thresholds,flux_thresholds,dates,
         :energy_thresholds: (float 1xn array) - energy channels for which a
             threshold is applied
         :flux_thresholds: (float 1xn array) - flux thresholds to apply
-        :dates: (datetime 1xm array)
+        :dates: (datetime64 1xm array)
         :integral_fluxes: (float nxm array) - fluxes only associated with the
             energy channels in energy_thresholds
         :detect_prev_event: (boolean)
@@ -1431,30 +1737,39 @@ def calculate_event_info(energy_thresholds,flux_thresholds,dates,
     rise_time = []
     event_end_time = []
     duration = []
+    dates = datasets.to_datetime64(dates)
+    last_date = dates[len(dates)-1]
+    integral_fluxes = np.asarray(integral_fluxes, dtype=float).reshape(
+                        nthresh, len(dates))
+    #The runs above and below threshold for all thresholds at once; the
+    #event after the first one is found from the same runs, starting at
+    #the index of the end time
+    print('Calculating threshold crossings and SEP event characteristics.')
+    npoints, starts, ends = find_threshold_runs(flux_thresholds, dates,
+                                integral_fluxes)
     for i in range(nthresh):
-        ct,pf,pt,rt,eet,dur = calculate_threshold_crossing(energy_thresholds[i],
-                        flux_thresholds[i],dates,integral_fluxes[i])
+        ct,pf,pt,rt,eet,dur = find_event(energy_thresholds[i],
+                        flux_thresholds[i], dates, integral_fluxes[i],
+                        npoints, starts[i], ends[i])
         if detect_prev_event and ct == dates[0]:
             print("Threshold may have been high due to previous event."
                 "Recalculating event info for remaining time period in data "
                 "set.")
-            last_date = dates[len(dates)-1]
-            tmp_dates, tmp_fluxes = datasets.extract_date_range(eet,last_date,
-                                dates,integral_fluxes)
-            ct,pf,pt,rt,eet,dur = calculate_threshold_crossing(\
-                            energy_thresholds[i],flux_thresholds[i],
-                            tmp_dates,tmp_fluxes[i])
+            first, nend = datasets.extract_date_range_indices(eet,last_date,
+                                dates)
+            ct,pf,pt,rt,eet,dur = find_event(energy_thresholds[i],
+                        flux_thresholds[i], dates, integral_fluxes[i],
+                        npoints, starts[i], ends[i], first)
 
         if dur != 0 and two_peaks:
             if dur < timedelta(days=1):
                 print("User specified that event has two peaks. Extending "
                     "event to second decrease below threshold.")
-                last_date = dates[len(dates)-1]
-                tmp_dates, tmp_fluxes = datasets.extract_date_range(eet,
-                                    last_date,dates,integral_fluxes)
-                ct2,pf2,pt2,rt2,eet2,dur2 = calculate_threshold_crossing(\
-                                energy_thresholds[i],flux_thresholds[i],
-                                tmp_dates,tmp_fluxes[i])
+                first, nend = datasets.extract_date_range_indices(eet,
+                                last_date, dates)
+                ct2,pf2,pt2,rt2,eet2,dur2 = find_event(energy_thresholds[i],
+                        flux_thresholds[i], dates, integral_fluxes[i],
+                        npoints, starts[i], ends[i], first)
 
                 #Only apply changes if another threshold crossing was found and
                 #new event end time is not the last point in the file
@@ -1472,7 +1787,7 @@ def calculate_event_info(energy_thresholds,flux_thresholds,dates,
         if ct == 0:
             pf = np.amax(integral_fluxes[i])
             indx = np.where(integral_fluxes[i]==pf)
-            pt = dates[indx[0][0]]
+            pt = datasets.to_datetime(dates[indx[0][0]])
         
         crossing_time.append(ct)
         peak_flux.append(pf)
@@ -1527,7 +1842,7 @@ def calculate_onset_peak(experiment, energy_thresholds, dates, integral_fluxes,
         :experiment: (string) e.g. GOES-13
         :energy_thresholds: (float 1xn array) - energy channels for which thresholds
             are applied
-        :dates: (datetime 1xm array) - dates associated with flux time profile
+        :dates: (datetime64 1xm array) - dates associated with flux time profile
         :integral_fluxes: (float nxm array) - fluxes for each energy channel for
             which a threshold is applied; each is the same length as dates
         :crossing_time: (datetime 1xn array) - threshold crossing times for each energy
@@ -1542,6 +1857,7 @@ def calculate_onset_peak(experiment, energy_thresholds, dates, integral_fluxes,
         :onset_peak: (float 1xn array) - flux value of onset peak
         
     """
+    dates = datasets.to_datetime64(dates)
     nthresh = len(energy_thresholds)
     smooth_flux = [[]]*nthresh
     for i in range(nthresh):
@@ -1620,7 +1936,7 @@ def calculate_onset_peak(experiment, energy_thresholds, dates, integral_fluxes,
             #Find the max flux in the time period and time
             onset_peak[i] = np.max(smooth_flux[i])
             peak_index = np.where(smooth_flux[i] == np.amax(smooth_flux[i]))
-            onset_date[i] = dates[peak_index[0][0]]
+            onset_date[i] = datasets.to_datetime(dates[peak_index[0][0]])
             continue
         #If all entries are zero flux (bg-sub or SEPEMv3)
         is_all_zero = np.all((smooth_flux[i] == 0))
@@ -1644,11 +1960,13 @@ def calculate_onset_peak(experiment, energy_thresholds, dates, integral_fluxes,
         last_date = crossing_time[i] + datetime.timedelta(hours=18)
         if last_date > event_end_time[i]:
             last_date = event_end_time[i]
-        for j in range(len(dates)):
-            if dates[j] <= (crossing_time[i] - datetime.timedelta(hours=buffer)):
-                index_cross = j
-            if dates[j] <= last_date:
-                index_stp = j
+        before = np.flatnonzero(dates <= (crossing_time[i]
+                                - datetime.timedelta(hours=buffer)))
+        if len(before) > 0:
+            index_cross = before[-1]
+        before = np.flatnonzero(dates <= last_date)
+        if len(before) > 0:
+            index_stp = before[-1]
 
         #Max value of the normalized derivative in first 18 hours
         max_index =  np.argmax(run_deriv_norm[i][index_cross:index_stp]) + index_cross
@@ -1756,7 +2074,7 @@ def calculate_onset_peak(experiment, energy_thresholds, dates, integral_fluxes,
         #Find the maximum flux in the range where the onset peak should be
         onset_peak[i] = max(integral_fluxes[i][max_index:index_neg])
         onset_index = np.argmax(integral_fluxes[i][max_index:index_neg])
-        onset_date[i] = dates[max_index + onset_index]
+        onset_date[i] = datasets.to_datetime(dates[max_index + onset_index])
         print("Found onset peak for " + str(energy_thresholds[i]) + " "
             + energy_units + ": " + str(onset_peak[i])
             + ", Onset peak time: " + str(onset_date[i]))
@@ -1813,7 +2131,7 @@ def calculate_onset_peak(experiment, energy_thresholds, dates, integral_fluxes,
                 if check_peak > onset_peak[i]:
                     onset_peak[i] = max(integral_fluxes[i][index_neg:index_neg2])
                     onset_index = np.argmax(integral_fluxes[i][index_neg:index_neg2])
-                    onset_date[i] = dates[index_neg + onset_index]
+                    onset_date[i] = datasets.to_datetime(dates[index_neg + onset_index])
                     print("Recalculated onset peak for " + str(energy_thresholds[i]) + " " + energy_units
                         + ": " + str(onset_peak[i]) + ", Onset peak time: "
                         + str(onset_date[i]))
@@ -1984,7 +2302,7 @@ def calculate_onset_peak_from_fit(experiment, energy_thresholds, dates, integral
         :experiment: (string) e.g. GOES-13
         :energy_thresholds: (float 1xn array) - energy channels for which thresholds
             are applied
-        :dates: (datetime 1xm array) - dates associated with flux time profile
+        :dates: (datetime64 1xm array) - dates associated with flux time profile
         :integral_fluxes: (float nxm array) - fluxes for each energy channel for
             which a threshold is applied; each is the same length as dates
         :crossing_time: (datetime 1xn array) - threshold crossing times for each energy
@@ -1999,6 +2317,7 @@ def calculate_onset_peak_from_fit(experiment, energy_thresholds, dates, integral
         :onset_peak: (float 1xn array) - flux value of onset peak
         
     """
+    dates = datasets.to_datetime64(dates)
     nthresh = len(energy_thresholds)
     
     ###########
@@ -2017,7 +2336,8 @@ def calculate_onset_peak_from_fit(experiment, energy_thresholds, dates, integral
     onset_peak = [[]]*nthresh
     
     #Convert dates into a series of times in hours for fitting
-    times = [((t - dates[0]).total_seconds() + 60)/(60*60) for t in dates]
+    first_date = datasets.to_datetime(dates[0])
+    times = ((datasets.to_seconds(dates - dates[0]) + 60)/(60*60)).tolist()
     
     #Do a fit of the Weibull function for each time profile
     params_weib = Parameters()
@@ -2032,14 +2352,10 @@ def calculate_onset_peak_from_fit(experiment, energy_thresholds, dates, integral
         #hours afterwards
         fit_st = crossing_time[i] - datetime.timedelta(hours=6)
         fit_end = crossing_time[i] + datetime.timedelta(hours=24)
-        trim_fluxes = []
-        trim_times = []
-        trim_dates = []
-        for j in range(len(dates)):
-            if dates[j] >= fit_st and dates[j] <= fit_end:
-                trim_fluxes.append(integral_fluxes[i][j])
-                trim_times.append(times[j])
-                trim_dates.append(dates[j])
+        trim_index = np.flatnonzero((dates >= fit_st) & (dates <= fit_end))
+        trim_fluxes = [integral_fluxes[i][j] for j in trim_index]
+        trim_times = [times[j] for j in trim_index]
+        trim_dates = datasets.to_datetime(dates[trim_index])
         
         #log_fluxes = [math.log10(f) for f in integral_fluxes[i]]
         minimize_weib = minimize(weibull_residual, params_weib,
@@ -2087,7 +2403,7 @@ def calculate_onset_peak_from_fit(experiment, energy_thresholds, dates, integral
         max_time = trim_times[max_idx[0][0]]
         
         #Pull out max measured value around this identified maximum in the fit
-        model_max_date = datetime.timedelta(seconds=(max_time*60*60 - 60)) + dates[0]
+        model_max_date = datetime.timedelta(seconds=(max_time*60*60 - 60)) + first_date
         max_meas = 0
         max_meas_time = 0
         max_date = 0
@@ -2149,13 +2465,24 @@ def calculate_umasep_info(energy_thresholds,flux_thresholds,dates,
         channels) and all the energy and flux thresholds set in the main program
         to calculate SEP event quantities specific to the UMASEP model.
             Flux at threshold crossing time + 3, 4, 5, 6, 7 hours
+        
+        The flux at each delayed time is the average over 10 minutes of data
+        ending at the last time point at or before the delayed time, e.g.
+        2 points for 5 minute data, 10 points for 1 minute data and a single
+        point for data with a time resolution of 10 minutes or longer.
+        The time points for all thresholds and delays are found with a
+        single sorted search of dates.
+        
+        If a delayed time is after the last time point, the time and flux
+        for that delay are set to 0 and None and insufficient_data is set
+        for the threshold.
             
         INPUTS:
         
         :energy_thresholds: (float 1xn array) - energy channels for which thresholds
             are applied
         :flux_thresholds: (float 1xn array) - flux thresholds that are applied
-        :dates: (datetime 1xm array) - dates associated with flux time profile
+        :dates: (datetime64 1xm array) - dates associated with flux time profile
         :integral_fluxes: (float nxm array) - fluxes for each energy channel for
             which a threshold is applied; each is the same length as dates
         :crossing_time: (datetime 1xn array) - threshold crossing times for each energy
@@ -2167,64 +2494,68 @@ def calculate_umasep_info(energy_thresholds,flux_thresholds,dates,
             after crossing time for n thresholds
         :proton_flux: (float nx5 array) - value of flux at each delay time and for
             each threshold
+        :insufficient_data: (bool 1xn array) - True if the time range ended
+            before one or more of the delayed times for a threshold
         
     """
+    dates = datasets.to_datetime64(dates)
+    ndates = len(dates)
     nthresh = len(flux_thresholds)
-    proton_flux = []
+    integral_fluxes = np.asarray(integral_fluxes, dtype=float).reshape(
+                        nthresh, ndates)
     delays = [datetime.timedelta(hours=3), datetime.timedelta(hours=4),
                     datetime.timedelta(hours=5), datetime.timedelta(hours=6),
                     datetime.timedelta(hours=7)]
     ndelay = len(delays)
-    delay_times = []
-    proton_delay_times = []  #actual time point corresponding to flux
-
-    #Match the correct time delay with the correct threshold
-    for i in range(nthresh):
-        if crossing_time[i] == 0:
-            delay_times.append(0)
-            continue
-        all_delays = []
-        for delay in delays:
-            all_delays.append(crossing_time[i] + delay)
-            #Make sure that delayed time doesn't exceed input time range
-            if crossing_time[i] + delay > dates[len(dates)-1]:
-                sys.exit("An UMASEP delayed time (Ts+3, 4, 5, 6, 7 hrs) "
-                        "exceeded the user's input time range. Please rerun "
-                        "and extend end time.")
+    average_time = datetime.timedelta(minutes=10) #average flux over 10 mins
 
-        delay_times.append(all_delays) #all delays for a given threshold
+    proton_delay_times = [0]*nthresh  #actual time point corresponding to flux
+    proton_flux = [0]*nthresh
+    insufficient_data = [False]*nthresh
+    crossed = [i for i in range(nthresh) if crossing_time[i] != 0]
+    if len(crossed) == 0:
+        return proton_delay_times, proton_flux, insufficient_data
 
-    for i in range(nthresh):
-        save_flux = [0]*ndelay
-        save_dates = [0]*ndelay
-        if delay_times[i] == 0:
-            proton_delay_times.append(0)
-            proton_flux.append(0)
-            continue
+    #Number of points to average at the time resolution of the data set
+    time_resolution = determine_time_resolution(dates)
+    naverage = int(round(average_time/time_resolution))
+    naverage = min(max(naverage, 1), ndates)
+
+    #Last time point at or before each delayed time for all thresholds
+    #and delays
+    delay_times = datasets.to_datetime64([crossing_time[i] + delay
+                    for i in crossed for delay in delays]).reshape(
+                    len(crossed), ndelay)
+    save_index = np.searchsorted(dates, delay_times, side='right') - 1
+    missing = (delay_times > dates[ndates-1]) | (save_index < 0)
+
+    #Average the naverage points ending at save_index; use the first
+    #naverage points if there aren't enough before save_index
+    first = np.clip(save_index - (naverage-1), 0, ndates - naverage)
+    window = first[:,:,np.newaxis] + np.arange(naverage)
+    save_flux = np.mean(integral_fluxes[np.array(crossed)[:,np.newaxis,
+                    np.newaxis], window], axis=2)
+
+    for j in range(len(crossed)):
+        i = crossed[j]
+        proton_delay_times[i] = [0]*ndelay
+        proton_flux[i] = [None]*ndelay
         for k in range(ndelay):
-            save_index = -1
-            for j in range(len(dates)):
-                if dates[j] <= delay_times[i][k]:
-                    save_index = j
-
-            #GET FLUX AT DELAYED TIME WITH 10 MINUTE AVERAGE
-            #May choose to modify if input data set has something other than
-            #5 minute time cadence.
-            if save_index == -1: #should not happen, unless dates has no length
-                sys.exit("Did not find an appropriate UMASEP flux point. "
-                        "Exiting.")
-            if save_index == 0: #also should be no way for this to happen
-                save_flux[k] = (integral_fluxes[i][save_index] + \
-                            integral_fluxes[i][save_index +1])/2.
-            else:
-                save_flux[k] = (integral_fluxes[i][save_index] + \
-                            integral_fluxes[i][save_index - 1])/2.
-            save_dates[k] = dates[save_index]
+            if missing[j,k]:
+                continue
+            proton_delay_times[i][k] = datasets.to_datetime(
+                                        dates[save_index[j,k]])
+            proton_flux[i][k] = save_flux[j,k]
 
-        proton_flux.append(save_flux)
-        proton_delay_times.append(save_dates)
+        if missing[j].any():
+            insufficient_data[i] = True
+            print("calculate_umasep_info: An UMASEP delayed time (Ts+3, 4, "
+                "5, 6, 7 hrs) for >" + str(energy_thresholds[i]) + ", "
+                + str(flux_thresholds[i]) + " exceeded the input time range. "
+                "Setting the flux to None. Extend the end time to get all "
+                "of the delayed fluxes.")
 
-    return proton_delay_times, proton_flux
+    return proton_delay_times, proton_flux, insufficient_data
 
 
 
@@ -2250,7 +2581,7 @@ def report_threshold_fluences(experiment, flux_type, model_name,
         :energy_thresholds: (float 1xn array) - integral energy channels for
             which a threshold has been applied
         :energy_bins: (float 2xm array) - energy bins for input fluxes
-        :sep_dates: (datetime 1xp array) - time profile dates trimmed to
+        :sep_dates: (datetime64 1xp array) - time profile dates trimmed to
             start and stop of SEP event
         :sep_fluxes: (float mxp array) - flux time profiles for each energy
             channel trimmed to start and end dates
@@ -2323,7 +2654,7 @@ def save_integral_fluxes_to_file(experiment, flux_type, options, doBGSub,
             flux thresholds are applied
         :crossing_time: (datetime 1xn array) - start times of sep event for each
             energy channel (energy_thresolds) for which a threshold was applied
-        :dates: (datetime 1xm array) - dates for flux time profile
+        :dates: (datetime64 1xm array) - dates for flux time profile
         :integral_fluxes: (float nxm array) - flux time profiles for each energy channel
             for which a threshold was applied; assumed to be (estimated)integral fluxes
         
@@ -2379,8 +2710,9 @@ def save_integral_fluxes_to_file(experiment, flux_type, options, doBGSub,
     for thresh in energy_thresholds: #build header
         fout.write(',' + str(thresh))
     fout.write('\n')
+    out_dates = datasets.to_datetime(dates)
     for i in range(ndates):
-        fout.write(str(dates[i]))
+        fout.write(str(out_dates[i]))
         for j in range(nthresh):
             fout.write(',' + str(integral_fluxes[j][i]))
         fout.write('\n')
@@ -2395,7 +2727,7 @@ def print_values_to_file(experiment, flux_type, options, doBGSub,
                 flux_thresholds, crossing_time, onset_peak, onset_date,
                 peak_flux, peak_time, rise_time, event_end_time, duration,
                 threshold_fluences, is_diff_thresh, umasep, umasep_times,
-                umasep_fluxes):
+                umasep_fluxes, umasep_insufficient=None):
     """ Write all calculated values to file for all thresholds. Event-integrated
         fluences for >10, >100 MeV (and user-defined threshold) will also be
         included. Writes out file with name e.g.
@@ -2443,6 +2775,8 @@ def print_values_to_file(experiment, flux_type, options, doBGSub,
             crossing time for each applied threshold
         :umasep_fluxes: (float 5xn) - fluxes at each of those times for each
             applied threshold
+        :umasep_insufficient: (bool 1xn array) - True if the time range ended
+            before one or more of the UMASEP delayed times for a threshold
             
         OUTPUTS:
         
@@ -2529,6 +2863,8 @@ def print_values_to_file(experiment, flux_type, options, doBGSub,
         for jj in range(numa):
             fout.write(',UMASEP Delay [hr],Flux ['
                         + flux_units_integral + ']')
+        if umasep_insufficient is not None:
+            fout.write(',UMASEP Insufficient Data')
     fout.write('\n')
     nthresh = len(energy_thresholds)
 
@@ -2556,8 +2892,13 @@ def print_values_to_file(experiment, flux_type, options, doBGSub,
         fout.write(',' + str(threshold_fluences[i])) #units of flux*time
         if umasep:
             for jj in range(numa):
+                if umasep_times[i][jj] == 0: #delay after end of time range
+                    fout.write(',None,None')
+                    continue
                 fout.write(',' + str(umasep_times[i][jj] - crossing_time[i]) \
                     + ',' + str(umasep_fluxes[i][jj]))
+            if umasep_insufficient is not None:
+                fout.write(',' + str(umasep_insufficient[i]))
         fout.write('\n')
 
     fout.close()
@@ -2849,25 +3190,21 @@ def read_in_flux_files(experiment, flux_type, user_file, model_name, startdate,
         
         OUTPUTS:
         
-        :dates: (datetime 1xm array) - times in flux time profile trimmed
+        :dates: (datetime64 1xm array) - times in flux time profile trimmed
             between startdate and enddate
         :fluxes: (numpy float nxm array) - fluxes for n energy channels and m
             time steps; these are background subtracted fluxes if background
             subtraction was selected.
         :energy_bins: (array nx2 for n thresholds)
+        :quality: (uint8 nxm array) - data quality flags for fluxes (see
+            datasets.make_quality_mask); bad points that were filled in
+            are also marked datasets.quality_interp
         
     """
     
-    filenames1, filenames2, filenames_orien = datasets.check_data(startdate,
-                                    enddate, experiment, flux_type, user_file)
-                                    
     #read in flux files
-    if experiment != "user":
-        all_dates, all_fluxes, west_detector =datasets.read_in_files(experiment,
-                    flux_type, filenames1, filenames2, filenames_orien, options)
-    if experiment == "user":
-        all_dates, all_fluxes = datasets.read_in_user_files(filenames1)
-        west_detector = []
+    all_dates, all_fluxes, west_detector = store.read_in_data(startdate,
+                    enddate, experiment, flux_type, user_file, options)
     #Define energy bins
     energy_bins = datasets.define_energy_bins(experiment, flux_type, \
                                 west_detector, options)
@@ -2884,25 +3221,32 @@ def read_in_flux_files(experiment, flux_type, user_file, model_name, startdate,
         #Extract the date range specified by the user
         dates, fluxes = datasets.extract_date_range(startdate, enddate,
                                     bgdates, sepfluxes)
+        #Bad points are NaN after background subtraction
+        quality = datasets.make_quality_mask(fluxes)
 
     #NO BACKGROUND SUBTRACTION
     if not doBGSub:
         #Extract the date range specified by the user
-        dates, fluxes = datasets.extract_date_range(startdate, enddate,
-                                all_dates, all_fluxes)
+        nst, nend = datasets.extract_date_range_indices(startdate, enddate,
+                                all_dates)
+        dates = all_dates[nst:nend]
+        fluxes = all_fluxes[:,nst:nend]
+        quality = datasets.make_quality_mask(fluxes,
+                                west_detector[nst:nend])
     
     
     #nointerp = True, Set bad data points (negative flux or None) to None (NaN in np)
     #nointerp = False, Remove bad data points (negative flux or None) w/ linear interp in time
     dointerp = not nointerp
-    fluxes = datasets.check_for_bad_data(dates,fluxes,energy_bins,dointerp)
+    fluxes = datasets.check_for_bad_data(dates,fluxes,energy_bins,dointerp,
+                                quality=quality)
 
      
     if len(dates) <= 1:
         sys.exit("The specified start and end dates were not present in the "
                 "specified input file. Exiting.")
     
-    return dates, fluxes, energy_bins
+    return dates, fluxes, energy_bins, quality
       
       
       
@@ -2962,7 +3306,7 @@ def calculate_integral_fluences(experiment, flux_type, options,
         energy_thresholds, flux_thresholds, dates, fluxes,
         integral_fluxes,
         crossing_time, event_end_time, all_threshold_fluences,
-        all_fluence, all_energies):
+        all_fluence, all_energies, quality=None):
     """ Calculate fluence values for all integral energy thresholds
         between start and end times determined in each channel.
         This subroutine is only called for the thresholds applied
@@ -2982,7 +3326,7 @@ def calculate_integral_fluences(experiment, flux_type, options,
             threshold is applied (at this point, only the integral ones)
         :flux_thresholds: (float 1xn array) - flux thresholds applied to
             the energy channels in energy_thresholds
-        :dates: (datetime 1xm array) - time points for the flux time profiles
+        :dates: (datetime64 1xm array) - time points for the flux time profiles
         :fluxes: (float pxm array) - flux time profiles for p energy bins and m
             time steps
         :integral_fluxes: (float nxm array) - flux time profiles of integral
@@ -3001,6 +3345,7 @@ def calculate_integral_fluences(experiment, flux_type, options,
             the events defined by the thresholds applied to each energy channel
         :all_energies: (float 1xp array) - effective energies for energy_bins,
             defined by sqrt(low bin edge*high bin edge)
+        :quality: (uint8 pxm array) - data quality flags for fluxes
         
         
         OUTPUTS:
@@ -3030,8 +3375,13 @@ def calculate_integral_fluences(experiment, flux_type, options,
             continue
 
         #Extract the original fluxes trimmed for the SEP start and stop times
-        sep_dates, sep_fluxes = datasets.extract_date_range(crossing_time[i],
-                             event_end_time[i],dates,fluxes)
+        nst, nend = datasets.extract_date_range_indices(crossing_time[i],
+                             event_end_time[i],dates)
+        sep_dates = dates[nst:nend]
+        sep_fluxes = fluxes[:,nst:nend]
+        sep_quality = None
+        if quality is not None:
+            sep_quality = quality[:,nst:nend]
 
         #Calculate fluence spectrum for the SEP event.
         #Fluence spectrum will be of integral fluxes if the original
@@ -3047,7 +3397,8 @@ def calculate_integral_fluences(experiment, flux_type, options,
         fluence, energies = get_fluence_spectrum(experiment, flux_type,
                          options, doBGSub,
                          model_name, energy_thresholds[i], flux_thresholds[i],
-                         sep_dates, sep_fluxes, energy_bins, False, True)
+                         sep_dates, sep_fluxes, energy_bins, False, True,
+                         sep_quality)
                          #diff_thresh; savefile
                          #Only thresholds applied to integral flux
                          #channels are specified so far
@@ -3096,7 +3447,7 @@ def append_differential_thresholds(energy_thresholds, flux_thresholds,
         all_threshold_fluences, all_fluence, all_energies,
         crossing_time, peak_flux, peak_time, rise_time, event_end_time,
         duration, onset_date, onset_peak, integral_fluxes,
-        doBGSub, model_name, showplot, saveplot):
+        doBGSub, model_name, showplot, saveplot, umasep_insufficient=None):
     """ Add the threshold crossing information for differential channels
         as specified by the user.
         
@@ -3125,7 +3476,7 @@ def append_differential_thresholds(energy_thresholds, flux_thresholds,
             [binlowedge, flux threshold]
         :energy_bins: (float 2xm array) - m energy bins for each input
             flux channel
-        :dates: (datetime 1xq array) - q time points for the flux time profile
+        :dates: (datetime64 1xq array) - q time points for the flux time profile
         :fluxes: (float mxq array) - flux time profiles for m energy bins and
             q time points
         :detect_prev_event: (bool) - option for finding start of event
@@ -3158,6 +3509,9 @@ def append_differential_thresholds(energy_thresholds, flux_thresholds,
             threshold
         :integral_fluxes: (float nxq array) - flux time profiles of integral
             or estimated integral fluxes for n energy channels and m time steps
+        :umasep_insufficient: (bool 1xn array) - True if the time range ended
+            before one or more of the UMASEP delayed times for a threshold;
+            the flags for the differential thresholds are appended
        
         
         OUTPUTS:
@@ -3231,7 +3585,7 @@ def append_differential_thresholds(energy_thresholds, flux_thresholds,
                 bin_fl = 0
                 pf = [np.amax(fluxes[svbin])]
                 pf_idx = np.where(fluxes[svbin] == np.amax(fluxes[svbin]))
-                pt = [dates[pf_idx[0][0]]]
+                pt = [datasets.to_datetime(dates[pf_idx[0][0]])]
                 op = pf #onset peak = max flux when no threshold crossed
                 od = pt #time of max flux
                 
@@ -3250,11 +3604,13 @@ def append_differential_thresholds(energy_thresholds, flux_thresholds,
                             dates, in_flx, ct, eet, showplot, saveplot)
 
                 if umasep:
-                    umasep_t, umasep_f = calculate_umasep_info(\
+                    umasep_t, umasep_f, umasep_short = calculate_umasep_info(\
                                 [input_threshold[i][0]],[input_threshold[i][1]],
                                 dates, [fluxes[svbin]], ct)
                     umasep_times.append(umasep_t[0]) #One channel at a time
                     umasep_fluxes.append(umasep_f[0]) #so only one element in array
+                    if umasep_insufficient is not None:
+                        umasep_insufficient.append(umasep_short[0])
 
             #user-specified differential thresholds will be tacked onto the end
             all_fluence = np.append(all_fluence, [fl], axis=0) #in native units of experiment
@@ -3289,7 +3645,7 @@ def write_zulu_time_profile(filename, dates, fluxes):
         INPUTS:
         
         :Filename: (string) - name of file to write
-        :date: (datetime 1xn array) - list of dates
+        :date: (datetime64 1xn array) - list of dates
         :fluxes: (float 1xn array) - corresponding fluxes
         
         OUTPUTS:
@@ -3299,9 +3655,10 @@ def write_zulu_time_profile(filename, dates, fluxes):
     """
     fname = outpath + "/" + filename
     outfile = open(fname, "w")
+    #Same format as ccmc_json.make_ccmc_zulu_time, for all dates at once
+    zdates = np.datetime_as_string(datasets.to_datetime64(dates), unit='s')
     for i in range(len(dates)):
-        zdate = ccmc_json.make_ccmc_zulu_time(dates[i])
-        outfile.write(zdate + "    " + str(fluxes[i]) + "\n")
+        outfile.write(zdates[i] + "Z    " + str(fluxes[i]) + "\n")
         
     outfile.close()
     print("write_zulu_time_profile: Wrote file --> " + fname)
@@ -3314,7 +3671,7 @@ def write_info_to_file(experiment, flux_type, json_type, options,
         crossing_time, onset_peak, onset_date, peak_flux, peak_time,
         rise_time, event_end_time, duration, all_threshold_fluences,
         all_fluence, plot_diff_thresh,
-        umasep, umasep_times, umasep_fluxes):
+        umasep, umasep_times, umasep_fluxes, umasep_insufficient=None):
     """ Write information to csv and json file.
         Writes all of the derived information for all the
         energy-threshold combinations to file.
@@ -3349,7 +3706,8 @@ def write_info_to_file(experiment, flux_type, json_type, options,
                     model_name, startdate, energy_thresholds, flux_thresholds,
                     crossing_time, onset_peak, onset_date, peak_flux, peak_time,
                     rise_time, event_end_time, duration, all_threshold_fluences,
-                    plot_diff_thresh, umasep, umasep_times, umasep_fluxes)
+                    plot_diff_thresh, umasep, umasep_times, umasep_fluxes,
+                    umasep_insufficient)
     
     
     #SAVE TO JSON FILE
@@ -3537,7 +3895,7 @@ def run_all(str_startdate, str_enddate, experiment, flux_type, model_name,
         fluence_units_differential = vars.fluence_units_differential
     
     #READ IN FLUXES AND ENERGY BINS, BG SUBTRACT, INTERPOLATE
-    dates, fluxes, energy_bins = read_in_flux_files(experiment,
+    dates, fluxes, energy_bins, quality = read_in_flux_files(experiment,
         flux_type, user_file, model_name, startdate,
         enddate, str_startdate, str_enddate, str_bgstartdate,
         str_bgenddate, options, doBGSub, nointerp, showplot, saveplot)
@@ -3553,7 +3911,8 @@ def run_all(str_startdate, str_enddate, experiment, flux_type, model_name,
     #Pull out or estimate only the integral flux channels for which a
     #threshold will be applied
     integral_fluxes = extract_integral_fluxes(fluxes, experiment, flux_type,
-                    flux_thresholds, energy_thresholds, energy_bins, options, doBGSub)
+                    flux_thresholds, energy_thresholds, energy_bins, options,
+                    doBGSub, quality)
 
     #Calculate SEP event quantities for energy and flux threshold combinations
     #integral fluxes are used to define event start and stop
@@ -3569,9 +3928,11 @@ def run_all(str_startdate, str_enddate, experiment, flux_type, model_name,
     #Calculate times used in UMASEP
     umasep_times =[]
     umasep_fluxes=[]
+    umasep_insufficient=[]
     if umasep:
-        umasep_times, umasep_fluxes = calculate_umasep_info(energy_thresholds,
-                        flux_thresholds, dates, integral_fluxes, crossing_time)
+        umasep_times, umasep_fluxes, umasep_insufficient = calculate_umasep_info(
+                        energy_thresholds, flux_thresholds, dates,
+                        integral_fluxes, crossing_time)
 
     #Arrays for event-integrated fluences for all thresholds, both
     #integral and differential
@@ -3588,7 +3949,7 @@ def run_all(str_startdate, str_enddate, experiment, flux_type, model_name,
             energy_thresholds, flux_thresholds, dates, fluxes,
             integral_fluxes, crossing_time, event_end_time,
             all_threshold_fluences,
-            all_fluence, all_energies)
+            all_fluence, all_energies, quality)
     
     #Save to file the integral fluxes for all integral channels
     #where thresholds were applied - multiple fluxes in a single file
@@ -3620,7 +3981,7 @@ def run_all(str_startdate, str_enddate, experiment, flux_type, model_name,
                 all_threshold_fluences, all_fluence, all_energies,
                 crossing_time, peak_flux, peak_time, rise_time, event_end_time,
                 duration, onset_date, onset_peak, integral_fluxes,
-                doBGSub, model_name, showplot, saveplot)
+                doBGSub, model_name, showplot, saveplot, umasep_insufficient)
 
 
 
@@ -3637,7 +3998,7 @@ def run_all(str_startdate, str_enddate, experiment, flux_type, model_name,
         crossing_time, onset_peak, onset_date, peak_flux, peak_time,
         rise_time, event_end_time, duration, all_threshold_fluences,
         all_fluence, plot_diff_thresh,
-        umasep, umasep_times, umasep_fluxes)
+        umasep, umasep_times, umasep_fluxes, umasep_insufficient)
 
 
     
@@ -3730,6 +4091,7 @@ def run_all(str_startdate, str_enddate, experiment, flux_type, model_name,
                         label="Max Flux")
             if umasep:
                 for k in range(len(umasep_times[i])):
+                    if umasep_fluxes[i][k] is None: continue
                     plt.plot_date(umasep_times[i][k],umasep_fluxes[i][k],'bo')
 
             plt.xlabel('Date')
@@ -150,7 +150,8 @@ def read_in_flux_files(experiment, flux_type, user_file, model_name, startdate,
     #read in flux files
     if experiment != "user":
         all_dates, all_fluxes, west_detector =datasets.read_in_files(experiment,
-                    flux_type, filenames1, filenames2, filenames_orien, options)
+                    flux_type, filenames1, filenames2, filenames_orien, options,
+                    startdate, enddate)
     if experiment == "user":
         all_dates, all_fluxes = datasets.read_in_user_files(filenames1)
         west_detector = []
@@ -176,6 +177,8 @@ def read_in_flux_files(experiment, flux_type, user_file, model_name, startdate,
         sys.exit("The specified start and end dates were not present in the "
                 "specified input file. Exiting.")
     
+    #The rest of this script works with a list of datetimes
+    dates = datasets.to_datetime(dates)
     return dates, fluxes, energy_bins
       
 
@@ -0,0 +1,733 @@
+import operational_sep_quantities as sep
+from library import ccmc_json_handler as ccmc_json
+from library import read_datasets as datasets
+from library import fetch_data as fetch
+from library import global_vars as vars
+import numpy as np
+import argparse
+import datetime
+import math
+import time
+import sys
+import os
+
+__version__ = "0.2"
+__author__ = "Katie Whitman"
+__maintainer__ = "Katie Whitman"
+__email__ = "kathryn.whitman@nasa.gov"
+
+#2026-10-17, Version 0.1: Follow the SEP event quantities in real time
+#   from the GOES-R integral fluxes. The event state for each threshold
+#   is updated with only the newly appended time points and a json file
+#   is written only when the state changes.
+#2026-10-17, Version 0.2: Bad flux values are filled by linear
+#   interpolation in time once the next good value arrives, as in
+#   check_for_bad_data, instead of being skipped. The time points from the
+#   first bad value onwards are held back until then. The time resolution
+#   is found once at least two time points have arrived instead of exiting
+#   when the first update contains a single point.
+
+datapath = vars.datapath
+outpath = vars.outpath
+#Time points held back waiting for a good value in a channel are filled
+#with the last good value and processed once they span more than this
+max_hold = datetime.timedelta(hours=1)
+
+
+def about_realtime_sep():
+    """ About realtime_sep.py
+
+        Follows an ongoing SEP event as new time points are added to a
+        real time data feed, e.g. the NOAA SWPC GOES-R integral fluxes that
+        are updated every 5 minutes.
+
+        operational_sep_quantities.py reads in the whole date range and
+        finds the threshold crossings each time it is run. Here, the state
+        of the event for each threshold is kept between updates:
+
+        * threshold crossing time (start of event)
+        * running peak flux and time
+        * count of points at or below the end threshold (end of event)
+        * running fluence for the threshold channel and fluence spectrum
+
+        and only the time points after the last one that was processed are
+        looked at in each update. The definitions of the event start, end
+        and peak are the same as in calculate_threshold_crossings in
+        operational_sep_quantities.py. As in operational_sep_quantities.py,
+        only the first event after the start of the time period is followed
+        for each threshold.
+
+        Bad (negative or missing) flux values are filled in by linear
+        interpolation in time, as in check_for_bad_data in read_datasets.py,
+        but a bad value can only be filled once the next good value in the
+        same energy channel has arrived. The time points from the first bad
+        value onwards are held back until then, so once a data gap is over
+        the event state is the same as operational_sep_quantities.py finds
+        for the same time points. If the held back time points span more
+        than max_hold, they are filled with the last good value, as at the
+        end of the time period in operational_sep_quantities.py, and
+        processed. An energy channel that has never had a good value is
+        left out of the fluence spectrum and its thresholds can't be
+        crossed.
+
+        The time resolution of the feed is found from the first update that
+        brings the number of time points to at least two. Until then, the
+        time points are held back.
+
+        The onset peak and the event time profile files are not produced
+        in real time. A json file in the CCMC format is written to outpath
+        each time a threshold is crossed, a new peak flux is found, or an
+        event ends.
+
+        Run as, e.g.:
+
+        python3 realtime_sep.py --StartDate "2022-01-20" --Experiment GOES-16
+
+        which downloads the current day's GOES-R file every --Interval
+        seconds.
+
+    """
+
+
+def make_threshold_state(energy_threshold, flux_threshold, nenergy):
+    """ Make the event state for a single threshold.
+
+        INPUTS:
+
+        :energy_threshold: (float) - energy channel to which the threshold
+            is applied
+        :flux_threshold: (float) - flux threshold value
+        :nenergy: (int) - number of energy channels in the data set
+
+        OUTPUTS:
+
+        :tstate: (dict) - event state for the threshold
+
+    """
+    tstate = {"energy_threshold": energy_threshold,
+            "flux_threshold": flux_threshold,
+            "end_threshold": vars.endfac*flux_threshold,
+            "nabove": 0, #consecutive points at or above threshold
+            "recent": [], #points that may become the start of the event
+            "crossing_time": 0,
+            "peak_flux": 0,
+            "peak_time": 0,
+            "max_flux": 0, #max flux when threshold not crossed
+            "max_time": 0,
+            "nbelow": 0, #points at or below end threshold
+            "pending": [], #points that may be after the event end
+            "ended": False,
+            "event_end_time": 0,
+            "fluence": 0., #sum of flux, without time resolution and 4pi
+            "fluence_spectrum": np.zeros(nenergy)
+            }
+    return tstate
+
+
+def make_event_state(experiment, flux_type, energy_thresholds,
+        flux_thresholds, energy_bins, options, time_resolution=None):
+    """ Make the event state for all of the thresholds. Pass the state
+        to update_event_state with the new time points as they arrive.
+
+        INPUTS:
+
+        :experiment: (string)
+        :flux_type: (string) - integral or differential
+        :energy_thresholds: (float 1xn array) - energy channels to which the
+            flux thresholds are applied
+        :flux_thresholds: (float 1xn array) - flux threshold values
+        :energy_bins: (float px2 array) - energy bins of the data set
+        :options: (string array) - options applied to the data set
+        :time_resolution: (timedelta) - time resolution of the data feed;
+            found from the first update if not specified
+
+        OUTPUTS:
+
+        :state: (dict) - event state
+
+    """
+    nenergy = len(energy_bins)
+    state = {"experiment": experiment,
+            "flux_type": flux_type,
+            "options": options,
+            "energy_bins": energy_bins,
+            "energy_thresholds": energy_thresholds,
+            "flux_thresholds": flux_thresholds,
+            "time_resolution": time_resolution,
+            "npoints": None,
+            "startdate": None,
+            "last_date": None,
+            "held_dates": None, #time points waiting to be processed
+            "held_fluxes": None,
+            "last_good_time": np.full(nenergy, np.nan), #seconds since 1970
+            "last_good_flux": np.full(nenergy, np.nan),
+            "thresholds": [make_threshold_state(energy_thresholds[i],
+                            flux_thresholds[i], nenergy)
+                            for i in range(len(flux_thresholds))]
+            }
+    if time_resolution is not None:
+        set_time_resolution(state, time_resolution)
+    return state
+
+
+def set_time_resolution(state, time_resolution):
+    """ Set the time resolution of the data feed and the number of
+        points required above or below threshold, as in
+        calculate_threshold_crossings.
+
+    """
+    state["time_resolution"] = time_resolution
+    state["npoints"] = 3 #require 3 points above threshold
+    if time_resolution.total_seconds()/60 > 15:
+        state["npoints"] = 1 #time resolution >15 mins, require one point
+
+
+def add_fluence(tstate, point):
+    """ Add a time point to the running fluence. Bad (NaN) values
+        are skipped.
+
+    """
+    if not np.isnan(point[1]):
+        tstate["fluence"] = tstate["fluence"] + point[1]
+    good = ~np.isnan(point[2])
+    tstate["fluence_spectrum"][good] = tstate["fluence_spectrum"][good] \
+                        + point[2][good]
+
+
+def add_event_point(tstate, point, npoints):
+    """ Add a time point after the threshold crossing time to the
+        event state. Updates the peak flux, the count of points at or below
+        the end threshold and the running fluence.
+        The fluence for the last npoints-1 points is held back in
+        tstate["pending"] until it is known whether they come before the
+        event end time.
+
+        INPUTS:
+
+        :tstate: (dict) - event state for a single threshold
+        :point: (list) - [date, flux in threshold channel, fluxes in all
+            energy channels]
+        :npoints: (int) - number of points required below threshold
+
+        OUTPUTS:
+
+        :changed: (bool) - True if the peak flux or end time changed
+
+    """
+    changed = False
+    date, flux = point[0], point[1]
+    if flux > tstate["peak_flux"]:
+        tstate["peak_flux"] = flux
+        tstate["peak_time"] = date
+        changed = True
+
+    #A point above end_threshold starts the count over; a point
+    #equal to end_threshold counts as the first point below
+    if flux >= tstate["end_threshold"]:
+        tstate["nbelow"] = 0
+        if flux <= tstate["end_threshold"]:
+            tstate["nbelow"] = 1
+    elif flux <= tstate["end_threshold"]:
+        tstate["nbelow"] = tstate["nbelow"] + 1
+
+    tstate["pending"].append(point)
+    if len(tstate["pending"]) < npoints:
+        return changed
+
+    #The oldest pending point is npoints-1 back; if the event ends here,
+    #it is the event end time
+    oldest = tstate["pending"].pop(0)
+    add_fluence(tstate, oldest)
+    if tstate["nbelow"] >= npoints:
+        tstate["ended"] = True
+        tstate["event_end_time"] = oldest[0]
+        tstate["pending"] = []
+        changed = True
+
+    return changed
+
+
+def add_point(tstate, point, npoints):
+    """ Add a single time point to the event state for a single threshold.
+        Before the threshold is crossed, the last npoints-1 points are
+        kept so that they can be added to the event once it starts.
+
+        INPUTS:
+
+        :tstate: (dict) - event state for a single threshold
+        :point: (list) - [date, flux in threshold channel, fluxes in all
+            energy channels]
+        :npoints: (int) - number of points required above threshold
+
+        OUTPUTS:
+
+        :changed: (bool) - True if the event state changed
+
+    """
+    if tstate["ended"]:
+        return False
+    #The threshold channel has never had a good value
+    if np.isnan(point[1]):
+        return False
+    if tstate["crossing_time"] != 0:
+        return add_event_point(tstate, point, npoints)
+
+    changed = False
+    date, flux = point[0], point[1]
+    if flux > tstate["max_flux"] or tstate["max_time"] == 0:
+        tstate["max_flux"] = flux
+        tstate["max_time"] = date
+        changed = True
+
+    tstate["nabove"] = tstate["nabove"] + 1
+    if flux < tstate["flux_threshold"]:
+        tstate["nabove"] = 0
+    tstate["recent"].append(point)
+    if tstate["nabove"] < npoints:
+        tstate["recent"] = tstate["recent"][len(tstate["recent"])-npoints+1:]
+        return changed
+
+    #Threshold crossed at the first of the last npoints points
+    start = tstate["recent"]
+    tstate["recent"] = []
+    tstate["crossing_time"] = start[0][0]
+    for point in start:
+        add_event_point(tstate, point, npoints)
+    return True
+
+
+def count_ready_points(state, dates, fluxes):
+    """ Count the time points at the start of dates that can be processed.
+        A bad (NaN) value can only be filled by interpolation once a later
+        good value in the same energy channel is known, so the time points
+        from the first bad value without a later good value are held back.
+        Energy channels that have never had a good value don't hold back
+        the time points.
+
+        INPUTS:
+
+        :state: (dict) - event state
+        :dates: (datetime64 1xm array) - held and new time points
+        :fluxes: (float pxm array) - fluxes with NaN for bad values
+
+        OUTPUTS:
+
+        :nready: (int) - number of time points that can be processed
+
+    """
+    ndates = len(dates)
+    good = ~np.isnan(fluxes)
+    has_good = good.any(axis=1)
+    last_good = ndates - 1 - np.argmax(good[:,::-1], axis=1)
+    waiting = (has_good | ~np.isnan(state["last_good_flux"])) \
+            & (~has_good | (last_good < ndates - 1))
+    if not waiting.any():
+        return ndates
+
+    #Time points after the last good value in a waiting channel
+    nready = int(np.min(np.where(has_good[waiting], last_good[waiting] + 1,
+                    0)))
+    if nready < ndates and datasets.to_datetime(dates[-1]) \
+        - datasets.to_datetime(dates[nready]) > max_hold:
+        print('update_event_state: No good values since '
+            + str(dates[nready]) + ' in some energy channels. Filling with '
+            'the last good value.')
+        nready = ndates
+    return nready
+
+
+def fill_bad_points(state, dates, fluxes, nready):
+    """ Fill the bad (NaN) values in the first nready time points by
+        linear interpolation in time using the good values immediately
+        surrounding the data gap, as in check_for_bad_data. The last good
+        value in each channel is kept in the state for the next update.
+
+        INPUTS:
+
+        :state: (dict) - event state
+        :dates: (datetime64 1xm array) - held and new time points
+        :fluxes: (float pxm array) - fluxes with NaN for bad values
+        :nready: (int) - number of time points to fill
+
+        OUTPUTS:
+
+        :filled: (float pxn array) - fluxes for the first nready time points
+
+    """
+    seconds = datasets.dates_to_epoch(dates)/1.e6
+    filled = np.array(fluxes[:,:nready])
+    for i in range(len(fluxes)):
+        good = ~np.isnan(fluxes[i])
+        bad = ~good[:nready]
+        xgood = seconds[good]
+        fgood = fluxes[i,good]
+        if not np.isnan(state["last_good_flux"][i]):
+            xgood = np.concatenate(([state["last_good_time"][i]], xgood))
+            fgood = np.concatenate(([state["last_good_flux"][i]], fgood))
+        if bad.any() and len(xgood) > 0:
+            #np.interp holds the first and last good values constant
+            filled[i,bad] = np.interp(seconds[:nready][bad], xgood, fgood)
+
+        ready_good = np.flatnonzero(good[:nready])
+        if len(ready_good) > 0:
+            state["last_good_time"][i] = seconds[ready_good[-1]]
+            state["last_good_flux"][i] = fluxes[i,ready_good[-1]]
+
+    return filled
+
+
+def update_event_state(state, dates, fluxes):
+    """ Add new time points to the event state. dates and fluxes may
+        contain time points that were already passed in a previous update;
+        only the time points after the last one processed are used.
+
+        INPUTS:
+
+        :state: (dict) - event state from make_event_state
+        :dates: (datetime64 1xm array) - time points
+        :fluxes: (float pxm array) - fluxes in all p energy channels of the
+            data set
+
+        OUTPUTS:
+
+        :changed: (bool) - True if a threshold was crossed, a new peak flux
+            was found, or an event ended
+
+        Time points that can't be processed yet (see count_ready_points
+        and about_realtime_sep) are kept in the state and processed in a
+        later update.
+
+    """
+    dates = datasets.to_datetime64(dates)
+    fluxes = np.asarray(fluxes, dtype=float)
+    if state["last_date"] is not None:
+        first = np.searchsorted(dates, state["last_date"], side='right')
+        dates = dates[first:]
+        fluxes = fluxes[:,first:]
+    if len(dates) == 0:
+        return False
+
+    if state["startdate"] is None:
+        state["startdate"] = datasets.to_datetime(dates[0])
+    state["last_date"] = dates[-1]
+
+    #Bad points are NaN until they are filled
+    quality = datasets.make_quality_mask(fluxes)
+    fluxes = np.where(datasets.usable_data(fluxes, quality), fluxes, np.nan)
+    if state["held_dates"] is not None:
+        dates = np.concatenate((state["held_dates"], dates))
+        fluxes = np.concatenate((state["held_fluxes"], fluxes), axis=1)
+
+    #The time resolution needs at least two time points
+    nready = 0
+    if state["time_resolution"] is None and len(dates) > 1:
+        set_time_resolution(state,
+            datasets.find_time_resolution(dates)["time_resolution"])
+    if state["time_resolution"] is not None:
+        nready = count_ready_points(state, dates, fluxes)
+
+    state["held_dates"] = dates[nready:]
+    state["held_fluxes"] = fluxes[:,nready:]
+    if nready == 0:
+        return False
+    fluxes = fill_bad_points(state, dates, fluxes, nready)
+    dates = dates[:nready]
+    npoints = state["npoints"]
+
+    integral_fluxes = sep.extract_integral_fluxes(fluxes, state["experiment"],
+                    state["flux_type"], state["flux_thresholds"],
+                    state["energy_thresholds"], state["energy_bins"],
+                    state["options"], False)
+
+    dates = datasets.to_datetime(dates)
+    changed = False
+    for i in range(len(state["thresholds"])):
+        tstate = state["thresholds"][i]
+        for j in range(len(dates)):
+            point = [dates[j], integral_fluxes[i][j], fluxes[:,j]]
+            if add_point(tstate, point, npoints):
+                changed = True
+
+    return changed
+
+
+def get_event_values(state):
+    """ Get the SEP event quantities for all of the thresholds from the
+        event state, in the form returned by calculate_event_info.
+        For an event that hasn't ended, the event end time is the last
+        time point and the fluence includes all of the time points
+        since the threshold crossing time that have been processed
+        (time points held back waiting for a data gap to end are not
+        included).
+
+        INPUTS:
+
+        :state: (dict) - event state
+
+        OUTPUTS:
+
+        :crossing_time: (datetime 1xn array)
+        :peak_flux: (float 1xn array)
+        :peak_time: (datetime 1xn array)
+        :rise_time: (timedelta 1xn array)
+        :event_end_time: (datetime 1xn array)
+        :duration: (timedelta 1xn array)
+        :all_threshold_fluences: (float 1xn array) - fluence in the threshold
+            channel
+        :all_fluence: (float nxp array) - fluence spectrum in the energy
+            channels of the data set
+
+    """
+    nthresh = len(state["thresholds"])
+    nenergy = len(state["energy_bins"])
+    crossing_time = [0]*nthresh
+    peak_flux = [0]*nthresh
+    peak_time = [0]*nthresh
+    rise_time = [0]*nthresh
+    event_end_time = [0]*nthresh
+    duration = [0]*nthresh
+    all_threshold_fluences = [0]*nthresh
+    all_fluence = np.zeros(shape=(nthresh,nenergy))
+    if state["time_resolution"] is None:
+        return crossing_time, peak_flux, peak_time, rise_time, \
+            event_end_time, duration, all_threshold_fluences, all_fluence
+
+    last_date = datasets.to_datetime(state["last_date"])
+    fluence_fac = state["time_resolution"].total_seconds()*4.0*math.pi
+    for i in range(nthresh):
+        tstate = state["thresholds"][i]
+        if tstate["crossing_time"] == 0:
+            peak_flux[i] = tstate["max_flux"]
+            peak_time[i] = tstate["max_time"]
+            continue
+
+        fluence = tstate["fluence"]
+        fluence_spectrum = np.copy(tstate["fluence_spectrum"])
+        event_end_time[i] = tstate["event_end_time"]
+        if not tstate["ended"]:
+            event_end_time[i] = last_date
+            for point in tstate["pending"]:
+                if not np.isnan(point[1]):
+                    fluence = fluence + point[1]
+                good = ~np.isnan(point[2])
+                fluence_spectrum[good] = fluence_spectrum[good] + point[2][good]
+
+        crossing_time[i] = tstate["crossing_time"]
+        peak_flux[i] = tstate["peak_flux"]
+        peak_time[i] = tstate["peak_time"]
+        if peak_time[i] != 0:
+            rise_time[i] = peak_time[i] - crossing_time[i]
+            duration[i] = event_end_time[i] - crossing_time[i]
+        all_threshold_fluences[i] = fluence*fluence_fac
+        all_fluence[i] = fluence_spectrum*fluence_fac
+
+    return crossing_time, peak_flux, peak_time, rise_time, event_end_time, \
+        duration, all_threshold_fluences, all_fluence
+
+
+def write_event_json(state):
+    """ Write the current event state to a json file in the CCMC format.
+        The file for a given start date is written over with each update.
+
+        INPUTS:
+
+        :state: (dict) - event state
+
+        OUTPUTS:
+
+        :jsonfname: (string) - name of the json file
+
+    """
+    experiment = state["experiment"]
+    flux_type = state["flux_type"]
+    energy_thresholds = state["energy_thresholds"]
+    nthresh = len(energy_thresholds)
+    crossing_time, peak_flux, peak_time, rise_time, event_end_time, \
+        duration, all_threshold_fluences, all_fluence = get_event_values(state)
+
+    type = "observations"
+    template = ccmc_json.read_in_json_template(type)
+
+    options = state["options"]
+    modifier = ''
+    if options[0] != '':
+        options = sorted(options) #to always make consistent filenames
+        for opt in options:
+            modifier = modifier + '_' + opt
+
+    now = datetime.datetime.now()
+    issue_time = ccmc_json.make_ccmc_zulu_time(now)
+    startdate = state["startdate"]
+    enddate = datasets.to_datetime(state["last_date"])
+    zstdate = ccmc_json.make_ccmc_zulu_time(startdate)
+    fnameprefix = experiment + "_" + flux_type + modifier + "." \
+                + zstdate.replace(":","") + ".realtime"
+    jsonfname = outpath + '/' + fnameprefix + ".json"
+
+    #Onset peak and time profile files aren't made in real time;
+    #empty values are removed by clean_json
+    filled_json = ccmc_json.fill_json(template, issue_time,
+                    experiment, flux_type, type,
+                    state["energy_bins"], '', '', startdate, enddate,
+                    options, energy_thresholds, state["flux_thresholds"],
+                    crossing_time, [""]*nthresh, [None]*nthresh, peak_flux,
+                    peak_time, rise_time, event_end_time, duration,
+                    all_threshold_fluences, [False]*nthresh, all_fluence,
+                    False, [], [], [""]*nthresh,
+                    sep.energy_units, sep.flux_units_integral,
+                    sep.fluence_units_integral, sep.flux_units_differential,
+                    sep.fluence_units_differential)
+
+    filled_json = ccmc_json.clean_json(filled_json, experiment, type)
+    isgood = ccmc_json.write_json(filled_json, jsonfname)
+    if not isgood:
+        print("WARNING: ccmc_json_handler: write_json could not write your " \
+                "file "+ str(jsonfname))
+
+    return jsonfname
+
+
+def fetch_goesR_RT(startdate, enddate):
+    """ Download the GOES-R real time integral flux files for every day
+        from startdate to enddate. Files that are already on your computer
+        are downloaded again, since the current day's file grows through
+        the day. A file that can't be downloaded is left as it is.
+
+        INPUTS:
+
+        :startdate: (datetime) - first day
+        :enddate: (datetime) - last day
+
+        OUTPUTS:
+
+        :filenames: (string array) - files relative to datapath that are
+            on your computer
+
+    """
+    prefix = '_Gp_part_5m' #primary spacecraft, as in check_goesR_RTdata
+    ndays = (enddate.date() - startdate.date()).days + 1
+    filenames = []
+    downloads = []
+    for i in range(ndays):
+        date = startdate + datetime.timedelta(days=i)
+        fname = '%i%02i%02i' % (date.year,date.month,date.day) \
+                + prefix + '.txt'
+        url=('https://iswa.gsfc.nasa.gov/iswa_data_tree/observation/magnetosphere/goes_p/particle/%i/%02i/%s' % (date.year,date.month,fname))
+        downloads.append([[url, datapath + '/GOES-R/' + fname]])
+        filenames.append('GOES-R/' + fname)
+
+    fetched, errors = fetch.fetch_files(downloads)
+    for i in range(ndays):
+        if fetched[i] is None:
+            print("fetch_goesR_RT: Could not download " + downloads[i][0][0]
+                + " (" + str(errors[i]) + ")")
+
+    return [fname for fname in filenames
+            if os.path.isfile(datapath + '/' + fname)]
+
+
+def run_realtime(str_startdate, experiment, str_thresh, options, interval,
+        nupdates=0):
+    """ Follow the SEP event quantities in the GOES-R real time integral
+        fluxes starting at str_startdate. The files are downloaded again
+        every interval seconds and a json file is written when the event
+        state changes.
+
+        INPUTS:
+
+        :str_startdate: (string) - start of time period "YYYY-MM-DD" or
+            "YYYY-MM-DD HH:MM:SS"
+        :experiment: (string) - GOES-16 or GOES-17
+        :str_thresh: (string) - additional integral thresholds, as for
+            operational_sep_quantities.py, e.g. "30,1;50,1"
+        :options: (string) - options separated by semi-colons
+        :interval: (int) - seconds between updates
+        :nupdates: (int) - number of updates before stopping; 0 to keep
+            running
+
+        OUTPUTS:
+
+        :state: (dict) - event state after the last update
+
+    """
+    if experiment != "GOES-16" and experiment != "GOES-17":
+        sys.exit("run_realtime: Real time fluxes are only available for "
+                "GOES-16 and GOES-17. Exiting.")
+    flux_type = "integral"
+    options = options.split(";")
+    datasets.check_paths()
+
+    input_threshold = []
+    is_diff_thresh = []
+    if str_thresh != "":
+        str_thresh = str_thresh.strip().split(";")
+        for kk in range(len(str_thresh)):
+            str_thresh[kk] = str_thresh[kk].strip().split(",")
+        input_threshold, is_diff_thresh = sep.get_input_thresholds(str_thresh)
+    if True in is_diff_thresh:
+        sys.exit("run_realtime: Thresholds can only be applied to the "
+                "integral channels. Exiting.")
+
+    startdate = sep.str_to_datetime(str_startdate)
+    energy_bins = datasets.define_energy_bins(experiment, flux_type, [],
+                                options)
+    energy_thresholds, flux_thresholds = sep.define_thresholds(
+                input_threshold, is_diff_thresh, str_thresh, energy_bins,
+                flux_type, False)
+    state = make_event_state(experiment, flux_type, energy_thresholds,
+                flux_thresholds, energy_bins, options)
+
+    nupdate = 0
+    while nupdates <= 0 or nupdate < nupdates:
+        if nupdate > 0:
+            time.sleep(interval)
+        nupdate = nupdate + 1
+
+        #Only the files from the day of the last time point onwards
+        #can have new time points
+        firstday = startdate
+        if state["last_date"] is not None:
+            firstday = datasets.to_datetime(state["last_date"])
+        filenames = fetch_goesR_RT(firstday, datetime.datetime.utcnow())
+        if len(filenames) == 0:
+            continue
+
+        results = [datasets.read_in_goesR_RT_file(fname)
+                    for fname in filenames]
+        dates = np.concatenate([result[0] for result in results])
+        fluxes = np.concatenate([result[1] for result in results], axis=1)
+        first = np.searchsorted(dates, datasets.to_datetime64(startdate),
+                    side='left')
+        dates = dates[first:]
+        fluxes = fluxes[:,first:]
+        if update_event_state(state, dates, fluxes):
+            write_event_json(state)
+
+    return state
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--StartDate", type=str, default='',
+            help="Start date in YYYY-MM-DD or \"YYYY-MM-DD HH:MM:SS\""
+                    " with quotes")
+    parser.add_argument("--Experiment", type=str, choices=['GOES-16',
+            'GOES-17'], default='GOES-16', help="Primary GOES-R spacecraft")
+    parser.add_argument("--Threshold", type=str, default="",
+            help=("Description: Additional integral thresholds to apply, "
+                    "e.g. \"30,1;50,1\". The >10 MeV, 10 pfu and >100 MeV, "
+                    "1 pfu thresholds are always applied."))
+    parser.add_argument("--options", type=str, default='',
+            help="Options separated by semi-colons")
+    parser.add_argument("--Interval", type=int, default=300,
+            help="Seconds between updates. Default=300 (5 minutes)")
+    parser.add_argument("--NUpdates", type=int, default=0,
+            help="Number of updates before stopping. Default=0 (no limit)")
+
+    args = parser.parse_args()
+
+    if args.StartDate == "":
+        sys.exit('You must enter a valid start date. Exiting.')
+
+    run_realtime(args.StartDate, args.Experiment, args.Threshold,
+        args.options, args.Interval, args.NUpdates)
@@ -0,0 +1,269 @@
+import operational_sep_quantities as sep
+from library import read_datasets as datasets
+from library import global_vars as vars
+import numpy as np
+import argparse
+import datetime
+import sys
+import os
+
+__version__ = "0.1"
+__author__ = "Katie Whitman"
+__maintainer__ = "Katie Whitman"
+__email__ = "kathryn.whitman@nasa.gov"
+
+#2026-10-17, Version 0.1: Find every SEP event in a long time period
+#   (e.g. a whole mission) for a single experiment and write the event
+#   lists in the same format as run_multi_sep.py.
+
+listpath = vars.listpath
+
+
+def about_sep_catalog():
+    """ About sep_catalog.py
+
+        Makes SEP event lists for a whole mission in a single pass, rather
+        than running operational_sep_quantities.py for a list of date ranges
+        with run_multi_sep.py.
+
+        The fluxes for the full time period are read in once (see
+        data_store.py for the full-mission store) and every threshold crossing
+        is found for each threshold with find_all_threshold_crossings in
+        operational_sep_quantities.py. The event start, end and peak are
+        defined in the same way as in operational_sep_quantities.py. Once an
+        event ends, the search for the next event starts at the point after
+        the end time.
+
+        For each event:
+
+        * The onset peak is found with calculate_onset_peak_from_fit using
+          the fluxes from 6 hours before to 24 hours after the threshold
+          crossing time
+        * The fluence is calculated for the channel with the threshold
+          between the start and end times
+
+        One list is written to listpath for each threshold, with the same
+        file names and columns as write_sep_lists in run_multi_sep.py:
+
+            Experiment,SEP Date,Start Time,End Time,Onset Peak Flux,
+            Onset Peak Time,Max Flux,Max Flux Time,Channel Fluence
+
+        Thresholds may be applied to integral channels or to integral fluxes
+        estimated from differential fluxes, as for the >10 MeV, 10 pfu and
+        >100 MeV, 1 pfu thresholds.
+
+        Run as, e.g.:
+
+        python3 sep_catalog.py --StartDate 1986-01-01 --EndDate 2017-12-31 --Experiment SEPEM --FluxType differential --Threshold "30,1;50,1"
+
+    """
+
+
+def check_list_path():
+    """Check if the path listpath (global_vars.py) exists"""
+    if not os.path.isdir(listpath):
+        print('check_paths: Directory containing lists, ' + listpath +
+        ', does not exist. Creating.')
+        os.mkdir(listpath);
+
+
+def write_catalog(experiment, options, energy_threshold, flux_threshold,
+        crossing_time, end_time, onset_peak, onset_date, peak_flux,
+        peak_time, fluence):
+    """ Write the list of events for a single threshold. The file name
+        and columns are the same as the lists made by write_sep_lists in
+        run_multi_sep.py.
+
+        INPUTS:
+
+        :experiment: (string)
+        :options: (string array) - options applied to the data set
+        :energy_threshold: (float) - integral energy channel
+        :flux_threshold: (float) - threshold in pfu
+        :crossing_time: (datetime 1xp array) - start time of each event
+        :end_time: (datetime 1xp array) - end time of each event
+        :onset_peak: (float 1xp array) - onset peak flux
+        :onset_date: (datetime 1xp array) - onset peak time
+        :peak_flux: (float 1xp array) - maximum flux
+        :peak_time: (datetime 1xp array) - maximum flux time
+        :fluence: (float 1xp array) - fluence in the threshold channel
+
+        OUTPUTS:
+
+        :threshfile: (string) - name of the list file
+
+    """
+    exp_name = experiment
+    for opt in sorted(options):
+        if opt.strip() == "": continue
+        exp_name = exp_name + "_" + opt.strip()
+
+    #NOTE WILL WRITE OVER LIST FROM PREVIOUS RUNS UNLESS RENAMED
+    threshfile = listpath + '/' +'sep_list_' + str(energy_threshold) + 'MeV_' \
+            + str(flux_threshold) + 'pfu.csv'
+    bin_def = '>'+str(energy_threshold) + ' MeV [cm-2 sr-1]'
+
+    fin = open(threshfile,'w+')
+    fin.write('#Experiment,SEP Date,Start Time,End Time,Onset Peak Flux,'
+                'Onset Peak Time,Max Flux,Max Flux Time,Channel Fluence '+bin_def)
+    fin.write('\n')
+    for j in range(len(crossing_time)):
+        op = onset_peak[j]
+        if op is not None:
+            op = float(op)
+        date = '{0:d}-{1:02d}-{2:02d}'.format(crossing_time[j].year,
+                    crossing_time[j].month, crossing_time[j].day)
+        fin.write(exp_name + ',')
+        fin.write(date + ',')
+        fin.write(str(crossing_time[j]) + ',')
+        fin.write(str(end_time[j]) + ',')
+        fin.write(str(op) + ',')
+        fin.write(str(onset_date[j]) + ',')
+        fin.write(str(float(peak_flux[j])) + ',')
+        fin.write(str(peak_time[j]) + ',')
+        fin.write(str(float(fluence[j])))
+        fin.write('\n')
+    fin.close()
+    print('Wrote ' + str(len(crossing_time)) + ' events to ' + threshfile)
+
+    return threshfile
+
+
+def scan_catalog(str_startdate, str_enddate, experiment, flux_type,
+        str_thresh, options, nointerp=False, doonset=True):
+    """ Find all of the SEP events between str_startdate and str_enddate
+        for the >10 MeV, 10 pfu and >100 MeV, 1 pfu thresholds and any
+        thresholds in str_thresh and write an event list for each threshold.
+
+        INPUTS:
+
+        :str_startdate: (string) - start of time period "YYYY-MM-DD" or
+            "YYYY-MM-DD HH:MM:SS"
+        :str_enddate: (string) - end of time period
+        :experiment: (string) - native data set, e.g. GOES-13, SEPEM, GOES-16
+        :flux_type: (string) - integral or differential
+        :str_thresh: (string) - additional thresholds applied to integral
+            channels, as for operational_sep_quantities.py, e.g. "30,1;50,1"
+        :options: (string) - options separated by semi-colons
+        :nointerp: (bool) - set to True to leave bad points out rather than
+            filling them in with linear interpolation in time
+        :doonset: (bool) - set to False to skip the onset peak fits
+
+        OUTPUTS:
+
+        :threshfiles: (string 1xn array) - names of the list files
+
+    """
+    if (str_startdate == "" or str_enddate == ""):
+        sys.exit('You must enter a valid date range. Exiting.')
+    if experiment == "user":
+        sys.exit("scan_catalog: Only native data sets may be scanned. "
+                "Exiting.")
+
+    options = options.split(";")
+    input_threshold = []
+    is_diff_thresh = []
+    if str_thresh != "":
+        str_thresh = str_thresh.strip().split(";")
+        for kk in range(len(str_thresh)):
+            str_thresh[kk] = str_thresh[kk].strip().split(",")
+        input_threshold, is_diff_thresh = sep.get_input_thresholds(str_thresh)
+    if True in is_diff_thresh:
+        sys.exit("scan_catalog: Thresholds can only be applied to integral "
+                "channels. Exiting.")
+
+    startdate = sep.str_to_datetime(str_startdate)
+    enddate = sep.str_to_datetime(str_enddate)
+    sep.error_check_options(experiment, flux_type, options, False)
+    sep.error_check_inputs(startdate, enddate, experiment, flux_type, '',
+                is_diff_thresh)
+    datasets.check_paths()
+    check_list_path()
+
+    #READ IN FLUXES FOR THE WHOLE TIME PERIOD
+    dates, fluxes, energy_bins, quality = sep.read_in_flux_files(experiment,
+        flux_type, '', '', startdate, enddate, str_startdate, str_enddate,
+        '', '', options, False, nointerp, False, False)
+
+    energy_thresholds, flux_thresholds = sep.define_thresholds(
+                input_threshold, is_diff_thresh, str_thresh, energy_bins,
+                flux_type, False)
+    integral_fluxes = sep.extract_integral_fluxes(fluxes, experiment,
+                flux_type, flux_thresholds, energy_thresholds, energy_bins,
+                options, False, quality)
+
+    crossing_time, peak_flux, peak_time, rise_time, event_end_time, \
+        duration = sep.find_all_threshold_crossings(energy_thresholds,
+                flux_thresholds, dates, integral_fluxes)
+
+    threshfiles = []
+    for i in range(len(energy_thresholds)):
+        nevents = len(crossing_time[i])
+        print("Found " + str(nevents) + " events for >"
+            + str(energy_thresholds[i]) + " MeV, " + str(flux_thresholds[i])
+            + " pfu.")
+        onset_peak = [None]*nevents
+        onset_date = [None]*nevents
+        fluence = [0]*nevents
+        for j in range(nevents):
+            ct = crossing_time[i][j]
+            eet = event_end_time[i][j]
+            nst, nend = datasets.extract_date_range_indices(ct, eet, dates)
+            fluence[j] = sep.calculate_fluence(dates[nst:nend],
+                            integral_fluxes[i,nst:nend])
+
+            if doonset:
+                #Onset peak fit uses 6 hours before to 24 hours after
+                #the threshold crossing
+                nst, nend = datasets.extract_date_range_indices(
+                            ct - datetime.timedelta(hours=6),
+                            ct + datetime.timedelta(hours=24), dates)
+                od, op = sep.calculate_onset_peak_from_fit(experiment,
+                            [energy_thresholds[i]], dates[nst:nend],
+                            integral_fluxes[i:i+1,nst:nend], [ct], [eet],
+                            False, False)
+                onset_date[j] = od[0]
+                onset_peak[j] = op[0]
+
+        threshfiles.append(write_catalog(experiment, options,
+                energy_thresholds[i], flux_thresholds[i], crossing_time[i],
+                event_end_time[i], onset_peak, onset_date, peak_flux[i],
+                peak_time[i], fluence))
+
+    return threshfiles
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--StartDate", type=str, default='',
+            help="Start date in YYYY-MM-DD or \"YYYY-MM-DD HH:MM:SS\""
+                    " with quotes")
+    parser.add_argument("--EndDate", type=str, default='',
+            help="End date in YYYY-MM-DD or \"YYYY-MM-DD HH:MM:SS\""
+                    " with quotes")
+    parser.add_argument("--Experiment", type=str, choices=['GOES-08',
+            'GOES-10', 'GOES-11', 'GOES-12', 'GOES-13', 'GOES-14', 'GOES-15',
+            'GOES-16', 'GOES-17', 'SEPEM', 'SEPEMv3', 'EPHIN',
+            'EPHIN_REleASE', 'SRAG12', 'STEREO-A', 'STEREO-B'],
+            default='', help="Entry for native data set")
+    parser.add_argument("--FluxType", type=str, choices=['integral',
+            'differential'], default='',
+            help=("Do you want to use integral or differential fluxes?"))
+    parser.add_argument("--Threshold", type=str, default="",
+            help=("Additional integral thresholds to apply, e.g. "
+                    "\"30,1;50,1\". The >10 MeV, 10 pfu and >100 MeV, 1 pfu "
+                    "thresholds are always applied."))
+    parser.add_argument("--options", type=str, default='',
+            help="Options separated by semi-colons, e.g. \"S14;Bruno2017\"")
+    parser.add_argument("--NoInterp",
+            help=("Do not fill in negative or missing fluxes via "
+                    "linear interpolation in time."), action="store_true")
+    parser.add_argument("--NoOnset",
+            help="Do not fit the onset peak of each event.",
+            action="store_true")
+
+    args = parser.parse_args()
+
+    scan_catalog(args.StartDate, args.EndDate, args.Experiment,
+        args.FluxType, args.Threshold, args.options, args.NoInterp,
+        not args.NoOnset)
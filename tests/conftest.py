@@ -0,0 +1,6 @@
+import os
+import sys
+
+#The modules are imported from the top level of the repository, as when
+#operational_sep_quantities.py is run from there
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
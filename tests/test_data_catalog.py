@@ -0,0 +1,60 @@
+import datetime
+import numpy as np
+import pytest
+from library import data_catalog as catalog
+
+prefix = 'GOES-R/sci_sgps-l2-avg5m_g16_'
+
+
+def one_day(day):
+    """ 5 minute time stamps for one day. """
+    return list(np.arange(np.datetime64(day, 'us'),
+                    np.datetime64(day, 'us') + np.timedelta64(1, 'D'),
+                    np.timedelta64(5, 'm')).astype(datetime.datetime))
+
+
+@pytest.fixture
+def goesR(tmp_path, monkeypatch):
+    monkeypatch.setattr(catalog, 'datapath', str(tmp_path))
+    monkeypatch.setattr(catalog, 'catalog_file', str(tmp_path) + '/catalog.db')
+    (tmp_path / 'GOES-R').mkdir()
+
+    def register(filename, dates):
+        (tmp_path / filename).write_text(filename)
+        catalog.register_files('GOES-16', 'SGPS', 'differential', [filename],
+                        [dates])
+    return register
+
+
+def lookup():
+    return catalog.lookup_files('GOES-16', 'SGPS', 'differential',
+                datetime.datetime(2017,9,10), datetime.datetime(2017,9,11,23))
+
+
+def test_split_version():
+    assert catalog.split_version(prefix + 'd20170910_v3-0-1.nc') \
+        == (prefix + 'd20170910.nc', (3,0,1))
+    assert catalog.split_version('GOES-R/se_sgps-l2-avg5m_g16_s20172440000000'
+        '_e20172732355000_v2_0_0.nc')[1] == (2,0,0)
+    assert catalog.split_version('SEPEM/SEPEM_H_GOES.csv') \
+        == ('SEPEM/SEPEM_H_GOES.csv', ())
+
+
+def test_two_versions_of_one_day(goesR):
+    goesR(prefix + 'd20170910_v3-0-1.nc', one_day('2017-09-10'))
+    goesR(prefix + 'd20170910_v1-0-1.nc', one_day('2017-09-10'))
+    goesR(prefix + 'd20170911_v2-0-0.nc', one_day('2017-09-11'))
+
+    assert lookup() == [prefix + 'd20170910_v3-0-1.nc',
+                        prefix + 'd20170911_v2-0-0.nc']
+
+
+def test_overlapping_files_rejected(goesR):
+    goesR(prefix + 'd20170910_v3-0-1.nc', one_day('2017-09-10'))
+    goesR(prefix + 'd20170911_v2-0-0.nc', one_day('2017-09-11'))
+    assert lookup() is not None
+
+    #The same days in a single file, as for the September 2017 event file
+    goesR('GOES-R/se_sgps-l2-avg5m_g16_s20172530000000_e20172542355000'
+        '_v2_0_0.nc', one_day('2017-09-10') + one_day('2017-09-11'))
+    assert lookup() is None
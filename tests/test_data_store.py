@@ -0,0 +1,142 @@
+import datetime
+import json
+import time
+import multiprocessing
+import numpy as np
+import pytest
+from library import data_store as store
+from library import read_datasets as datasets
+
+startdate = datetime.datetime(2012,3,7)
+enddate = datetime.datetime(2012,3,8)
+
+
+def make_goes_data():
+    """ Two days of 5 minute GOES-13 like data with a yaw flip. """
+    dates = np.arange(np.datetime64('2012-03-06T00:00', 'us'),
+                    np.datetime64('2012-03-09T00:00', 'us'),
+                    np.timedelta64(5, 'm'))
+    fluxes = np.tile(np.linspace(1., 100., len(dates)), (3,1))
+    west = np.full(len(dates), datasets.west_A)
+    west[len(dates)//2:] = datasets.west_B
+    flip = slice(len(dates)//2 - 5, len(dates)//2 + 5)
+    west[flip] = datasets.west_flip
+    fluxes[:,flip] = datasets.badval
+    return dates, fluxes, west
+
+
+@pytest.fixture
+def goes(tmp_path, monkeypatch):
+    monkeypatch.setattr(store, 'datapath', str(tmp_path))
+    monkeypatch.setattr(store, 'storepath', str(tmp_path) + '/store')
+    for fname in ('eps.csv', 'hepad.csv', 'orien.csv'):
+        (tmp_path / fname).write_text('data')
+
+    monkeypatch.setattr(datasets, 'check_data',
+        lambda *args: (['eps.csv'], ['hepad.csv'], ['orien.csv']))
+    calls = []
+    def read_in_files(experiment, flux_type, filenames1, filenames2,
+                filenames_orien, options, startdate=None, enddate=None):
+        calls.append(filenames1)
+        return make_goes_data()
+    monkeypatch.setattr(datasets, 'read_in_files', read_in_files)
+    return calls
+
+
+def read(use_store, monkeypatch):
+    monkeypatch.setattr(store, 'use_store', use_store)
+    dates, fluxes, west = store.read_in_data(startdate, enddate, 'GOES-13',
+                            'integral', '', [''])
+    nst, nend = datasets.extract_date_range_indices(startdate, enddate, dates)
+    return dates[nst:nend], fluxes[:,nst:nend], np.asarray(west)[nst:nend]
+
+
+def test_store_keeps_west_detector(goes, monkeypatch):
+    dates1, fluxes1, west1 = read(False, monkeypatch)
+    dates2, fluxes2, west2 = read(True, monkeypatch)
+    dates3, fluxes3, west3 = read(True, monkeypatch)
+    assert len(goes) == 2 #second store read doesn't reread the files
+    for dates, fluxes, west in ((dates2, fluxes2, west2),
+                                (dates3, fluxes3, west3)):
+        assert np.array_equal(dates, dates1)
+        assert np.array_equal(fluxes, fluxes1)
+        assert np.array_equal(west, west1)
+        quality = datasets.make_quality_mask(fluxes, west)
+        assert np.array_equal(quality,
+                    datasets.make_quality_mask(fluxes1, west1))
+        assert (quality == datasets.quality_flip).any()
+
+
+def test_store_without_west_detector_started_over(goes, monkeypatch):
+    read(True, monkeypatch)
+    name = store.get_store_name('GOES-13', 'integral', [''])
+    #Store as written before the detector orientation was kept
+    with open(name + '/meta.json') as infile:
+        meta = json.load(infile)
+    del meta["west"]
+    with open(name + '/meta.json', 'w') as outfile:
+        json.dump(meta, outfile)
+
+    dates, fluxes, west = read(True, monkeypatch)
+    assert len(goes) == 2
+    assert (west == datasets.west_flip).any()
+
+
+@pytest.fixture
+def sepem(tmp_path, monkeypatch):
+    """ One SEPEM file for each day; reading a file takes a moment so that
+        two programs reading at the same time overlap.
+    """
+    monkeypatch.setattr(store, 'datapath', str(tmp_path))
+    monkeypatch.setattr(store, 'storepath', str(tmp_path) + '/store')
+    monkeypatch.setattr(store, 'use_store', True)
+    for day in (5, 6, 7):
+        (tmp_path / ('sepem_%i.csv' % day)).write_text('data')
+
+    monkeypatch.setattr(datasets, 'check_data', lambda startdate, *args:
+        (['sepem_%i.csv' % startdate.day], [], []))
+    def read_in_files(experiment, flux_type, filenames1, *args, **kwargs):
+        time.sleep(0.3)
+        day = np.datetime64('2012-03-%02i' % int(filenames1[0][6]), 'us')
+        dates = np.arange(day, day + np.timedelta64(1, 'D'),
+                    np.timedelta64(5, 'm'))
+        return dates, np.full((2, len(dates)), float(filenames1[0][6])), []
+    monkeypatch.setattr(datasets, 'read_in_files', read_in_files)
+
+
+def read_day(day):
+    startdate = datetime.datetime(2012,3,day)
+    dates, fluxes, west = store.read_in_data(startdate,
+                    startdate + datetime.timedelta(hours=23), 'SEPEM',
+                    'differential', '', [''])
+    return dates, fluxes
+
+
+def test_two_programs_update_the_store(sepem):
+    context = multiprocessing.get_context('fork')
+    programs = [context.Process(target=read_day, args=(day,))
+                for day in (7, 6)]
+    for program in programs:
+        program.start()
+    for program in programs:
+        program.join()
+        assert program.exitcode == 0
+
+    name = store.get_store_name('SEPEM', 'differential', [''])
+    meta = store.read_meta(name)
+    assert sorted(meta["files"]) == ['sepem_6.csv', 'sepem_7.csv']
+    times, fluxes, west = store.open_store(name, meta)
+    assert meta["nrow"] == 2*288
+    assert (np.diff(times) > 0).all()
+    assert np.array_equal(fluxes[:,0], np.repeat([6., 7.], 288))
+
+
+def test_merge_keeps_mapped_store(sepem):
+    dates7, fluxes7 = read_day(7)
+    before = np.array(fluxes7)
+    #Earlier data is merged into the store
+    dates5, fluxes5 = read_day(5)
+    assert np.array_equal(fluxes7, before)
+    assert (fluxes5 == 5.).all()
+    dates7, fluxes7 = read_day(7)
+    assert np.array_equal(fluxes7, before)
@@ -0,0 +1,109 @@
+from datetime import timedelta
+import numpy as np
+import pytest
+import operational_sep_quantities as sep
+from library import read_datasets as datasets
+
+energy_thresholds = [10, 100, 30]
+flux_thresholds = [10, 1, 8.5]
+
+
+def rescan_event_info(energy_thresholds, flux_thresholds, dates,
+                integral_fluxes, detect_prev_event, two_peaks):
+    """ Event values found by extracting the time period after the end of
+        the first event and running calculate_threshold_crossing on it
+        again, as calculate_event_info did before the runs above and below
+        threshold were shared.
+    """
+    dates = datasets.to_datetime64(dates)
+    last_date = dates[-1]
+    values = []
+    for i in range(len(flux_thresholds)):
+        ct,pf,pt,rt,eet,dur = sep.calculate_threshold_crossing(
+                    energy_thresholds[i], flux_thresholds[i], dates,
+                    integral_fluxes[i])
+        if detect_prev_event and ct == dates[0]:
+            tmp_dates, tmp_fluxes = datasets.extract_date_range(eet,
+                    last_date, dates, integral_fluxes)
+            ct,pf,pt,rt,eet,dur = sep.calculate_threshold_crossing(
+                    energy_thresholds[i], flux_thresholds[i], tmp_dates,
+                    tmp_fluxes[i])
+        if dur != 0 and two_peaks and dur < timedelta(days=1):
+            tmp_dates, tmp_fluxes = datasets.extract_date_range(eet,
+                    last_date, dates, integral_fluxes)
+            ct2,pf2,pt2,rt2,eet2,dur2 = sep.calculate_threshold_crossing(
+                    energy_thresholds[i], flux_thresholds[i], tmp_dates,
+                    tmp_fluxes[i])
+            if dur2 != 0 and eet2 < dates[-1]:
+                dur = eet2 - ct
+                eet = eet2
+                if pf2 > pf:
+                    pf = pf2
+                    pt = pt2
+                    rt = pt2 - ct
+        if ct == 0:
+            pf = np.amax(integral_fluxes[i])
+            pt = datasets.to_datetime(dates[np.flatnonzero(
+                    integral_fluxes[i] == pf)[0]])
+        values.append((ct,pf,pt,rt,eet,dur))
+    return tuple([list(value) for value in zip(*values)])
+
+
+def make_profiles(rng, trial):
+    """ Random walk flux profiles at several time resolutions, some
+        starting above threshold (previous event) and some with a coarser
+        time resolution in the second half.
+    """
+    n = int(rng.integers(20, 400))
+    cadence = [1, 5, 5, 5, 30, 60][trial % 6]
+    step = np.full(n-1, cadence*60)
+    if trial % 7 == 0:
+        step[n//2:] = 60*60
+    dates = np.datetime64('2012-01-01T00:00', 'us') \
+        + np.concatenate(([0], np.cumsum(step))).astype('timedelta64[s]')
+    fluxes = np.exp(rng.normal(0, 1.2, (3,n)).cumsum(axis=1)*0.3) \
+        *float(rng.choice([1, 5, 10, 30]))
+    if trial % 3 == 0:
+        fluxes[:,:5] = 50. #high from a previous event
+    #Most events end before the end of the time period. A re-scan after
+    #an event that doesn't end has a single time point and exits.
+    if trial % 5 != 0:
+        fluxes[:,-10:] = 0.1
+    return dates, fluxes
+
+
+def run(function, *args):
+    """ Return the values or the type of exception raised. """
+    try:
+        return function(*args)
+    except (SystemExit, IndexError) as err:
+        return type(err)
+
+
+@pytest.mark.parametrize('detect_prev_event,two_peaks', [(False, False),
+                        (True, False), (False, True), (True, True)])
+def test_shared_runs_match_rescan(detect_prev_event, two_peaks):
+    rng = np.random.default_rng(24)
+    nchanged = 0
+    nexcept = 0
+    for trial in range(400):
+        dates, fluxes = make_profiles(rng, trial)
+        expected = run(rescan_event_info, energy_thresholds,
+                    flux_thresholds, dates, fluxes, detect_prev_event,
+                    two_peaks)
+        values = run(sep.calculate_event_info, energy_thresholds,
+                    flux_thresholds, dates, fluxes, detect_prev_event,
+                    two_peaks, False)
+        assert values == expected, trial
+        if not isinstance(expected, tuple):
+            nexcept = nexcept + 1
+            continue
+        #Count the events changed by the re-scans
+        plain = run(rescan_event_info, energy_thresholds, flux_thresholds,
+                    dates, fluxes, False, False)
+        if isinstance(plain, tuple):
+            nchanged = nchanged + sum([1 for i in range(len(plain[4]))
+                        if plain[4][i] != expected[4][i]])
+    assert nexcept < 100
+    if detect_prev_event or two_peaks:
+        assert nchanged > 10
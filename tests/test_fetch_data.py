@@ -0,0 +1,167 @@
+import os
+import threading
+import http.server
+import pytest
+from library import fetch_data as fetch
+
+#Contents of the files on the stand-in server
+contents = bytes(range(256))*40
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """ Serves contents at /data.txt with Range requests. /chunked.txt and
+        /short.txt drop the connection part way through the file the
+        first ndrop times they are requested. Everything else is 404.
+    """
+    ndrop = {}
+
+    def log_message(self, *args):
+        pass
+
+    def do_GET(self):
+        path = self.path
+        if path not in ('/data.txt', '/chunked.txt', '/short.txt'):
+            self.send_error(404)
+            return
+
+        start = 0
+        if 'Range' in self.headers:
+            start = int(self.headers['Range'].split('=')[1].split('-')[0])
+            if start >= len(contents):
+                self.send_response(416)
+                self.send_header('Content-Range',
+                                'bytes */' + str(len(contents)))
+                self.send_header('Content-Length', '0')
+                self.end_headers()
+                return
+        body = contents[start:]
+
+        drop = StandInHandler.ndrop.get(path, 0) > 0
+        if drop:
+            StandInHandler.ndrop[path] -= 1
+        if start > 0:
+            self.send_response(206)
+            self.send_header('Content-Range', 'bytes ' + str(start) + '-'
+                + str(len(contents) - 1) + '/' + str(len(contents)))
+        else:
+            self.send_response(200)
+
+        if path == '/chunked.txt':
+            #A chunked body that stops before the last chunk raises
+            #http.client.IncompleteRead in the client
+            self.send_header('Transfer-Encoding', 'chunked')
+            self.end_headers()
+            if drop:
+                body = body[:len(body)//2]
+            self.wfile.write(('%x\r\n' % len(body)).encode() + body
+                + b'\r\n')
+            if not drop:
+                self.wfile.write(b'0\r\n\r\n')
+        else:
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            if drop:
+                body = body[:len(body)//2]
+            self.wfile.write(body)
+        self.close_connection = True
+
+
+@pytest.fixture(scope='module')
+def stand_in():
+    httpd = http.server.ThreadingHTTPServer(('127.0.0.1', 0), StandInHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield 'http://127.0.0.1:' + str(httpd.server_address[1])
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def server(stand_in, tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch, 'datapath', str(tmp_path))
+    monkeypatch.setattr(fetch, 'manifest_file',
+                        str(tmp_path) + '/fetch_manifest.json')
+    StandInHandler.ndrop = {}
+    return stand_in
+
+
+def read(fname):
+    with open(fname, 'rb') as infile:
+        return infile.read()
+
+
+def test_download(server, tmp_path):
+    destination = str(tmp_path) + '/data.txt'
+    nbytes = fetch.download_file(server + '/data.txt', destination)
+    assert nbytes == len(contents)
+    assert read(destination) == contents
+    assert not os.path.exists(destination + '.part')
+    assert 'data.txt' in fetch.read_manifest()
+
+
+def test_404_falls_back_to_next_candidate(server, tmp_path):
+    destination = str(tmp_path) + '/data.txt'
+    index, error = fetch.download_first_available(
+        [[server + '/v2.txt', destination], [server + '/data.txt',
+        destination]])
+    assert index == 1
+    assert error is None
+    assert read(destination) == contents
+
+
+def test_404_for_all_candidates(server, tmp_path):
+    destination = str(tmp_path) + '/data.txt'
+    index, error = fetch.download_first_available(
+        [[server + '/v1.txt', destination], [server + '/v2.txt',
+        destination]])
+    assert index is None
+    assert '404' in error
+    assert not os.path.exists(destination)
+
+
+def test_range_resume(server, tmp_path):
+    destination = str(tmp_path) + '/data.txt'
+    with open(destination + '.part', 'wb') as outfile:
+        outfile.write(contents[:1000])
+    fetch.download_file(server + '/data.txt', destination)
+    assert read(destination) == contents
+
+
+def test_416_complete_part(server, tmp_path):
+    destination = str(tmp_path) + '/data.txt'
+    with open(destination + '.part', 'wb') as outfile:
+        outfile.write(contents)
+    fetch.download_file(server + '/data.txt', destination)
+    assert read(destination) == contents
+
+
+def test_416_oversized_part(server, tmp_path):
+    #A .part file larger than the file on the server is not accepted;
+    #the file is downloaded again from the beginning
+    destination = str(tmp_path) + '/data.txt'
+    with open(destination + '.part', 'wb') as outfile:
+        outfile.write(contents + b'extra bytes')
+    fetch.download_file(server + '/data.txt', destination)
+    assert read(destination) == contents
+
+
+@pytest.mark.parametrize('name', ['chunked.txt', 'short.txt'])
+def test_truncated_body_resumed(server, tmp_path, name):
+    StandInHandler.ndrop = {'/' + name: 1}
+    destination = str(tmp_path) + '/' + name
+    index, error = fetch.download_first_available(
+        [[server + '/' + name, destination]])
+    assert index == 0
+    assert read(destination) == contents
+
+
+def test_truncated_body_recorded_as_failure(server, tmp_path, monkeypatch):
+    monkeypatch.setattr(fetch, 'fetch_retries', 1)
+    StandInHandler.ndrop = {'/chunked.txt': 5}
+    downloads = [[[server + '/chunked.txt', str(tmp_path) + '/chunked.txt']],
+                 [[server + '/data.txt', str(tmp_path) + '/data.txt']]]
+    fetched, errors = fetch.fetch_files(downloads, 2)
+    assert fetched == [None, 0]
+    assert 'IncompleteRead' in errors[0]
+    assert not os.path.exists(str(tmp_path) + '/chunked.txt')
+    assert read(str(tmp_path) + '/data.txt') == contents
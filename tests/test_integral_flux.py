@@ -0,0 +1,134 @@
+import math
+import numpy as np
+import pytest
+import scipy.integrate
+import operational_sep_quantities as sep
+from library import read_datasets as datasets
+
+#The analytic integrals must agree with scipy quad to within quad's own
+#default relative tolerance (1.49e-8)
+rtol = 1.5e-8
+atol = 1e-12
+
+goes_bins = datasets.define_energy_bins('GOES-13', 'differential', [], [''])
+sepem_bins = datasets.define_energy_bins('SEPEM', 'differential', [], [''])
+
+
+def quad_power_law(flux, energy, slope, start_energy, end_energy):
+    return scipy.integrate.quad(lambda x: flux*(x/energy)**slope,
+                start_energy, end_energy, epsrel=1e-12, epsabs=0)[0]
+
+
+def quad_integral_fluxes(experiment, min_energy, energy_bins, fluxes,
+                options, doBGSub):
+    """ Integral flux at each time step found with scipy quad, one pair of
+        bins at a time, as from_differential_to_integral_flux did before it
+        was integrated analytically.
+    """
+    energy_bins = [list(b) for b in energy_bins]
+    fluxes = np.array(fluxes, dtype=float)
+    if experiment in ('GOES-13', 'GOES-14', 'GOES-15') \
+        and 'Bruno2017' not in options:
+        remove = energy_bins.index([110., 900.])
+        del energy_bins[remove]
+        fluxes = np.delete(fluxes, remove, 0)
+    nbins = len(energy_bins)
+    center = [math.sqrt(b[0]*b[1]) if b[1] != -1 else -1
+                for b in energy_bins]
+
+    result = []
+    for j in range(fluxes.shape[1]):
+        total = 0
+        ninc = 0
+        for i in range(nbins-1):
+            if center[i+1] < min_energy:
+                continue
+            if energy_bins[i][1] == -1 or energy_bins[i+1][1] == -1:
+                continue
+            F1 = fluxes[i,j]
+            F2 = fluxes[i+1,j]
+            if np.isnan(F1) or np.isnan(F2): #data gap
+                continue
+            ninc = ninc + 1
+            if F1 == 0 or F2 == 0:
+                continue
+            endE = center[i+1]
+            if i+1 == nbins-1:
+                endE = energy_bins[nbins-1][1]
+            slope = (np.log(F2) - np.log(F1))/(np.log(center[i+1])
+                        - np.log(center[i]))
+            fint = quad_power_law(F1, center[i], slope,
+                        max(center[i], min_energy), endE)
+            if fint >= 1e-10:
+                total = total + fint
+        if energy_bins[nbins-1][1] == -1 and fluxes[nbins-1,j] >= 0:
+            total = total + fluxes[nbins-1,j]
+            ninc = ninc + 1
+        result.append(total if ninc > 0 else -1)
+    return np.array(result)
+
+
+def random_spectra(energy_bins, ntime, rng):
+    """ Falling power law spectra with random slopes and noise. """
+    center = np.array([math.sqrt(b[0]*b[1]) if b[1] != -1 else b[0]
+                for b in energy_bins])
+    slope = rng.uniform(-4, -0.5, ntime)
+    norm = 10**rng.uniform(-1, 4, ntime)
+    noise = 10**rng.uniform(-0.3, 0.3, (len(energy_bins), ntime))
+    return norm*(center[:,np.newaxis]/10.)**slope*noise
+
+
+@pytest.mark.parametrize('slope', [-3.5, -2., -1.000001, -1., -0.999999,
+                                    0., 1.5])
+def test_integrate_power_law(slope):
+    for start, end in ((10., 30.), (10., 10.5), (3., 900.)):
+        fint = sep.integrate_power_law(2.5, 12., slope, start, end)
+        assert fint == pytest.approx(quad_power_law(2.5, 12., slope, start,
+                    end), rel=rtol)
+
+
+def test_integrate_power_law_slope_minus_one_is_log():
+    fint = sep.integrate_power_law(np.array([2.]), np.array([5.]),
+                np.array([-1.]), np.array([10.]), np.array([40.]))
+    assert fint[0] == pytest.approx(2.*5.*math.log(4.), rel=1e-15)
+
+
+@pytest.mark.parametrize('experiment,energy_bins,min_energies', [
+    ('GOES-13', goes_bins, [10., 30., 100., 300.]),
+    ('SEPEM', sepem_bins, [5., 10., 30., 50., 100.]),
+])
+def test_integral_fluxes_match_quad(experiment, energy_bins, min_energies):
+    rng = np.random.default_rng(19)
+    fluxes = random_spectra(energy_bins, 60, rng)
+    #Data gaps, zero fluxes and spectra with a slope of -1 between bins
+    fluxes[2,5:10] = np.nan
+    fluxes[:,12] = np.nan
+    fluxes[3,20] = 0.
+    center = np.array([math.sqrt(b[0]*b[1]) if b[1] != -1 else b[0]
+                for b in energy_bins])
+    fluxes[:,30] = 50./center
+    if experiment == 'GOES-13':
+        #The 110 - 900 MeV bin is not used, so bad values there don't count
+        fluxes[5,40:45] = 1e6
+        fluxes[-1,50] = -1 #no >700 MeV flux
+
+    integral_fluxes = sep.from_differential_to_integral_fluxes(experiment,
+                min_energies, energy_bins, fluxes, [''], False)
+    for k in range(len(min_energies)):
+        expected = quad_integral_fluxes(experiment, min_energies[k],
+                energy_bins, fluxes, [''], False)
+        np.testing.assert_allclose(integral_fluxes[k], expected, rtol=rtol,
+                atol=atol)
+        assert integral_fluxes[k,12] == -1
+
+
+def test_hepad_last_bin_added():
+    fluxes = random_spectra(goes_bins, 5, np.random.default_rng(3))
+    with_hepad = sep.from_differential_to_integral_flux('GOES-13', 300.,
+                goes_bins, fluxes, [''], False)
+    fluxes[-1] = 0.
+    without_hepad = sep.from_differential_to_integral_flux('GOES-13', 300.,
+                goes_bins, fluxes, [''], False)
+    np.testing.assert_allclose(with_hepad - without_hepad,
+                random_spectra(goes_bins, 5, np.random.default_rng(3))[-1],
+                rtol=1e-12)
@@ -0,0 +1,51 @@
+import numpy as np
+import pytest
+from library import read_datasets as datasets
+
+
+@pytest.fixture
+def datapath(tmp_path, monkeypatch):
+    monkeypatch.setattr(datasets, 'datapath', str(tmp_path))
+    monkeypatch.setattr(datasets, 'cachepath', str(tmp_path) + '/cache')
+    monkeypatch.setattr(datasets, 'use_cache', True)
+    (tmp_path / 'test.txt').write_text('1 2 3\n')
+    return tmp_path
+
+
+def make_reader(calls):
+    def reader(filename):
+        calls.append(filename)
+        dates = np.array(['2012-03-07T00:00', '2012-03-07T00:05'],
+                        dtype='datetime64[us]')
+        fluxes = np.array([[1., datasets.badval]])
+        return dates, fluxes
+    return reader
+
+
+def test_cache_reused(datapath):
+    calls = []
+    reader = make_reader(calls)
+    datasets.read_with_cache('test.txt', 'key', reader)
+    dates, fluxes = datasets.read_with_cache('test.txt', 'key', reader)
+    assert len(calls) == 1
+    assert fluxes[0,1] == datasets.badval
+
+
+def test_cache_remade_for_new_badval(datapath, monkeypatch):
+    calls = []
+    reader = make_reader(calls)
+    datasets.read_with_cache('test.txt', 'key', reader)
+    monkeypatch.setattr(datasets, 'badval', -999)
+    dates, fluxes = datasets.read_with_cache('test.txt', 'key', reader)
+    assert len(calls) == 2
+    assert fluxes[0,1] == -999
+
+
+def test_cache_remade_for_new_version(datapath, monkeypatch):
+    calls = []
+    reader = make_reader(calls)
+    datasets.read_with_cache('test.txt', 'key', reader)
+    monkeypatch.setattr(datasets, 'cache_version',
+                        datasets.cache_version + 1)
+    datasets.read_with_cache('test.txt', 'key', reader)
+    assert len(calls) == 2
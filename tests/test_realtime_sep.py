@@ -0,0 +1,162 @@
+import datetime
+import numpy as np
+import pytest
+import operational_sep_quantities as sep
+import realtime_sep as rt
+from library import read_datasets as datasets
+
+experiment = 'GOES-16'
+flux_type = 'integral'
+energy_bins = datasets.define_energy_bins(experiment, flux_type, [], [''])
+energy_thresholds = [10, 100, 30]
+flux_thresholds = [10, 1, 1]
+
+
+def make_feed(seed, nbad=0.03):
+    """ Four days of 5 minute integral fluxes with two events, noise
+        and bad (NaN and fill value) points. The last point is good.
+    """
+    rng = np.random.default_rng(seed)
+    dates = np.arange(np.datetime64('2022-01-20T00:00', 'us'),
+                np.datetime64('2022-01-24T00:00', 'us'),
+                np.timedelta64(5, 'm'))
+    hours = np.arange(len(dates))/12.
+    profile = np.zeros(len(dates))
+    for t0, peak, tau in ((10., 1., 8.), (50., 0.4, 12.)):
+        after = hours >= t0
+        profile[after] += peak*(1 - np.exp(-(hours[after] - t0)/0.7)) \
+                        *np.exp(-(hours[after] - t0)/tau)
+    scale = np.array([300., 100., 40., 8., 3., 1.5])
+    fluxes = 0.05 + scale[:,np.newaxis]*profile \
+            *10**rng.normal(0, 0.08, (len(energy_bins), len(dates)))
+    bad = rng.random(fluxes.shape) < nbad
+    bad[:,-1] = False
+    fluxes[bad] = np.where(rng.random(np.count_nonzero(bad)) < 0.5,
+                    np.nan, datasets.badval)
+    return dates, fluxes
+
+
+def batch_values(dates, fluxes):
+    """ Event values found by operational_sep_quantities.py for the whole
+        time period, with bad points filled by linear interpolation.
+    """
+    values = np.array(fluxes)
+    quality = datasets.make_quality_mask(values)
+    values = datasets.check_for_bad_data(dates, values, energy_bins, True,
+                quality=quality)
+    integral_fluxes = sep.extract_integral_fluxes(values, experiment,
+                flux_type, flux_thresholds, energy_thresholds, energy_bins,
+                [''], False, quality)
+    crossing_time, peak_flux, peak_time, rise_time, event_end_time, \
+        duration = sep.calculate_threshold_crossings(energy_thresholds,
+                flux_thresholds, dates, integral_fluxes)
+    fluence = [0]*len(energy_thresholds)
+    spectrum = [None]*len(energy_thresholds)
+    for i in range(len(energy_thresholds)):
+        if crossing_time[i] == 0:
+            continue
+        nst, nend = datasets.extract_date_range_indices(crossing_time[i],
+                    event_end_time[i], dates)
+        fluence[i] = sep.calculate_fluence(dates[nst:nend],
+                    integral_fluxes[i,nst:nend])
+        spectrum[i], _ = sep.get_fluence_spectrum(experiment, flux_type, [''],
+                    False, '', energy_thresholds[i], flux_thresholds[i],
+                    dates[nst:nend], values[:,nst:nend], energy_bins, False,
+                    False)
+    return crossing_time, peak_flux, peak_time, event_end_time, fluence, \
+        spectrum
+
+
+def check_state(state, dates, fluxes):
+    crossing_time, peak_flux, peak_time, event_end_time, fluence, \
+        spectrum = batch_values(dates, fluxes)
+    values = rt.get_event_values(state)
+    for i in range(len(energy_thresholds)):
+        assert values[0][i] == crossing_time[i]
+        #Before a crossing, the state holds the running maximum flux
+        if crossing_time[i] == 0:
+            continue
+        assert values[1][i] == pytest.approx(peak_flux[i], rel=1e-12)
+        assert values[2][i] == peak_time[i]
+        assert values[4][i] == event_end_time[i]
+        assert values[6][i] == pytest.approx(fluence[i], rel=1e-9)
+        np.testing.assert_allclose(values[7][i], spectrum[i], rtol=1e-9)
+
+
+def new_state():
+    return rt.make_event_state(experiment, flux_type, energy_thresholds,
+                flux_thresholds, energy_bins, [''])
+
+
+@pytest.mark.parametrize('seed', [1, 2, 3])
+def test_chunked_feed_matches_batch(seed):
+    """ Whenever the feed ends on a time point with good values in all
+        channels, the state is the same as for the batch calculation.
+    """
+    dates, fluxes = make_feed(seed)
+    rng = np.random.default_rng(seed)
+    state = new_state()
+    ncheck = 0
+    k = 0
+    while k < len(dates):
+        k = min(len(dates), k + int(rng.integers(1, 120)))
+        #The feed is the whole file so far, as for run_realtime
+        rt.update_event_state(state, dates[:k], fluxes[:,:k])
+        if k > 3 and not np.isnan(state["held_fluxes"]).any() \
+            and len(state["held_dates"]) == 0:
+            check_state(state, dates[:k], fluxes[:,:k])
+            ncheck = ncheck + 1
+    assert ncheck > 5
+    assert all(tstate["ended"] for tstate in state["thresholds"])
+
+
+def test_bad_points_inside_threshold_run():
+    """ Bad points among the points above threshold at the start of the
+        event and below threshold at the end are filled by interpolation
+        and counted, as in the batch calculation.
+    """
+    dates = np.arange(np.datetime64('2022-01-20T00:00', 'us'),
+                np.datetime64('2022-01-20T02:00', 'us'),
+                np.timedelta64(5, 'm'))
+    flux = np.full(len(dates), 5.)
+    flux[4:14] = 20. #above the 10 pfu threshold
+    flux[5] = np.nan #bad point in the run of 3 points above threshold
+    flux[15] = datasets.badval #bad points among those below the end
+    flux[17] = np.nan
+    fluxes = np.tile(flux, (len(energy_bins), 1))
+
+    state = new_state()
+    for k in range(1, len(dates) + 1):
+        rt.update_event_state(state, dates[:k], fluxes[:,:k])
+    check_state(state, dates, fluxes)
+    tstate = state["thresholds"][0]
+    assert tstate["crossing_time"] == datasets.to_datetime(dates[4])
+    assert tstate["ended"]
+    assert tstate["event_end_time"] == datasets.to_datetime(dates[14])
+
+
+def test_held_points_released_after_max_hold():
+    dates, fluxes = make_feed(4, nbad=0)
+    fluxes[2,100:] = np.nan #>10 MeV channel stops
+    state = new_state()
+    rt.update_event_state(state, dates[:100], fluxes[:,:100])
+    rt.update_event_state(state, dates[:110], fluxes[:,:110])
+    assert len(state["held_dates"]) == 10
+    rt.update_event_state(state, dates[:200], fluxes[:,:200])
+    assert len(state["held_dates"]) == 0
+
+
+def test_short_first_update():
+    """ A first update with a single time point doesn't exit; the time
+        resolution is found once a second point arrives.
+    """
+    dates, fluxes = make_feed(5)
+    fluxes[:,0] = 1.
+    state = new_state()
+    assert not rt.update_event_state(state, dates[:1], fluxes[:,:1])
+    assert state["time_resolution"] is None
+    assert rt.get_event_values(state)[0] == [0]*len(energy_thresholds)
+    rt.update_event_state(state, dates[:2], fluxes[:,:2])
+    assert state["time_resolution"] == datetime.timedelta(minutes=5)
+    rt.update_event_state(state, dates, fluxes)
+    check_state(state, dates, fluxes)
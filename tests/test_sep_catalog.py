@@ -0,0 +1,133 @@
+import csv
+import datetime
+import numpy as np
+import pytest
+import operational_sep_quantities as sep
+import sep_catalog
+from library import read_datasets as datasets
+
+experiment = 'GOES-13'
+flux_type = 'integral'
+energy_bins = datasets.define_energy_bins(experiment, flux_type, [], [''])
+energy_thresholds = [10, 100, 30]
+flux_thresholds = [10, 1, 1]
+
+
+def make_mission(seed, nbad=0.):
+    """ 40 days of 5 minute integral fluxes with events of different
+        sizes, some of which overlap, and optional NaN gaps.
+    """
+    rng = np.random.default_rng(seed)
+    dates = np.arange(np.datetime64('2012-01-01T00:00', 'us'),
+                np.datetime64('2012-02-10T00:00', 'us'),
+                np.timedelta64(5, 'm'))
+    hours = np.arange(len(dates))/12.
+    profile = np.zeros(len(dates))
+    for t0 in np.sort(rng.uniform(0, hours[-1] - 12, 12)):
+        after = hours >= t0
+        dt = hours[after] - t0
+        profile[after] += 10**rng.uniform(-1.5, 0.7) \
+            *(1 - np.exp(-dt/0.7))*np.exp(-dt/rng.uniform(3, 20))
+    scale = np.array([300., 40., 8., 3., 2., 1.5, 0.05])
+    fluxes = 0.05 + scale[:,np.newaxis]*profile \
+            *10**rng.normal(0, 0.08, (len(energy_bins), len(dates)))
+    fluxes[rng.random(fluxes.shape) < nbad] = np.nan
+    return dates, fluxes
+
+
+def windowed_events(dates, flux, energy_threshold, flux_threshold):
+    """ Events found by running calculate_threshold_crossings (as run_all
+        does for a single date range) on the time period that starts after
+        the end of each event.
+    """
+    events = []
+    first = 0
+    while first < len(dates) - 3:
+        values = sep.calculate_threshold_crossings([energy_threshold],
+                    [flux_threshold], dates[first:], flux[np.newaxis,first:])
+        if values[0][0] == 0:
+            break
+        events.append(tuple(value[0] for value in values))
+        if values[4][0] == datasets.to_datetime(dates[-1]):
+            break
+        first = datasets.extract_date_range_indices(values[0][0],
+                    values[4][0], dates)[1]
+    return events
+
+
+@pytest.mark.parametrize('seed,nbad', [(1, 0.), (2, 0.), (3, 0.03),
+                                        (4, 0.1)])
+def test_all_crossings_match_windowed_run_all(seed, nbad):
+    dates, fluxes = make_mission(seed, nbad)
+    integral_fluxes = sep.extract_integral_fluxes(fluxes, experiment,
+                flux_type, flux_thresholds, energy_thresholds, energy_bins,
+                [''], False)
+    values = sep.find_all_threshold_crossings(energy_thresholds,
+                flux_thresholds, dates, integral_fluxes)
+    nevents = 0
+    for i in range(len(energy_thresholds)):
+        expected = windowed_events(dates, integral_fluxes[i],
+                    energy_thresholds[i], flux_thresholds[i])
+        found = list(zip(*[values[k][i] for k in range(6)]))
+        assert found == expected
+        nevents = nevents + len(expected)
+    assert nevents > 5
+
+
+def test_event_ending_before_last_point():
+    """ An event that ends with a single time point left doesn't stop
+        the scan. 30 minute data, so one point below threshold ends an event.
+    """
+    dates = np.arange(np.datetime64('2012-01-01T00:00', 'us'),
+                np.datetime64('2012-01-03T00:00', 'us'),
+                np.timedelta64(30, 'm'))
+    flux = np.full(len(dates), 0.1)
+    flux[20:30] = 20.
+    flux[-8:-2] = 20. #ends at dates[-2]
+    values = sep.find_all_threshold_crossings([10], [10], dates,
+                flux[np.newaxis,:])
+    assert values[0][0] == [datasets.to_datetime(dates[20]),
+                            datasets.to_datetime(dates[-8])]
+    assert values[4][0][1] == datasets.to_datetime(dates[-2])
+
+
+def test_scan_catalog_lists(tmp_path, monkeypatch):
+    """ The lists written by scan_catalog hold the events, fluences and
+        format of the lists made by run_multi_sep.py.
+    """
+    dates, fluxes = make_mission(5)
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(sep_catalog, 'listpath', str(tmp_path) + '/lists')
+    monkeypatch.setattr(sep, 'read_in_flux_files', lambda *args: (dates,
+                fluxes, energy_bins, datasets.make_quality_mask(fluxes)))
+
+    threshfiles = sep_catalog.scan_catalog('2012-01-01', '2012-02-10',
+                experiment, flux_type, '30,1', '', False, False)
+
+    integral_fluxes = sep.extract_integral_fluxes(fluxes, experiment,
+                flux_type, flux_thresholds, energy_thresholds, energy_bins,
+                [''], False)
+    assert [fname.split('/')[-1] for fname in threshfiles] == \
+        ['sep_list_10MeV_10pfu.csv', 'sep_list_100MeV_1pfu.csv',
+        'sep_list_30.0MeV_1.0pfu.csv']
+    for i in range(len(energy_thresholds)):
+        with open(threshfiles[i]) as infile:
+            rows = list(csv.reader(infile))
+        assert rows[0][0] == '#Experiment'
+        assert len(rows[0]) == 9
+        expected = windowed_events(dates, integral_fluxes[i],
+                    energy_thresholds[i], flux_thresholds[i])
+        assert len(rows) - 1 == len(expected) > 0
+        for row, event in zip(rows[1:], expected):
+            crossing_time, peak_flux, peak_time, rise_time, end_time, \
+                duration = event
+            nst, nend = datasets.extract_date_range_indices(crossing_time,
+                        end_time, dates)
+            fluence = sep.calculate_fluence(dates[nst:nend],
+                        integral_fluxes[i,nst:nend])
+            assert row[0] == experiment
+            assert row[2] == str(crossing_time)
+            assert row[3] == str(end_time)
+            assert float(row[6]) == peak_flux
+            assert row[7] == str(peak_time)
+            assert float(row[8]) == pytest.approx(fluence, rel=1e-12)
@@ -0,0 +1,61 @@
+import datetime
+import numpy as np
+import pytest
+import operational_sep_quantities as sep
+
+energy_thresholds = [10, 100]
+flux_thresholds = [10, 1]
+
+
+@pytest.fixture
+def event():
+    """ 12 hours of 5 minute data. >10 MeV crosses threshold 2 hours in,
+        so all of the delayed times are in the time range. >100 MeV
+        crosses 5 hours in, so Ts+7 hours is after the end.
+    """
+    start = datetime.datetime(2017, 9, 10)
+    dates = [start + datetime.timedelta(minutes=5*k) for k in range(144)]
+    fluxes = np.full((2, len(dates)), 0.1)
+    fluxes[0,24:] = 20.
+    fluxes[1,60:] = 5.
+    crossing_time = [dates[24], dates[60]]
+    return dates, fluxes, crossing_time
+
+
+def test_insufficient_data_flag(event):
+    dates, fluxes, crossing_time = event
+    times, values, insufficient = sep.calculate_umasep_info(
+                energy_thresholds, flux_thresholds, dates, fluxes,
+                crossing_time)
+
+    assert insufficient == [False, True]
+    assert None not in values[0]
+    assert times[1][4] == 0 and values[1][4] is None
+    assert times[1][3] != 0 and values[1][3] == pytest.approx(5.)
+
+
+def test_flag_written_to_csv(event, tmp_path, monkeypatch):
+    dates, fluxes, crossing_time = event
+    times, values, insufficient = sep.calculate_umasep_info(
+                energy_thresholds, flux_thresholds, dates, fluxes,
+                crossing_time)
+    nthresh = len(energy_thresholds)
+    duration = [datetime.timedelta(hours=1)]*nthresh
+    monkeypatch.setattr(sep, 'outpath', str(tmp_path))
+
+    year, month, day, crossed = sep.print_values_to_file('GOES-13',
+                'integral', [''], False, '', dates[0], energy_thresholds,
+                flux_thresholds, crossing_time, [1.]*nthresh, crossing_time,
+                [20., 5.], crossing_time, duration, dates[-1:]*nthresh,
+                duration, [1e6]*nthresh, [False]*nthresh, True, times,
+                values, insufficient)
+
+    assert crossed
+    with open(str(tmp_path) + '/sep_values_GOES-13_integral_2017_9_10.csv') \
+        as csvfile:
+        lines = csvfile.read().splitlines()
+    header = lines[-3].split(',')
+    assert header[-1] == 'UMASEP Insufficient Data'
+    assert lines[-2].split(',')[-1] == 'False'
+    assert lines[-1].split(',')[-3:] == ['None', 'None', 'True']
+
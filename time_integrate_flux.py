@@ -15,7 +15,6 @@ import argparse
 import math
 import sys
 from lmfit import minimize, Parameters
-from statistics import mode
 from scipy.odr import Model, Data, RealData, ODR
 
 #From global_vars.py
@@ -152,7 +151,8 @@ def read_in_flux_files(experiment, flux_type, user_file, model_name, startdate,
     #read in flux files
     if experiment != "user":
         all_dates, all_fluxes, west_detector =datasets.read_in_files(experiment,
-                    flux_type, filenames1, filenames2, filenames_orien, options)
+                    flux_type, filenames1, filenames2, filenames_orien, options,
+                    startdate, enddate)
     if experiment == "user":
         all_dates, all_fluxes = datasets.read_in_user_files(filenames1)
         west_detector = []
@@ -178,6 +178,8 @@ def read_in_flux_files(experiment, flux_type, user_file, model_name, startdate,
         sys.exit("The specified start and end dates were not present in the "
                 "specified input file. Exiting.")
     
+    #The rest of this script works with a list of datetimes
+    dates = datasets.to_datetime(dates)
     return dates, fluxes, energy_bins
       
 
@@ -224,13 +226,7 @@ def determine_time_resolution(dates):
         :time_resolution: (time delta object)
         
     """
-    ndates = len(dates)
-    time_diff = [a - b for a,b in zip(dates[1:ndates],dates[0:ndates-1])]
-    if not time_diff:
-        sys.exit("determine_time_resolution: Require more than 1 data point "
-                "to determine time resolution. Please extend your "
-                "requested time range and try again. Exiting.")
-    time_resolution = mode(time_diff)
+    time_resolution = datasets.find_time_resolution(dates)["time_resolution"]
     return time_resolution
 
 